@@ -0,0 +1,297 @@
+import glob
+import hashlib
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from app.pipeline import PDFPipeline
+from app.features.feature_io import SUFFIXES
+
+
+def document_id(pdf_path):
+    """
+    Stable per-document folder name: file stem plus a short hash of the
+    absolute path, so equally named PDFs in different folders do not collide.
+    """
+    resolved = str(Path(pdf_path).resolve())
+    digest = hashlib.sha1(resolved.encode("utf-8")).hexdigest()[:8]
+    return f"{Path(pdf_path).stem}_{digest}"
+
+
+def process_document(
+    pdf_path,
+    document_dir,
+    stream=False,
+    cache_dir=None,
+    image_folder=None,
+    output_format="json",
+    model_dir=None,
+    table_prefilter=True,
+    table_backend="auto",
+    image_mode="full",
+    image_filter=True
+):
+    """
+    Run the pipeline for one document and return its manifest record.
+    Runs inside a long-lived worker process, so heavy imports
+    (fitz, camelot, pandas, cv2) happen once per worker, not per document.
+    image_folder is the content-addressed image store shared by all
+    documents of the batch. With model_dir, rows are also classified
+    and sections.json is written; the model is loaded once per worker.
+    """
+    document_dir = Path(document_dir)
+    output_name = "features" + (SUFFIXES["jsonl"] if stream else SUFFIXES[output_format])
+    output_path = document_dir / output_name
+
+    record = {
+        "pdf_path": str(pdf_path),
+        "output_path": str(output_path),
+        "status": "done",
+        "error": None,
+    }
+
+    start = time.time()
+
+    try:
+        document_dir.mkdir(parents=True, exist_ok=True)
+
+        classifier = None
+        if model_dir:
+            from app.models.classifier import Classifier
+            classifier = Classifier(model_dir)
+
+        pipeline = PDFPipeline(
+            pdf_path,
+            output_path=str(output_path),
+            stream=stream,
+            image_folder=image_folder or str(document_dir / "images"),
+            table_folder=str(document_dir / "tables"),
+            cache_dir=cache_dir,
+            table_prefilter=table_prefilter,
+            table_backend=table_backend,
+            image_mode=image_mode,
+            image_filter=image_filter,
+            output_format=output_format,
+            classifier=classifier
+        )
+        pipeline.run()
+
+        if classifier is not None:
+            record["sections_path"] = pipeline.sections_path
+
+        # Image filter and table prefilter counts for this document
+        record["reports"] = pipeline.reports
+    except Exception as e:
+        record["status"] = "failed"
+        record["error"] = f"{type(e).__name__}: {e}"
+        record["traceback"] = traceback.format_exc()
+
+    record["elapsed_seconds"] = round(time.time() - start, 3)
+
+    return record
+
+
+class BatchRunner:
+    """
+    Runs PDFPipeline over many documents with a pool of worker
+    processes, recording every outcome in a JSONL manifest so an
+    interrupted run can be resumed. Images go to one store shared by
+    all documents, so repeated images are written once per batch.
+    """
+
+    def __init__(
+        self,
+        inputs,
+        output_dir="data/interim/batch",
+        workers=1,
+        manifest_path=None,
+        stream=False,
+        cache_dir=None,
+        output_format="json",
+        model_dir=None,
+        table_prefilter=True,
+        table_backend="auto",
+        image_mode="full",
+        image_filter=True
+    ):
+        self.inputs = inputs
+        self.cache_dir = cache_dir
+        self.output_format = output_format
+        self.model_dir = model_dir
+        self.table_prefilter = table_prefilter
+        self.table_backend = table_backend
+        self.image_mode = image_mode
+        self.image_filter = image_filter
+        self.output_dir = Path(output_dir)
+        self.workers = workers
+        self.stream = stream
+        self.manifest_path = (
+            Path(manifest_path) if manifest_path
+            else self.output_dir / "manifest.jsonl"
+        )
+
+    def collect(self):
+        """
+        Expand the inputs into a sorted, de-duplicated list of PDF paths.
+        Each input may be a PDF file, a directory (searched recursively),
+        a glob pattern, or a text file listing one path per line.
+        """
+        pdf_paths = set()
+
+        for item in self.inputs:
+            path = Path(item)
+
+            if path.is_dir():
+                pdf_paths.update(
+                    p for p in path.rglob("*") if p.suffix.lower() == ".pdf"
+                )
+            elif path.is_file() and path.suffix.lower() == ".pdf":
+                pdf_paths.add(path)
+            elif path.is_file():
+                with open(path, "r", encoding="utf-8") as f:
+                    pdf_paths.update(
+                        Path(line.strip()) for line in f if line.strip()
+                    )
+            else:
+                matches = glob.glob(item, recursive=True)
+                if not matches:
+                    raise FileNotFoundError(f"No PDFs match: {item}")
+                pdf_paths.update(
+                    Path(m) for m in matches if m.lower().endswith(".pdf")
+                )
+
+        return sorted(pdf_paths)
+
+    @staticmethod
+    def file_signature(pdf_path):
+        try:
+            stat = os.stat(pdf_path)
+        except OSError:
+            return {"size": None, "mtime": None}
+        return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+    def load_manifest(self):
+        """
+        Return the latest manifest record per PDF path.
+        """
+        records = {}
+
+        if not self.manifest_path.exists():
+            return records
+
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A run killed mid-write can leave a partial last line
+                    continue
+                records[record["pdf_path"]] = record
+
+        return records
+
+    def is_finished(self, pdf_path, record):
+        """
+        A document is skipped on resume only if it finished successfully,
+        its output still exists and the PDF has not changed since.
+        """
+        if not record or record.get("status") != "done":
+            return False
+
+        if not Path(record["output_path"]).exists():
+            return False
+
+        signature = self.file_signature(pdf_path)
+        return (
+            record.get("size") == signature["size"]
+            and record.get("mtime") == signature["mtime"]
+        )
+
+    def run(self):
+
+        pdf_paths = self.collect()
+        previous = self.load_manifest()
+
+        pending = [
+            p for p in pdf_paths
+            if not self.is_finished(p, previous.get(str(p)))
+        ]
+
+        print(
+            f"Batch: {len(pdf_paths)} documents, "
+            f"{len(pdf_paths) - len(pending)} already done, "
+            f"{len(pending)} to process"
+        )
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+
+        summary = {"done": 0, "failed": 0}
+        batch_start = time.time()
+
+        with open(self.manifest_path, "a", encoding="utf-8") as manifest:
+
+            def record_result(pdf_path, record):
+                record.update(self.file_signature(pdf_path))
+                record["finished_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+                manifest.write(json.dumps(record, ensure_ascii=False) + "\n")
+                manifest.flush()
+
+                summary[record["status"]] += 1
+                print(
+                    f"[{summary['done'] + summary['failed']}/{len(pending)}] "
+                    f"{record['status']}: {pdf_path} "
+                    f"({record['elapsed_seconds']:.2f}s)"
+                )
+
+            if self.workers <= 1:
+                for pdf_path in pending:
+                    record = process_document(
+                        str(pdf_path),
+                        str(self.output_dir / document_id(pdf_path)),
+                        self.stream,
+                        self.cache_dir,
+                        str(self.output_dir / "images"),
+                        self.output_format,
+                        self.model_dir,
+                        self.table_prefilter,
+                        self.table_backend,
+                        self.image_mode,
+                        self.image_filter
+                    )
+                    record_result(pdf_path, record)
+            else:
+                with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                    futures = {
+                        executor.submit(
+                            process_document,
+                            str(pdf_path),
+                            str(self.output_dir / document_id(pdf_path)),
+                            self.stream,
+                            self.cache_dir,
+                            str(self.output_dir / "images"),
+                            self.output_format,
+                            self.model_dir,
+                            self.table_prefilter,
+                            self.table_backend,
+                            self.image_mode,
+                            self.image_filter
+                        ): pdf_path
+                        for pdf_path in pending
+                    }
+
+                    for future in as_completed(futures):
+                        record_result(futures[future], future.result())
+
+        print(
+            f"Batch complete in {time.time() - batch_start:.2f}s: "
+            f"{summary['done']} done, {summary['failed']} failed. "
+            f"Manifest: {self.manifest_path}"
+        )
+
+        return summary
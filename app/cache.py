@@ -0,0 +1,250 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+
+# Bump when the layout of cache entries changes
+CACHE_FORMAT_VERSION = 1
+
+APP_DIR = Path(__file__).resolve().parent
+
+# Source files whose behaviour determines extraction output
+FINGERPRINT_SOURCES = [
+    APP_DIR / "extractor",
+    APP_DIR / "features",
+    APP_DIR / "pipeline.py",
+]
+
+_code_fingerprint = None
+
+
+def code_fingerprint():
+    """
+    SHA-256 over the extractor and feature source code, so any code
+    change invalidates previously cached results.
+    """
+    global _code_fingerprint
+
+    if _code_fingerprint is None:
+        digest = hashlib.sha256(f"format:{CACHE_FORMAT_VERSION}".encode("utf-8"))
+
+        files = []
+        for source in FINGERPRINT_SOURCES:
+            files.extend(sorted(source.rglob("*.py")) if source.is_dir() else [source])
+
+        for path in files:
+            digest.update(str(path.relative_to(APP_DIR)).encode("utf-8"))
+            digest.update(path.read_bytes())
+
+        _code_fingerprint = digest.hexdigest()
+
+    return _code_fingerprint
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """
+    SHA-256 of a file's bytes, read in chunks.
+    """
+    digest = hashlib.sha256()
+
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """
+    Content-addressed on-disk cache of pipeline results.
+
+    Entries are keyed by the PDF's SHA-256, the extractor/feature code
+    fingerprint and the extraction options. Least recently used entries
+    are evicted once the cache exceeds max_bytes.
+    """
+
+    def __init__(self, cache_dir="data/cache", max_bytes=2 * 1024 ** 3):
+        self.cache_dir = Path(cache_dir)
+        self.entries_dir = self.cache_dir / "entries"
+        self.stats_path = self.cache_dir / "stats.jsonl"
+        self.max_bytes = max_bytes
+        self.entries_dir.mkdir(parents=True, exist_ok=True)
+
+    def key(self, pdf_path, options=None):
+        """
+        Cache key for a PDF under the current code and options.
+        """
+        digest = hashlib.sha256()
+        digest.update(file_digest(pdf_path).encode("utf-8"))
+        digest.update(code_fingerprint().encode("utf-8"))
+        digest.update(json.dumps(options or {}, sort_keys=True).encode("utf-8"))
+        return digest.hexdigest()
+
+    def entry_path(self, key):
+        return self.entries_dir / key[:2] / f"{key}.json"
+
+    def record(self, event, **fields):
+        """
+        Append a lookup event to stats.jsonl. Single-line appends keep
+        this safe to share between batch worker processes.
+        """
+        with open(self.stats_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"event": event, "time": time.time(), **fields}) + "\n")
+
+    def get(self, key, pdf_bytes=0):
+        """
+        Return the cached entry ({"elements", "features", ...}) or None.
+        """
+        path = self.entry_path(key)
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.record("miss", pdf_bytes=pdf_bytes)
+            return None
+
+        # Refresh mtime so eviction sees this entry as recently used
+        os.utime(path)
+
+        self.record(
+            "hit",
+            pdf_bytes=pdf_bytes,
+            seconds_saved=entry.get("extraction_seconds", 0)
+        )
+
+        return entry
+
+    def put(self, key, elements, features, extraction_seconds=0):
+        """
+        Store an entry atomically and evict old entries if needed.
+        """
+        path = self.entry_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        entry = {
+            "elements": elements,
+            "features": features,
+            "extraction_seconds": extraction_seconds,
+            "created_at": time.time(),
+        }
+
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+
+        os.replace(tmp_path, path)
+
+        self.evict()
+
+    def list_entries(self):
+        """
+        Return (mtime, size, path) for every entry, oldest first.
+        """
+        entries = []
+
+        for path in self.entries_dir.rglob("*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort()
+        return entries
+
+    def evict(self):
+        """
+        Delete least recently used entries until the cache fits max_bytes.
+        """
+        entries = self.list_entries()
+        total = sum(size for _, size, _ in entries)
+
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def stats(self):
+
+        hits = 0
+        misses = 0
+        bytes_saved = 0
+        seconds_saved = 0.0
+
+        if self.stats_path.exists():
+            with open(self.stats_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+
+                    if event["event"] == "hit":
+                        hits += 1
+                        bytes_saved += event.get("pdf_bytes", 0)
+                        seconds_saved += event.get("seconds_saved", 0)
+                    elif event["event"] == "miss":
+                        misses += 1
+
+        entries = self.list_entries()
+        lookups = hits + misses
+
+        return {
+            "entries": len(entries),
+            "cache_bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+            "lookups": lookups,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0,
+            "bytes_saved": bytes_saved,
+            "seconds_saved": round(seconds_saved, 3),
+        }
+
+    def clear(self):
+        for _, _, path in self.list_entries():
+            path.unlink()
+        if self.stats_path.exists():
+            self.stats_path.unlink()
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        prog="python -m app.cache",
+        description="Inspect or clear the extraction cache."
+    )
+    parser.add_argument("command", choices=["stats", "clear"])
+    parser.add_argument("--cache-dir", default="data/cache")
+    args = parser.parse_args()
+
+    cache = ExtractionCache(args.cache_dir)
+
+    if args.command == "clear":
+        cache.clear()
+        print(f"Cache cleared: {args.cache_dir}")
+        return
+
+    stats = cache.stats()
+
+    print(f"Entries:       {stats['entries']}")
+    print(f"Size:          {stats['cache_bytes'] / 1024 ** 2:.1f} MB "
+          f"of {stats['max_bytes'] / 1024 ** 2:.1f} MB")
+    print(f"Lookups:       {stats['lookups']} "
+          f"({stats['hits']} hits, {stats['misses']} misses)")
+    print(f"Hit rate:      {stats['hit_rate']:.1%}")
+    print(f"Bytes saved:   {stats['bytes_saved'] / 1024 ** 2:.1f} MB of PDF not re-extracted")
+    print(f"Time saved:    {stats['seconds_saved']:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
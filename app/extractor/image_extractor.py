@@ -1,72 +1,421 @@
 import os
+import glob
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from app.extractor.pdf_loader import PDFLoader
 
 class ImageExtractor:
     """
     Extracts images from PDF and returns structured layout elements
     including bounding boxes and metadata.
+
+    Images are stored once in a content-addressed store:
+    <output_folder>/<hash[:2]>/<hash>.<ext>. An image repeated on many
+    pages is decoded and written once per document (keyed on xref), and
+    not at all if another document already stored the same content.
+
+    Modes:
+        "full"      decode and write images inside the page loop
+        "metadata"  geometry only; extract_image() is never called
+        "deferred"  geometry only, keeping xrefs so materialize() or,
+                    once the document is closed, materialize_pdf() can
+                    write the images later on demand
+        "async"     decode in the page loop, write on a bounded
+                    background thread pool
     """
 
-    def __init__(self, document, output_folder="data/output/images"):
+    MODES = ("full", "metadata", "deferred", "async")
+
+    # Pre-decode filter defaults. Images are dropped using only the
+    # get_images() tuple and the placed bbox, before any decoding.
+    DEFAULT_FILTER = {
+        "min_pixel_side": 4,       # 1x1 spacers, hairlines
+        "min_pixels": 64,          # width * height in image pixels
+        "min_placed_side": 3.0,    # points; bullets, glyph-sized images
+        "min_placed_area": 36.0,   # square points
+        "drop_masks": True,        # soft masks and 1-bit stencil masks
+    }
+
+    def __init__(
+        self,
+        document,
+        output_folder="data/output/images",
+        mode="full",
+        write_workers=4,
+        max_pending_writes=64,
+        image_filter=None
+    ):
+        """
+        image_filter: None disables filtering, True uses DEFAULT_FILTER,
+        a dict overrides individual DEFAULT_FILTER entries.
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown image mode: {mode}")
+
         self.document = document
         self.output_folder = output_folder
+        self.mode = mode
         os.makedirs(self.output_folder, exist_ok=True)
 
-    def extract(self):
+        if image_filter is True:
+            image_filter = {}
+        self.image_filter = (
+            {**self.DEFAULT_FILTER, **image_filter}
+            if image_filter is not None else None
+        )
+
+        # Cumulative over all pages: what the filter dropped and why
+        self.report = {
+            "images_seen": 0,
+            "placements_kept": 0,
+            "filtered_mask": 0,
+            "filtered_tiny_image": 0,
+            "filtered_tiny_placement": 0,
+        }
+
+        # xref -> stored image record, for this document
+        self.stored_images = {}
+
+        # "async": the semaphore bounds the number of writes in flight
+        # (queued or running), so at most max_pending_writes decoded
+        # images are held in memory at once
+        self.write_pool = None
+        self.pending_writes = []
+        if mode == "async":
+            self.write_pool = ThreadPoolExecutor(max_workers=write_workers)
+            self.write_slots = threading.BoundedSemaphore(max_pending_writes)
+
+    def content_hash(self, img):
+        """
+        Hash an image by its raw (still encoded) stream plus the
+        geometry and colour info from the get_images() tuple.
+        Reading the raw stream does not decode the image.
+        """
+        xref, _, width, height, bpc, colorspace = img[:6]
+
+        digest = hashlib.sha256(self.document.xref_stream_raw(xref) or b"")
+        digest.update(f"{width}x{height}:{bpc}:{colorspace}".encode("utf-8"))
+
+        return digest.hexdigest()[:32]
+
+    def store_image(self, img):
+        """
+        Return the stored image record for a get_images() tuple,
+        decoding and writing the image only if it is not stored yet.
+        """
+        xref = img[0]
+
+        if xref in self.stored_images:
+            return self.stored_images[xref]
+
+        image_hash = self.content_hash(img)
+        shard_folder = os.path.join(self.output_folder, image_hash[:2])
+
+        image_path = self.find_stored(shard_folder, image_hash)
+
+        if image_path is None:
+            # Extract image bytes
+            base_image = self.document.extract_image(xref)
+            image_path = os.path.join(shard_folder, f"{image_hash}.{base_image['ext']}")
+
+            os.makedirs(shard_folder, exist_ok=True)
+
+            if self.write_pool is not None:
+                self.write_slots.acquire()
+                self.pending_writes.append(
+                    self.write_pool.submit(self.write_image, image_path, base_image["image"])
+                )
+            else:
+                self.write_image(image_path, base_image["image"])
+
+        record = {
+            "filename": os.path.basename(image_path),
+            "path": image_path,
+            "hash": image_hash,
+        }
+        self.stored_images[xref] = record
+
+        return record
+
+    @staticmethod
+    def find_stored(shard_folder, image_hash):
+        """
+        Path of the stored <hash>.<ext> file, or None. In-progress
+        <hash>.<ext>.<pid>.<thread>.tmp files of other writers do not
+        count, so a reader never picks up a partial image.
+        """
+        for path in glob.glob(os.path.join(shard_folder, f"{image_hash}.*")):
+            if "." not in os.path.basename(path)[len(image_hash) + 1:]:
+                return path
+
+        return None
+
+    def write_image(self, image_path, image_bytes):
+        """
+        Write then rename, so concurrent workers never see partial files.
+        """
+        tmp_path = f"{image_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(image_bytes)
+            os.replace(tmp_path, image_path)
+        finally:
+            if self.write_pool is not None:
+                self.write_slots.release()
+
+    def flush(self):
+        """
+        Wait for background writes ("async" mode) and re-raise the
+        first write error, if any.
+        """
+        pending, self.pending_writes = self.pending_writes, []
+
+        for future in pending:
+            future.result()
+
+    def close(self):
+        self.flush()
+
+        if self.write_pool is not None:
+            self.write_pool.shutdown()
+            self.write_pool = None
+
+    def materialize(self, elements):
+        """
+        Write the images of "metadata"/"deferred" elements now and fill
+        in their content, image_path and image_hash. Needs the same
+        document the elements were extracted from to still be open;
+        see materialize_pdf() otherwise.
+        """
+        images_by_page = {}
+
+        for element in elements:
+            if element.get("type") != "Image" or element.get("image_path"):
+                continue
+
+            page_number = element["page_number"] - 1
+
+            if page_number not in images_by_page:
+                images_by_page[page_number] = {
+                    img[0]: img
+                    for img in self.document[page_number].get_images(full=True)
+                }
+
+            stored = self.store_image(images_by_page[page_number][element["xref"]])
+
+            element["content"] = stored["filename"]
+            element["image_path"] = stored["path"]
+            element["image_hash"] = stored["hash"]
+
+        self.flush()
+
+        return elements
+
+    def extract(self, pages=None):
         """
         Extract images page-wise with bounding box and metadata.
+        Only the given 0-based page numbers are visited (all pages when None).
         Returns structured image layout elements.
         """
 
         image_elements = []
 
-        for page_number, page in enumerate(self.document):
+        for _, page_elements in self.iter_pages(pages):
+            image_elements.extend(page_elements)
+
+        self.flush()
+
+        return image_elements
+
+    def iter_pages(self, pages=None):
+        """
+        Yield (page_number, image elements) one page at a time.
+        """
+        if pages is None:
+            pages = range(len(self.document))
+
+        for page_number in pages:
+            yield page_number, self.extract_page(page_number)
+
+    def filter_reason(self, img, mask_xrefs):
+        """
+        Return why an image should be dropped, or None to keep it.
+        Uses only the get_images() tuple:
+        (xref, smask, width, height, bpc, colorspace, ...).
+        """
+        if self.image_filter is None:
+            return None
+
+        xref, _, width, height, bpc, colorspace = img[:6]
+
+        if self.image_filter["drop_masks"] and (
+            xref in mask_xrefs or (bpc == 1 and not colorspace)
+        ):
+            return "filtered_mask"
+
+        if (
+            min(width, height) < self.image_filter["min_pixel_side"]
+            or width * height < self.image_filter["min_pixels"]
+        ):
+            return "filtered_tiny_image"
+
+        return None
+
+    def keep_placement(self, bbox):
+        if self.image_filter is None:
+            return True
+
+        width = bbox[2] - bbox[0]
+        height = bbox[3] - bbox[1]
+
+        return (
+            min(width, height) >= self.image_filter["min_placed_side"]
+            and width * height >= self.image_filter["min_placed_area"]
+        )
+
+    @staticmethod
+    def format_report(report):
+        return (
+            f"Images: {report['images_seen']} seen, "
+            f"{report['placements_kept']} placements kept; filtered "
+            f"{report['filtered_mask']} masks, "
+            f"{report['filtered_tiny_image']} tiny images, "
+            f"{report['filtered_tiny_placement']} tiny placements"
+        )
+
+    @staticmethod
+    def image_placements(page, image_info=None):
+        """
+        Map xref -> list of placement bboxes for every image on the page,
+        from a single get_image_info() call (or its cached result).
+        An xref drawn several times on the page has one bbox per placement.
+        """
+        if image_info is None:
+            image_info = page.get_image_info(xrefs=True)
+
+        placements = {}
+
+        for info in image_info:
+            placements.setdefault(info["xref"], []).append(info["bbox"])
+
+        return placements
+
+    def extract_page(self, page_number, context=None):
+        """
+        Extract image elements for a single 0-based page number.
+        Each placement of an image becomes its own element.
+        context: optional PageContext whose image list and image
+        placements are reused.
+        """
+
+        image_elements = []
+
+        if context is not None:
+            page = context.page
+            image_list = context.images
+        else:
+            page = self.document[page_number]
             image_list = page.get_images(full=True)
 
-            for img_index, img in enumerate(image_list):
-
-                xref = img[0]
-
-                # Extract image bytes
-                base_image = self.document.extract_image(xref)
-                image_bytes = base_image["image"]
-                image_ext = base_image["ext"]
-
-                image_filename = f"page{page_number+1}_img{img_index+1}.{image_ext}"
-                image_path = os.path.join(self.output_folder, image_filename)
-
-                # Save image
-                with open(image_path, "wb") as f:
-                    f.write(image_bytes)
-
-                # Get image bounding box on page
-                bbox = page.get_image_bbox(img)
-
-                x0, y0, x1, y1 = bbox
-
-                width = x1 - x0
-                height = y1 - y0
-                area = width * height
-
-                image_elements.append({
-                    "type": "Image",
-                    "content": image_filename,
-                    "page_number": page_number + 1,
-                    "image_path": image_path,
-                    "bbox": [x0, y0, x1, y1],
-                    "width": width,
-                    "height": height,
-                    "area": area,
-                    "aspect_ratio": width / height if height != 0 else 0,
-                    "y_position": y0,  # useful for sorting layout order
-                    "text_length": 0,
-                    "uppercase_ratio": 0,
-                    "digit_ratio": 0,
-                    "punctuation_ratio": 0,
-                    "ends_with_period": 0,
-                    "title_case_ratio": 0,
-                    "contains_colon": 0,
-                    "contains_numbering": 0,
-                    "word_count": 0
-                })
-
-        return image_elements
\ No newline at end of file
+        if not image_list:
+            return image_elements
+
+        placements = self.image_placements(
+            page, context.image_info if context is not None else None
+        )
+        seen_xrefs = set()
+
+        # Images referenced as another image's /SMask
+        mask_xrefs = {img[1] for img in image_list if img[1]}
+
+        for img in image_list:
+
+            xref = img[0]
+
+            if xref in seen_xrefs:
+                continue
+            seen_xrefs.add(xref)
+
+            self.report["images_seen"] += 1
+
+            reason = self.filter_reason(img, mask_xrefs)
+            if reason:
+                self.report[reason] += 1
+                continue
+
+            # Images get_image_info() does not report fall back to
+            # the (slower) per-image lookup
+            bboxes = placements.get(xref) or [page.get_image_bbox(img)]
+
+            kept_bboxes = [bbox for bbox in bboxes if self.keep_placement(bbox)]
+            self.report["filtered_tiny_placement"] += len(bboxes) - len(kept_bboxes)
+            self.report["placements_kept"] += len(kept_bboxes)
+
+            # Nothing left to place, so nothing to decode
+            if not kept_bboxes:
+                continue
+
+            if self.mode in ("metadata", "deferred"):
+                stored = {"filename": f"xref{xref}", "path": None, "hash": None}
+            else:
+                stored = self.store_image(img)
+
+            for bbox in kept_bboxes:
+                image_elements.append(self.build_element(page_number, xref, stored, bbox))
+
+        return image_elements
+
+    @staticmethod
+    def build_element(page_number, xref, stored, bbox):
+        """
+        Build one Image layout element for a placement bbox.
+        """
+        x0, y0, x1, y1 = bbox
+
+        width = x1 - x0
+        height = y1 - y0
+        area = width * height
+
+        return {
+            "type": "Image",
+            "content": stored["filename"],
+            "page_number": page_number + 1,
+            "image_path": stored["path"],
+            "image_hash": stored["hash"],
+            "xref": xref,
+            "bbox": [x0, y0, x1, y1],
+            "width": width,
+            "height": height,
+            "area": area,
+            "aspect_ratio": width / height if height != 0 else 0,
+            "y_position": y0,  # useful for sorting layout order
+            "text_length": 0,
+            "uppercase_ratio": 0,
+            "digit_ratio": 0,
+            "punctuation_ratio": 0,
+            "ends_with_period": 0,
+            "title_case_ratio": 0,
+            "contains_colon": 0,
+            "contains_numbering": 0,
+            "word_count": 0
+        }
+
+    @classmethod
+    def materialize_pdf(cls, pdf_path, elements, output_folder="data/output/images"):
+        """
+        materialize() after the document is closed, e.g. on the
+        elements of a finished PDFPipeline run: reopens pdf_path for the
+        duration of the call. Xrefs are stable for an unchanged file.
+        """
+        loader = PDFLoader(pdf_path)
+
+        try:
+            extractor = cls(loader.load(), output_folder)
+            extractor.materialize(elements)
+            extractor.close()
+        finally:
+            loader.close()
+
+        return elements
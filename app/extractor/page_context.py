@@ -0,0 +1,62 @@
+class PageContext:
+    """
+    Per-page parse cache shared by the text, image and table extractors.
+
+    Each expensive page parse (text page, vector drawings, image list and
+    image placements) runs at most once, on first use. Call release()
+    when the page is finished so the parsed data can be freed and memory
+    stays bounded by one page.
+    """
+
+    def __init__(self, document, page_number, text_flags=None):
+        self.document = document
+        self.page_number = page_number
+        self.page = document[page_number]
+        self.text_flags = text_flags
+
+        self._textpage = None
+        self._text_dict = None
+        self._drawings = None
+        self._images = None
+        self._image_info = None
+
+    @property
+    def textpage(self):
+        if self._textpage is None:
+            self._textpage = self.page.get_textpage(flags=self.text_flags)
+        return self._textpage
+
+    @property
+    def text_dict(self):
+        if self._text_dict is None:
+            self._text_dict = self.page.get_text("dict", textpage=self.textpage)
+        return self._text_dict
+
+    @property
+    def drawings(self):
+        if self._drawings is None:
+            self._drawings = self.page.get_drawings()
+        return self._drawings
+
+    @property
+    def images(self):
+        if self._images is None:
+            self._images = self.page.get_images(full=True)
+        return self._images
+
+    @property
+    def image_info(self):
+        if self._image_info is None:
+            self._image_info = self.page.get_image_info(xrefs=True)
+        return self._image_info
+
+    def release(self):
+        """
+        Drop every cached parse result for this page.
+        """
+        self._textpage = None
+        self._text_dict = None
+        self._drawings = None
+        self._images = None
+        self._image_info = None
+        self.page = None
@@ -0,0 +1,259 @@
+import time
+import inspect
+import pandas as pd
+
+
+# Resolved on first use by PyMuPDFTableBackend.accepts_drawings()
+_FIND_TABLES_ACCEPTS_PATHS = None
+
+
+class TableBackend:
+    """
+    Interface for table detection engines used by TableExtractor.
+
+    find_tables() returns one dict per detected table:
+        page_number  1-based page number
+        bbox         [x0, y0, x1, y1] in fitz page coordinates (top-left origin)
+        df           cell text as a pandas DataFrame
+        rows         number of rows
+        columns      number of columns
+        confidence   0..1, how much the engine trusts the detection
+    """
+
+    name = "base"
+
+    def find_tables(self, pages=None):
+        """
+        Detect tables on the given 0-based pages (all pages when None).
+        """
+        raise NotImplementedError
+
+
+class PyMuPDFTableBackend(TableBackend):
+    """
+    Native PyMuPDF table detection (`page.find_tables()`) on the
+    document the pipeline already opened.
+    """
+
+    name = "pymupdf"
+
+    def __init__(self, document):
+        self.document = document
+
+    @staticmethod
+    def confidence(cells):
+        """
+        Share of non-empty cells. Lattice-style grids that PyMuPDF
+        detects but cannot fill with text score low.
+        """
+        values = [cell for row in cells for cell in row]
+        if not values:
+            return 0.0
+
+        filled = sum(1 for cell in values if cell is not None and str(cell).strip())
+        return filled / len(values)
+
+    @staticmethod
+    def accepts_drawings(page):
+        """
+        Whether this PyMuPDF version's find_tables() can reuse vector
+        graphics already extracted with get_drawings() (`paths=`).
+        """
+        global _FIND_TABLES_ACCEPTS_PATHS
+
+        if _FIND_TABLES_ACCEPTS_PATHS is None:
+            _FIND_TABLES_ACCEPTS_PATHS = (
+                "paths" in inspect.signature(page.find_tables).parameters
+            )
+
+        return _FIND_TABLES_ACCEPTS_PATHS
+
+    def find_page_tables(self, page_number, drawings=None):
+        """
+        Detect tables on one 0-based page. drawings: the page's
+        get_drawings() result, reused instead of parsing the page again.
+        """
+        page = self.document[page_number]
+
+        if drawings is not None and self.accepts_drawings(page):
+            finder = page.find_tables(paths=drawings)
+        else:
+            finder = page.find_tables()
+
+        tables = []
+
+        for table in finder.tables:
+            cells = table.extract()
+
+            tables.append({
+                "page_number": page_number + 1,
+                "bbox": list(table.bbox),
+                "df": pd.DataFrame(cells).fillna(""),
+                "rows": table.row_count,
+                "columns": table.col_count,
+                "confidence": self.confidence(cells),
+            })
+
+        return tables
+
+    def find_tables(self, pages=None):
+
+        if pages is None:
+            pages = range(len(self.document))
+
+        tables = []
+
+        for page_number in pages:
+            tables.extend(self.find_page_tables(page_number))
+
+        return tables
+
+
+class CamelotTableBackend(TableBackend):
+    """
+    Camelot lattice detection. Parses the PDF again from disk, so it
+    is much slower than PyMuPDF and is used as a fallback.
+    """
+
+    name = "camelot"
+
+    def __init__(self, pdf_path, document=None):
+        """
+        document: when given, Camelot's bottom-left PDF coordinates are
+        converted to the top-left page coordinates used by fitz.
+        """
+        self.pdf_path = pdf_path
+        self.document = document
+
+    @staticmethod
+    def available():
+        try:
+            import camelot  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    @staticmethod
+    def page_spec(pages):
+        """
+        Convert 0-based page numbers into a Camelot page string,
+        collapsing consecutive pages into ranges ("1-4,7,9-10").
+        """
+        if pages is None:
+            return "all"
+
+        numbers = sorted(set(p + 1 for p in pages))
+        ranges = []
+
+        for number in numbers:
+            if ranges and number == ranges[-1][1] + 1:
+                ranges[-1][1] = number
+            else:
+                ranges.append([number, number])
+
+        return ",".join(
+            str(start) if start == end else f"{start}-{end}"
+            for start, end in ranges
+        )
+
+    def find_tables(self, pages=None):
+
+        import camelot
+
+        tables = []
+
+        camelot_tables = camelot.read_pdf(
+            self.pdf_path,
+            pages=self.page_spec(pages),
+            flavor="lattice"
+        )
+
+        for table in camelot_tables:
+            page_number = int(table.page)
+
+            x0, y0, x1, y1 = table._bbox
+            x0, x1 = min(x0, x1), max(x0, x1)
+            y0, y1 = min(y0, y1), max(y0, y1)
+
+            if self.document is not None:
+                page_height = self.document[page_number - 1].rect.height
+                y0, y1 = page_height - y1, page_height - y0
+
+            tables.append({
+                "page_number": page_number,
+                "bbox": [x0, y0, x1, y1],
+                "df": table.df,
+                "rows": table.shape[0],
+                "columns": table.shape[1],
+                "confidence": table.accuracy / 100,
+            })
+
+        return tables
+
+
+def bbox_iou(a, b):
+    """
+    Intersection over union of two [x0, y0, x1, y1] boxes.
+    """
+    ix0, iy0 = max(a[0], b[0]), max(a[1], b[1])
+    ix1, iy1 = min(a[2], b[2]), min(a[3], b[3])
+
+    intersection = max(0, ix1 - ix0) * max(0, iy1 - iy0)
+    union = (
+        (a[2] - a[0]) * (a[3] - a[1])
+        + (b[2] - b[0]) * (b[3] - b[1])
+        - intersection
+    )
+
+    return intersection / union if union > 0 else 0.0
+
+
+def compare_backends(document, pdf_path, pages=None, iou_threshold=0.5):
+    """
+    Run both backends page by page and report per-page latency and
+    agreement: tables matched by bbox IoU, and whether the matched
+    tables also agree on rows and columns.
+    """
+    fast = PyMuPDFTableBackend(document)
+    slow = CamelotTableBackend(pdf_path, document)
+
+    if pages is None:
+        pages = range(len(document))
+
+    results = []
+
+    for page_number in pages:
+
+        start = time.time()
+        fast_tables = fast.find_tables([page_number])
+        fast_seconds = time.time() - start
+
+        start = time.time()
+        slow_tables = slow.find_tables([page_number])
+        slow_seconds = time.time() - start
+
+        matched = 0
+        same_shape = 0
+
+        for table in fast_tables:
+            best = max(
+                slow_tables,
+                key=lambda other: bbox_iou(table["bbox"], other["bbox"]),
+                default=None
+            )
+            if best is not None and bbox_iou(table["bbox"], best["bbox"]) >= iou_threshold:
+                matched += 1
+                if (table["rows"], table["columns"]) == (best["rows"], best["columns"]):
+                    same_shape += 1
+
+        results.append({
+            "page_number": page_number + 1,
+            "pymupdf_seconds": fast_seconds,
+            "camelot_seconds": slow_seconds,
+            "pymupdf_tables": len(fast_tables),
+            "camelot_tables": len(slow_tables),
+            "matched": matched,
+            "same_shape": same_shape,
+        })
+
+    return results
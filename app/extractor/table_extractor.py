@@ -1,35 +1,97 @@
-import camelot
 import os
 import csv
+import time
+from app.extractor.table_backends import PyMuPDFTableBackend, CamelotTableBackend
 
 class TableExtractor:
     """
-    Extracts tables from PDF using Camelot
-    and returns structured layout elements.
+    Extracts tables from PDF and returns structured layout elements.
+
+    Backends:
+        "pymupdf"  native page.find_tables() on the open document
+        "camelot"  Camelot lattice only (re-parses the PDF)
+        "auto"     PyMuPDF first; Camelot only for candidate pages where
+                   PyMuPDF finds nothing or reports low confidence
     """
 
-    def __init__(self, pdf_path, output_folder="data/output/tables"):
+    BACKENDS = ("auto", "pymupdf", "camelot")
+
+    # Prefilter: a ruling line must span at least this many points and
+    # deviate from horizontal/vertical by at most RULING_TOLERANCE
+    MIN_RULING_LENGTH = 10
+    RULING_TOLERANCE = 1.0
+
+    # Lattice detection needs a grid, i.e. at least two lines each way
+    MIN_RULING_LINES = 2
+
+    # "auto": PyMuPDF tables below this confidence trigger the fallback
+    MIN_CONFIDENCE = 0.5
+
+    def __init__(
+        self,
+        pdf_path,
+        output_folder="data/output/tables",
+        document=None,
+        prefilter=True,
+        backend="auto"
+    ):
+        """
+        document: the already-open fitz document. When given (and
+        prefilter is on) pages without ruling lines are skipped.
+        The "auto" and "pymupdf" backends require it.
+        """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown table backend: {backend}")
+
+        if backend != "camelot" and document is None:
+            raise ValueError(f"Table backend '{backend}' needs an open document.")
+
         self.pdf_path = pdf_path
         self.output_folder = output_folder
+        self.document = document
+        self.prefilter = prefilter and document is not None
         os.makedirs(self.output_folder, exist_ok=True)
 
+        self.backend = backend
+        self.fast_backend = PyMuPDFTableBackend(document) if document is not None else None
+        self.camelot_backend = CamelotTableBackend(pdf_path, document)
+
+        # Camelot is optional in "auto" mode
+        self.use_fallback = backend == "camelot" or (
+            backend == "auto" and CamelotTableBackend.available()
+        )
+
+        # 0-based page -> PyMuPDF tables, waiting for finish()
+        self.pending_fallback = {}
+
+        # Cumulative over all extract() calls
+        self.report = {
+            "pages_checked": 0,
+            "pages_skipped": 0,
+            "pages_fast": 0,
+            "pages_sent": 0,
+            "prefilter_seconds": 0.0,
+            "fast_seconds": 0.0,
+            "camelot_seconds": 0.0,
+        }
+
     def is_empty_table(self, table):
         """
         Check if table is empty or meaningless.
         """
 
         # No rows or columns
-        if table.shape[0] == 0 or table.shape[1] == 0:
+        if table["rows"] == 0 or table["columns"] == 0:
             return True
 
-        df = table.df
+        df = table["df"]
 
         # All cells empty or whitespace
         if df.applymap(lambda x: str(x).strip() == "").all().all():
             return True
 
         # Very tiny tables (optional filter)
-        x0, y0, x1, y1 = table._bbox
+        x0, y0, x1, y1 = table["bbox"]
         width = x1 - x0
         height = y1 - y0
         area = width * height
@@ -39,53 +101,246 @@ class TableExtractor:
 
         return False
 
-    def extract(self):
+    @classmethod
+    def count_ruling_lines(cls, drawings):
+        """
+        Count horizontal and vertical ruling lines among a page's
+        vector drawings (page.get_drawings()). Rectangles count as their
+        four edges, or as a single line when they are thin enough to be
+        drawn as a rule.
+        """
+        horizontal = 0
+        vertical = 0
+
+        for path in drawings:
+            for item in path["items"]:
 
-        table_elements = []
+                if item[0] == "l":
+                    p1, p2 = item[1], item[2]
+                    dx = abs(p1.x - p2.x)
+                    dy = abs(p1.y - p2.y)
 
-        tables = camelot.read_pdf(
-            self.pdf_path,
-            pages="all",
-            flavor="lattice"
+                    if dy <= cls.RULING_TOLERANCE and dx >= cls.MIN_RULING_LENGTH:
+                        horizontal += 1
+                    elif dx <= cls.RULING_TOLERANCE and dy >= cls.MIN_RULING_LENGTH:
+                        vertical += 1
+
+                elif item[0] == "re":
+                    rect = item[1]
+
+                    if rect.height <= cls.RULING_TOLERANCE and rect.width >= cls.MIN_RULING_LENGTH:
+                        horizontal += 1
+                    elif rect.width <= cls.RULING_TOLERANCE and rect.height >= cls.MIN_RULING_LENGTH:
+                        vertical += 1
+                    elif rect.width >= cls.MIN_RULING_LENGTH and rect.height >= cls.MIN_RULING_LENGTH:
+                        horizontal += 2
+                        vertical += 2
+
+        return horizontal, vertical
+
+    def is_candidate(self, page_number, context=None):
+        """
+        Prefilter: can this 0-based page contain a ruled (lattice) table?
+        """
+        start = time.time()
+
+        drawings = (
+            context.drawings if context is not None
+            else self.document[page_number].get_drawings()
+        )
+        horizontal, vertical = self.count_ruling_lines(drawings)
+        candidate = horizontal >= self.MIN_RULING_LINES and vertical >= self.MIN_RULING_LINES
+
+        self.report["pages_checked"] += 1
+        self.report["pages_skipped"] += 0 if candidate else 1
+        self.report["prefilter_seconds"] += time.time() - start
+
+        return candidate
+
+    def candidate_pages(self, pages=None):
+        """
+        Return the 0-based pages that can contain a ruled (lattice) table.
+        """
+        if pages is None:
+            pages = range(len(self.document))
+
+        return [page_number for page_number in pages if self.is_candidate(page_number)]
+
+    @staticmethod
+    def format_report(report):
+        """
+        One-line summary of pages skipped by the prefilter and the
+        Camelot time saved, extrapolated from the measured time per page.
+        """
+        backends = (
+            f"PyMuPDF {report['pages_fast']} pages in {report['fast_seconds']:.2f}s, "
+            f"Camelot {report['pages_sent']} pages in {report['camelot_seconds']:.2f}s"
         )
 
-        for idx, table in enumerate(tables):
+        if not report.get("pages_checked"):
+            return f"Tables: {backends} (prefilter disabled)"
+
+        if report["pages_sent"]:
+            per_page = report["camelot_seconds"] / report["pages_sent"]
+            saved = f"~{per_page * report['pages_skipped']:.2f}s of Camelot time"
+        else:
+            saved = "all Camelot time"
+
+        return (
+            f"Tables: {backends}. Prefilter skipped "
+            f"{report['pages_skipped']}/{report['pages_checked']} pages "
+            f"in {report['prefilter_seconds']:.2f}s, saved {saved}"
+        )
+
+    def needs_fallback(self, tables):
+        """
+        A page goes to Camelot when the fast engine found nothing on it
+        or is unsure about any of its tables.
+        """
+        return not tables or any(
+            table["confidence"] < self.MIN_CONFIDENCE for table in tables
+        )
+
+    def extract_page(self, page_number, context=None):
+        """
+        Extract tables from one 0-based page.
+        context: optional PageContext whose drawings are reused by the
+        prefilter and the PyMuPDF backend.
+
+        Pages that need Camelot are queued rather than processed here;
+        finish() resolves all queued pages with a single Camelot call.
+        """
+        if self.prefilter and not self.is_candidate(page_number, context):
+            return []
+
+        if self.backend == "camelot":
+            self.pending_fallback[page_number] = []
+            return []
+
+        start = time.time()
+        tables = self.fast_backend.find_page_tables(
+            page_number,
+            drawings=context.drawings if context is not None else None
+        )
+        self.report["fast_seconds"] += time.time() - start
+        self.report["pages_fast"] += 1
+
+        if self.use_fallback and self.needs_fallback(tables):
+            # Keep the fast result in case Camelot finds nothing either
+            self.pending_fallback[page_number] = tables
+            return []
+
+        return self.build_elements(tables)
+
+    def finish(self):
+        """
+        Run Camelot once on every queued page and return the resulting
+        elements. A queued page keeps its PyMuPDF tables when Camelot
+        finds nothing there.
+        """
+        if not self.pending_fallback:
+            return []
+
+        pending, self.pending_fallback = self.pending_fallback, {}
+        pages = sorted(pending)
+
+        start = time.time()
+        camelot_tables = self.camelot_backend.find_tables(pages)
+        self.report["camelot_seconds"] += time.time() - start
+        self.report["pages_sent"] += len(pages)
+
+        camelot_by_page = {}
+        for table in camelot_tables:
+            camelot_by_page.setdefault(table["page_number"] - 1, []).append(table)
+
+        tables = []
+        for page_number in pages:
+            tables.extend(camelot_by_page.get(page_number) or pending[page_number])
+
+        return self.build_elements(tables)
+
+    def extract(self, pages=None):
+        """
+        Extract tables from the given 0-based page numbers
+        (all pages when None).
+        """
+        if self.document is None:
+            # Camelot-only without an open document: no prefilter,
+            # Camelot reads the pages straight from the file
+            start = time.time()
+            tables = self.camelot_backend.find_tables(pages)
+            self.report["camelot_seconds"] += time.time() - start
+            return self.build_elements(tables)
+
+        if pages is None:
+            pages = range(len(self.document))
+
+        table_elements = []
+
+        for page_number in pages:
+            table_elements.extend(self.extract_page(page_number))
+
+        table_elements.extend(self.finish())
+
+        return table_elements
+
+    def build_elements(self, tables):
+        """
+        Save non-empty tables as CSV and build their layout elements.
+        All tables of a page must be passed in the same call.
+        """
+
+        table_elements = []
+
+        # Tables are named per page so that any page subset
+        # produces the same filenames as a full-document run
+        tables_per_page = {}
+
+        for table in tables:
 
             # Skip empty tables
             if self.is_empty_table(table):
                 continue
 
+            page_number = table["page_number"]
+            tables_per_page[page_number] = tables_per_page.get(page_number, 0) + 1
+
             # Save valid table
-            table_filename = f"table_{idx+1}.csv"
+            table_filename = f"page{page_number}_table{tables_per_page[page_number]}.csv"
             table_path = os.path.join(self.output_folder, table_filename)
-            table.df.to_csv(
+            table["df"].to_csv(
                     table_path,
                     index=False,
                     encoding="utf-8",
                     quoting=csv.QUOTE_ALL,
                     escapechar="\\"
             )
-            x0, y0, x1, y1 = table._bbox
+            x0, y0, x1, y1 = table["bbox"]
 
             width = x1 - x0
             height = y1 - y0
             area = width * height
 
-            page_number = table.page
+            # y_position keeps the Camelot meaning the model was trained
+            # on: the bottom edge, measured up from the bottom of the page
+            if self.document is not None:
+                y_position = self.document[page_number - 1].rect.height - y1
+            else:
+                y_position = y0
 
             table_elements.append({
                 "type": "Table",
                 "content": table_filename,
-                "page_number": int(page_number),
+                "page_number": page_number,
                 "table_path": table_path,
                 "bbox": [x0, y0, x1, y1],
                 "width": width,
                 "height": height,
                 "area": area,
                 "aspect_ratio": width / height if height != 0 else 0,
-                "rows": table.shape[0],
-                "columns": table.shape[1],
-                "y_position": float(y0),
+                "rows": table["rows"],
+                "columns": table["columns"],
+                "y_position": float(y_position),
                 "text_length": 0,
                 "uppercase_ratio": 0,
                 "digit_ratio": 0,
@@ -97,4 +352,47 @@ class TableExtractor:
                 "word_count": 0
             })
 
-        return table_elements
\ No newline at end of file
+        return table_elements
+
+    def finish_pages(self, held):
+        """
+        Resolve the queued fallback pages with one finish() call and
+        yield the held (page_number, elements) pairs in order, each with
+        its Camelot tables added.
+        """
+        tables_by_page = {}
+        for element in self.finish():
+            tables_by_page.setdefault(element["page_number"] - 1, []).append(element)
+
+        for page_number, elements in held:
+            yield page_number, elements + tables_by_page.get(page_number, [])
+
+    def iter_pages(self, pages=None, batch_pages=16):
+        """
+        Yield (page_number, table elements) one page at a time, in page
+        order. Once a page needs the Camelot fallback, it and the pages
+        after it are held back until batch_pages pages are held (or the
+        pages run out), then resolved with a single Camelot call, since
+        every call re-parses the whole PDF. At most batch_pages pages'
+        tables are held in memory.
+        """
+        if pages is None:
+            if self.document is None:
+                raise ValueError("iter_pages() needs pages or an open document.")
+            pages = range(len(self.document))
+
+        held = []
+
+        for page_number in pages:
+            elements = self.extract_page(page_number)
+
+            if not self.pending_fallback:
+                yield page_number, elements
+                continue
+
+            held.append((page_number, elements))
+            if len(held) >= batch_pages:
+                yield from self.finish_pages(held)
+                held = []
+
+        yield from self.finish_pages(held)
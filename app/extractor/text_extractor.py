@@ -1,7 +1,9 @@
 import re
-from typing import List, Dict
+import fitz  # PyMuPDF
+from typing import List, Dict, Iterator, Tuple
 from statistics import mean
 from app.features.feature_utils import is_bold
+from app.features.batch_features import compute_text_features_batch
 
 
 class TextExtractor:
@@ -10,6 +12,10 @@ class TextExtractor:
     Each line becomes one 'Text' layout element.
     """
 
+    # The "dict" defaults minus TEXT_PRESERVE_IMAGES: image blocks (with
+    # their decoded binary payloads) are never built
+    TEXT_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
     def __init__(self, document):
         self.document = document
 
@@ -58,72 +64,123 @@ class TextExtractor:
             "word_count": word_count
         }
     
-    def extract(self) -> List[Dict]:
+    def extract(self, pages=None) -> List[Dict]:
+        """
+        Extract line elements for the given 0-based page numbers
+        (all pages when None).
+        """
 
         text_elements = []
 
-        for page_number, page in enumerate(self.document):
+        for _, page_elements in self.iter_pages(pages):
+            text_elements.extend(page_elements)
 
-            page_dict = page.get_text("dict")
+        return text_elements
 
-            # Collect all font sizes to compute page average
-            page_font_sizes = []
+    def iter_pages(self, pages=None) -> Iterator[Tuple[int, List[Dict]]]:
+        """
+        Yield (page_number, line elements) one page at a time.
+        """
+        if pages is None:
+            pages = range(len(self.document))
 
-            for block in page_dict["blocks"]:
-                if "lines" not in block:
-                    continue
-                for line in block["lines"]:
-                    for span in line["spans"]:
-                        page_font_sizes.append(span["size"])
+        for page_number in pages:
+            yield page_number, self.extract_page(page_number)
+
+    def line_font_sizes(self, page_number) -> List[float]:
+        """
+        Return the max span font size of every non-empty line on a page.
+        These are the `font_size` values extract_page() would emit.
+        """
+        page_dict = self.document[page_number].get_text("dict", flags=self.TEXT_FLAGS)
+
+        sizes = []
+
+        for block in page_dict["blocks"]:
+            if "lines" not in block:
+                continue
+            for line in block["lines"]:
+                spans = line["spans"]
+                if any(span["text"].strip() for span in spans):
+                    sizes.append(max(span["size"] for span in spans))
+
+        return sizes
+
+    def extract_page(self, page_number, context=None) -> List[Dict]:
+        """
+        Extract line elements for a single 0-based page number.
+        context: optional PageContext whose text page is reused.
+        """
 
-            if not page_font_sizes:
+        text_elements = []
+
+        if context is not None:
+            page_dict = context.text_dict
+        else:
+            page = self.document[page_number]
+            page_dict = page.get_text("dict", flags=self.TEXT_FLAGS)
+
+        # Single traversal: collect every span size for the page average
+        # while building the line elements; font_size_relative is filled
+        # in once the average is known
+        page_font_sizes = []
+
+        for block in page_dict["blocks"]:
+
+            if "lines" not in block:
                 continue
 
-            avg_font_size = mean(page_font_sizes)
+            block_bbox = block["bbox"]
+
+            for line in block["lines"]:
+
+                spans = line["spans"]
+
+                page_font_sizes.extend(span["size"] for span in spans)
 
-            for block in page_dict["blocks"]:
+                line_text = " ".join(
+                    span["text"].strip() for span in spans if span["text"].strip()
+                ).strip()
 
-                if "lines" not in block:
+                if not line_text:
                     continue
 
-                block_bbox = block["bbox"]
+                max_font_size = max(span["size"] for span in spans)
+                bold_flag = max(is_bold(span["font"]) for span in spans)
 
-                for line in block["lines"]:
+                # Use first span bbox for y-position
+                x0, y0, x1, y1 = spans[0]["bbox"]
 
-                    spans = line["spans"]
+                text_elements.append({
+                    "type": "Text",
+                    "page_number": page_number + 1,
+                    "content": line_text,
 
-                    line_text = " ".join(
-                        span["text"].strip() for span in spans if span["text"].strip()
-                    ).strip()
+                    # Typography
+                    "font_size": max_font_size,
+                    "font_size_relative": None,
+                    "is_bold": bold_flag,
 
-                    if not line_text:
-                        continue
+                    # Layout
+                    "y_position": y0,
+                    "block_width": block_bbox[2] - block_bbox[0],
+                    "bbox": [x0, y0, x1, y1],
+                })
 
-                    max_font_size = max(span["size"] for span in spans)
-                    bold_flag = max(is_bold(span["font"]) for span in spans)
+        # Text features for all lines of the page in one vectorized pass
+        text_features = compute_text_features_batch(
+            [element["content"] for element in text_elements]
+        )
 
-                    # Use first span bbox for y-position
-                    x0, y0, x1, y1 = spans[0]["bbox"]
-                    
-                    text_features = TextExtractor.compute_text_features(line_text)
+        for element, features in zip(text_elements, text_features):
+            element.update(features)
 
-                    text_elements.append({
-                        "type": "Text",
-                        "page_number": page_number + 1,
-                        "content": line_text,
+        if not page_font_sizes:
+            return text_elements
 
-                        # Typography
-                        "font_size": max_font_size,
-                        "font_size_relative": max_font_size / avg_font_size,
-                        "is_bold": bold_flag,
+        avg_font_size = mean(page_font_sizes)
 
-                        # Layout
-                        "y_position": y0,
-                        "block_width": block_bbox[2] - block_bbox[0],
-                        "bbox": [x0, y0, x1, y1],
-                        
-                        # New Features
-                        **text_features
-                    })
+        for element in text_elements:
+            element["font_size_relative"] = element["font_size"] / avg_font_size
 
-        return text_elements
\ No newline at end of file
+        return text_elements
@@ -0,0 +1,290 @@
+import re
+from typing import List, Dict
+
+import numpy as np
+
+
+# Per-codepoint character classes, resolved with the same str methods
+# the per-line functions use, so results match them exactly
+UPPER = 1 << 0        # str.isupper()
+DIGIT = 1 << 1        # str.isdigit()
+ALPHA = 1 << 2        # str.isalpha()
+SPACE = 1 << 3        # str.isspace(), what str.strip()/split() remove
+DECIMAL = 1 << 4      # str.isdecimal(), what \d matches
+TITLE_UPPER = 1 << 5  # uppercase or titlecase, as seen by str.istitle()
+LOWER = 1 << 6        # str.islower()
+PUNCTUATION = 1 << 7  # one of .,;:!?
+COLON = 1 << 8
+PERIOD = 1 << 9
+ASCII_UPPER = 1 << 10  # [A-Z]
+
+EXTRACTOR_NUMBERING = re.compile(r"^\d+(\.|\))")
+HEADING_NUMBERING = re.compile(r"^(\d+(\.\d+)*|[A-Z]|[IVX]+)[\.\)]")
+
+EMPTY_TEXT_FEATURES = {
+    "text_length": 0,
+    "uppercase_ratio": 0,
+    "digit_ratio": 0,
+    "punctuation_ratio": 0,
+    "ends_with_period": 0,
+    "title_case_ratio": 0,
+    "contains_colon": 0,
+    "contains_numbering": 0,
+    "word_count": 0
+}
+
+
+def codepoint_class(codepoint: int) -> int:
+    c = chr(codepoint)
+
+    flags = 0
+    if c.isupper():
+        flags |= UPPER
+    if c.isdigit():
+        flags |= DIGIT
+    if c.isalpha():
+        flags |= ALPHA
+    if c.isspace():
+        flags |= SPACE
+    if c.isdecimal():
+        flags |= DECIMAL
+    # Single character istitle() is "titlecase or uppercase"
+    if c.istitle():
+        flags |= TITLE_UPPER
+    if c.islower():
+        flags |= LOWER
+    if c in ".,;:!?":
+        flags |= PUNCTUATION
+    if c == ":":
+        flags |= COLON
+    if c == ".":
+        flags |= PERIOD
+    if "A" <= c <= "Z":
+        flags |= ASCII_UPPER
+
+    return flags
+
+
+# Lookup table indexed by codepoint, filled in lazily as new codepoints
+# are seen; -1 marks codepoints not classified yet
+_class_table = np.full(0, -1, dtype=np.int32)
+
+
+def class_table(codes):
+    """
+    Return the class lookup table, classifying any codepoint in codes it
+    does not cover yet. Presence is found with a scatter, not a sort, so
+    the cost is linear in the buffer plus one call per new codepoint.
+    """
+    global _class_table
+
+    if len(codes) == 0:
+        return _class_table
+
+    top = int(codes.max()) + 1
+
+    if top > len(_class_table):
+        grown = np.full(max(top, 0x100), -1, dtype=np.int32)
+        grown[:len(_class_table)] = _class_table
+        _class_table = grown
+
+    seen = np.zeros(top, dtype=bool)
+    seen[codes] = True
+
+    for codepoint in np.flatnonzero(seen & (_class_table[:top] < 0)):
+        _class_table[codepoint] = codepoint_class(int(codepoint))
+
+    return _class_table
+
+
+class TextBatch:
+    """
+    All lines of a page or document as one codepoint buffer.
+
+    Lines are stripped and joined with "\\n" into a single UTF-32 NumPy
+    array. Character classes come from a per-codepoint lookup table,
+    and per-line counts come from differences of one cumulative sum, so
+    no Python code runs per character.
+    """
+
+    def __init__(self, texts: List[str]):
+        self.texts = [text.strip() for text in texts]
+        self.size = len(self.texts)
+
+        self.lengths = np.fromiter(
+            (len(text) for text in self.texts), dtype=np.int64, count=self.size
+        )
+
+        # Line i covers buffer[starts[i]:ends[i]]; the "\n" separators
+        # are whitespace, so words never run across lines
+        self.starts = np.zeros(self.size, dtype=np.int64)
+        if self.size:
+            self.starts[1:] = np.cumsum(self.lengths + 1)[:-1]
+        self.ends = self.starts + self.lengths
+
+        buffer = "\n".join(self.texts).encode("utf-32-le", "surrogatepass")
+        self.codes = np.frombuffer(buffer, dtype="<u4")
+
+        self.classes = class_table(self.codes)[self.codes]
+
+    def has(self, flag):
+        return (self.classes & flag) != 0
+
+    def count(self, mask):
+        """
+        Number of characters per line for which mask is set.
+        """
+        totals = np.zeros(len(mask) + 1, dtype=np.int64)
+        np.cumsum(mask, out=totals[1:])
+        return totals[self.ends] - totals[self.starts]
+
+    def last_char_is(self, flag):
+        nonempty = self.lengths > 0
+        result = np.zeros(self.size, dtype=bool)
+        result[nonempty] = self.has(flag)[self.ends[nonempty] - 1]
+        return result
+
+    def first_char_is(self, flag):
+        nonempty = self.lengths > 0
+        result = np.zeros(self.size, dtype=bool)
+        result[nonempty] = (self.classes[self.starts[nonempty]] & flag) != 0
+        return result
+
+    def word_counts(self):
+        """
+        Return (words, title case words) per line, matching
+        len(text.split()) and sum(w.istitle() for w in text.split()).
+        """
+        space = self.has(SPACE)
+        title_upper = self.has(TITLE_UPPER)
+        lower = self.has(LOWER)
+        cased = title_upper | lower
+
+        previous_cased = np.zeros(len(cased), dtype=bool)
+        previous_cased[1:] = cased[:-1]
+
+        # istitle() fails on an upper/titlecase character after a cased
+        # one, or a lowercase character after an uncased one
+        breaks_title = (title_upper & previous_cased) | (lower & ~previous_cased)
+
+        previous_space = np.ones(len(space), dtype=bool)
+        previous_space[1:] = space[:-1]
+        word_start = ~space & previous_space
+
+        in_word = ~space
+        word_index = (np.cumsum(word_start) - 1)[in_word]
+        word_total = int(word_start.sum())
+
+        word_breaks = np.bincount(
+            word_index, weights=breaks_title[in_word], minlength=word_total
+        )
+        word_cased = np.bincount(
+            word_index, weights=cased[in_word], minlength=word_total
+        )
+        is_title = (word_breaks == 0) & (word_cased > 0)
+
+        line_of_char = np.repeat(np.arange(self.size), self.lengths + 1)
+        word_line = line_of_char[:len(self.codes)][word_start]
+
+        words = np.bincount(word_line, minlength=self.size)
+        titles = np.bincount(word_line, weights=is_title, minlength=self.size)
+
+        return words.astype(np.int64), titles.astype(np.int64)
+
+    def regex_flags(self, pattern, candidates):
+        """
+        Match a precompiled anchored pattern, only on lines whose first
+        character can start a match.
+        """
+        flags = np.zeros(self.size, dtype=np.int64)
+
+        for index in np.flatnonzero(candidates):
+            flags[index] = int(bool(pattern.match(self.texts[index])))
+
+        return flags
+
+
+def ratio(counts, totals):
+    """
+    counts / totals as Python floats. int64 -> float64 division is the
+    same correctly rounded division Python does for ints below 2**53.
+    """
+    return (counts / np.maximum(totals, 1)).tolist()
+
+
+def compute_text_features_batch(texts: List[str]) -> List[Dict]:
+    """
+    TextExtractor.compute_text_features() for many lines at once.
+    Returns one dict per input line, identical to the per-line function.
+    """
+    if not texts:
+        return []
+
+    batch = TextBatch(texts)
+    lengths = batch.lengths
+
+    uppercase = ratio(batch.count(batch.has(UPPER)), lengths)
+    digit = ratio(batch.count(batch.has(DIGIT)), lengths)
+    punctuation = ratio(batch.count(batch.has(PUNCTUATION)), lengths)
+    ends_with_period = batch.last_char_is(PERIOD).astype(np.int64).tolist()
+    contains_colon = (batch.count(batch.has(COLON)) > 0).astype(np.int64).tolist()
+
+    words, titles = batch.word_counts()
+    title_case = ratio(titles, words)
+
+    numbering = batch.regex_flags(
+        EXTRACTOR_NUMBERING, batch.first_char_is(DECIMAL)
+    ).tolist()
+
+    word_counts = words.tolist()
+    text_lengths = lengths.tolist()
+
+    features = []
+
+    for i in range(batch.size):
+
+        if text_lengths[i] == 0:
+            features.append(dict(EMPTY_TEXT_FEATURES))
+            continue
+
+        features.append({
+            "text_length": text_lengths[i],
+            "uppercase_ratio": uppercase[i],
+            "digit_ratio": digit[i],
+            "punctuation_ratio": punctuation[i],
+            "ends_with_period": ends_with_period[i],
+            "title_case_ratio": title_case[i] if word_counts[i] else 0,
+            "contains_colon": contains_colon[i],
+            "contains_numbering": numbering[i],
+            "word_count": word_counts[i]
+        })
+
+    return features
+
+
+def layout_text_features_batch(texts: List[str]) -> Dict[str, list]:
+    """
+    feature_utils.uppercase_ratio(), text_length() and
+    contains_numbering() for many lines at once, as column lists.
+    """
+    if not texts:
+        return {"uppercase_ratio": [], "text_length": [], "contains_numbering": []}
+
+    batch = TextBatch(texts)
+
+    letters = batch.has(ALPHA)
+    letter_counts = batch.count(letters)
+    upper_letters = batch.count(letters & batch.has(UPPER))
+
+    # uppercase_ratio() returns 0.0 when a line has no letters
+    uppercase = ratio(upper_letters, letter_counts)
+
+    numbering = batch.regex_flags(
+        HEADING_NUMBERING, batch.first_char_is(DECIMAL | ASCII_UPPER)
+    ).tolist()
+
+    return {
+        "uppercase_ratio": uppercase,
+        "text_length": batch.lengths.tolist(),
+        "contains_numbering": numbering,
+    }
@@ -0,0 +1,276 @@
+from typing import List, Dict
+
+import numpy as np
+
+
+ELEMENT_TYPES = ("Text", "Image", "Table")
+TYPE_CODES = {name: code for code, name in enumerate(ELEMENT_TYPES)}
+
+# Feature columns in FeatureExtractor row order. contains_colon is a
+# float because FeatureExtractor fills it from title_case_ratio.
+FLOAT_COLUMNS = (
+    "font_size",
+    "font_size_relative",
+    "uppercase_ratio",
+    "digit_ratio",
+    "punctuation_ratio",
+    "title_case_ratio",
+    "contains_colon",
+    "y_position",
+    "block_width",
+    "image_area",
+    "image_aspect_ratio",
+)
+
+INT_COLUMNS = (
+    "page_number",
+    "is_bold",
+    "text_length",
+    "contains_numbering",
+    "ends_with_period",
+    "word_count",
+    "table_rows",
+    "table_columns",
+)
+
+# Key order of FeatureExtractor rows, per element type
+ROW_KEYS = {
+    "Text": (
+        "type", "page_number", "content", "font_size", "font_size_relative",
+        "is_bold", "uppercase_ratio", "text_length", "contains_numbering",
+        "digit_ratio", "punctuation_ratio", "ends_with_period",
+        "title_case_ratio", "contains_colon", "word_count", "y_position",
+        "block_width", "image_area", "table_rows", "table_columns", "label",
+    ),
+    "Image": (
+        "type", "page_number", "content", "font_size", "font_size_relative",
+        "is_bold", "uppercase_ratio", "text_length", "contains_numbering",
+        "digit_ratio", "punctuation_ratio", "ends_with_period",
+        "title_case_ratio", "contains_colon", "word_count", "y_position",
+        "block_width", "image_area", "image_aspect_ratio", "table_rows",
+        "table_columns", "label",
+    ),
+    "Table": (
+        "type", "page_number", "content", "font_size", "font_size_relative",
+        "is_bold", "uppercase_ratio", "text_length", "contains_numbering",
+        "digit_ratio", "punctuation_ratio", "ends_with_period",
+        "title_case_ratio", "contains_colon", "word_count", "y_position",
+        "block_width", "image_area", "table_rows", "table_columns", "label",
+    ),
+}
+
+
+class ElementStore:
+    """
+    Columnar store of feature rows.
+
+    Every feature is a fixed float32 or int32 NumPy column, the element
+    type is a uint8 code into ELEMENT_TYPES and text content lives in a
+    separate string pool referenced by index, so repeated strings
+    (running headers, footers) are kept once. Columns grow by doubling;
+    a feature that is not given when appending stays 0, so Image and
+    Table rows carry no placeholder values.
+    """
+
+    def __init__(self, capacity=1024):
+        self.size = 0
+        self.capacity = max(capacity, 1)
+
+        self.types = np.zeros(self.capacity, dtype=np.uint8)
+        self.content_ids = np.full(self.capacity, -1, dtype=np.int32)
+        self.columns = {
+            name: np.zeros(self.capacity, dtype=np.float32) for name in FLOAT_COLUMNS
+        }
+        self.columns.update({
+            name: np.zeros(self.capacity, dtype=np.int32) for name in INT_COLUMNS
+        })
+
+        self.strings = []
+        self.string_ids = {}
+        self.labels = None
+
+    def __len__(self):
+        return self.size
+
+    def grow(self, needed):
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+
+        def resized(array, fill=0):
+            grown = np.full(capacity, fill, dtype=array.dtype)
+            grown[:self.size] = array[:self.size]
+            return grown
+
+        self.types = resized(self.types)
+        self.content_ids = resized(self.content_ids, -1)
+        self.columns = {name: resized(array) for name, array in self.columns.items()}
+        self.capacity = capacity
+
+    def intern(self, content):
+        """
+        Index of content in the string pool (-1 for None).
+        """
+        if content is None:
+            return -1
+
+        string_id = self.string_ids.get(content)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.strings.append(content)
+            self.string_ids[content] = string_id
+
+        return string_id
+
+    def append(self, element_type, content=None, **values):
+        """
+        Append one row. values: feature columns; unknown names raise KeyError.
+        """
+        if self.size == self.capacity:
+            self.grow(self.size + 1)
+
+        if self.labels is not None:
+            self.labels.append(None)
+
+        index = self.size
+        self.types[index] = TYPE_CODES[element_type]
+        self.content_ids[index] = self.intern(content)
+
+        for name, value in values.items():
+            self.columns[name][index] = value or 0
+
+        self.size += 1
+        return index
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict]):
+        """
+        Build a store from feature row dicts (features.json / .jsonl).
+        Keys that are not feature columns are ignored.
+        """
+        return cls(capacity=len(rows)).extend_rows(rows)
+
+    def extend_rows(self, rows: List[Dict]):
+        """
+        Append feature row dicts and return the store.
+        """
+        return self.extend(
+            [TYPE_CODES[row.get("type")] for row in rows],
+            [row.get("content") for row in rows],
+            {
+                name: [row.get(name) or 0 for row in rows]
+                for name in self.columns
+            },
+            [row.get("label") for row in rows]
+        )
+
+    def extend(self, type_codes, contents, columns, labels=None):
+        """
+        Append many rows at once. type_codes: TYPE_CODES values,
+        contents: strings (or None), columns: name -> array of values;
+        columns not given stay 0. labels: optional label per row.
+        """
+        count = len(type_codes)
+        start, end = self.size, self.size + count
+
+        if end > self.capacity:
+            self.grow(end)
+
+        self.types[start:end] = type_codes
+        self.content_ids[start:end] = [self.intern(content) for content in contents]
+
+        for name, values in columns.items():
+            self.columns[name][start:end] = values
+
+        if labels is not None and any(label is not None for label in labels):
+            if self.labels is None:
+                self.labels = [None] * start
+            self.labels.extend(labels)
+        elif self.labels is not None:
+            self.labels.extend([None] * count)
+
+        self.size = end
+        return self
+
+    def slice(self, start, stop):
+        """
+        New store with a copy of rows [start, stop).
+        """
+        stop = min(stop, self.size)
+        ids = self.content_ids[start:stop].tolist()
+
+        return ElementStore(capacity=stop - start).extend(
+            self.types[start:stop],
+            [self.strings[i] if i >= 0 else None for i in ids],
+            {name: array[start:stop] for name, array in self.columns.items()},
+            self.labels[start:stop] if self.labels is not None else None
+        )
+
+    def column(self, name):
+        """
+        View of one column, trimmed to the stored rows.
+        """
+        return self.columns[name][:self.size]
+
+    def type_names(self):
+        return [ELEMENT_TYPES[code] for code in self.types[:self.size]]
+
+    def content(self, index):
+        string_id = self.content_ids[index]
+        return self.strings[string_id] if string_id >= 0 else None
+
+    def contents(self):
+        return [self.strings[i] if i >= 0 else None for i in self.content_ids[:self.size].tolist()]
+
+    def matrix(self, columns, dtype=np.float32):
+        """
+        C-contiguous (rows, len(columns)) matrix in the given column
+        order, e.g. scaler.feature_names_in_. Columns the store does not
+        have are filled with 0, as predict.py did for missing keys.
+        """
+        result = np.zeros((self.size, len(columns)), dtype=dtype)
+
+        for j, name in enumerate(columns):
+            if name in self.columns:
+                result[:, j] = self.columns[name][:self.size]
+
+        return result
+
+    def to_rows(self) -> List[Dict]:
+        """
+        Feature row dicts in FeatureExtractor's layout, for JSON output.
+        Values come back at the stored float32 / int32 precision.
+        """
+        values = {name: self.column(name).tolist() for name in self.columns}
+        types = self.type_names()
+        contents = self.contents()
+        labels = self.labels if self.labels is not None else [None] * self.size
+
+        rows = []
+
+        for i in range(self.size):
+            row = {}
+            for key in ROW_KEYS[types[i]]:
+                if key == "type":
+                    row[key] = types[i]
+                elif key == "content":
+                    row[key] = contents[i]
+                elif key == "label":
+                    row[key] = labels[i]
+                else:
+                    row[key] = values[key][i]
+            rows.append(row)
+
+        return rows
+
+    def nbytes(self):
+        """
+        Memory held by the stored rows: columns plus the string pool.
+        """
+        per_row = (
+            self.types.itemsize
+            + self.content_ids.itemsize
+            + sum(array.itemsize for array in self.columns.values())
+        )
+        strings = sum(len(s.encode("utf-8")) for s in self.strings)
+        return per_row * self.size + strings
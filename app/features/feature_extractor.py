@@ -1,11 +1,40 @@
 from typing import List, Dict
 
-from app.features.feature_utils import (
-    is_bold,
-    uppercase_ratio,
-    contains_numbering,
-    text_length,
-)
+import numpy as np
+
+from app.features.feature_utils import is_bold
+from app.features.batch_features import layout_text_features_batch
+from app.features.element_store import ElementStore, TYPE_CODES
+
+
+# Element key each store column is read from, per element type;
+# contains_colon mirrors extract(), which fills it from title_case_ratio
+FEATURE_SOURCES = {
+    "Text": {
+        "font_size": "font_size",
+        "is_bold": "is_bold",
+        "digit_ratio": "digit_ratio",
+        "punctuation_ratio": "punctuation_ratio",
+        "ends_with_period": "ends_with_period",
+        "title_case_ratio": "title_case_ratio",
+        "contains_colon": "title_case_ratio",
+        "word_count": "word_count",
+        "y_position": "y_position",
+        "block_width": "block_width",
+    },
+    "Image": {
+        "y_position": "y_position",
+        "block_width": "width",
+        "image_area": "area",
+        "image_aspect_ratio": "aspect_ratio",
+    },
+    "Table": {
+        "y_position": "y_position",
+        "block_width": "width",
+        "table_rows": "rows",
+        "table_columns": "columns",
+    },
+}
 
 
 class FeatureExtractor:
@@ -14,21 +43,50 @@ class FeatureExtractor:
     Text, Image, Table
     """
 
-    def __init__(self, layout_elements: List[Dict]):
+    def __init__(self, layout_elements: List[Dict], avg_font_size: float = None):
+        """
+        avg_font_size: document-wide average Text font size. Pass it when
+        layout_elements is only part of a document (e.g. a single page);
+        otherwise it is computed from layout_elements.
+        """
         self.layout_elements = layout_elements
+        self.avg_font_size = avg_font_size
 
-    def extract(self) -> List[Dict]:
+    @staticmethod
+    def average_font_size(font_sizes: List[float]) -> float:
+        return sum(font_sizes) / len(font_sizes) if font_sizes else 1
 
-        all_features = []
+    def document_font_size(self) -> float:
+        """
+        avg_font_size if given, else the average Text font size of
+        layout_elements.
+        """
+        if self.avg_font_size is not None:
+            return self.avg_font_size
 
-        # --- Compute average font size for entire document (Text only) ---
         font_sizes = [
             el.get("font_size")
             for el in self.layout_elements
             if el.get("type") == "Text" and el.get("font_size") is not None
         ]
 
-        avg_font_size = sum(font_sizes) / len(font_sizes) if font_sizes else 1
+        return self.average_font_size(font_sizes)
+
+    def extract(self) -> List[Dict]:
+
+        all_features = []
+
+        # --- Compute average font size for entire document (Text only) ---
+        avg_font_size = self.document_font_size()
+
+        # uppercase_ratio / text_length / contains_numbering for every
+        # Text element in one vectorized pass
+        text_columns = layout_text_features_batch([
+            el.get("content", "")
+            for el in self.layout_elements
+            if el.get("type") == "Text"
+        ])
+        text_index = 0
 
         for element in self.layout_elements:
 
@@ -59,9 +117,9 @@ class FeatureExtractor:
                     "is_bold": is_bold,
 
                     # --- Text ---
-                    "uppercase_ratio": uppercase_ratio(line_text),
-                    "text_length": text_length(line_text),
-                    "contains_numbering": contains_numbering(line_text),
+                    "uppercase_ratio": text_columns["uppercase_ratio"][text_index],
+                    "text_length": text_columns["text_length"][text_index],
+                    "contains_numbering": text_columns["contains_numbering"][text_index],
                     "digit_ratio": digit_ratio,
                     "punctuation_ratio": punctuation_ratio,
                     "ends_with_period": ends_with_period,
@@ -82,6 +140,7 @@ class FeatureExtractor:
                 }
 
                 all_features.append(feature_row)
+                text_index += 1
 
             # --------------------------------------------------
             # IMAGE FEATURES
@@ -168,4 +227,57 @@ class FeatureExtractor:
 
                 all_features.append(feature_row)
 
-        return all_features
\ No newline at end of file
+        return all_features
+
+    def extract_store(self, store: ElementStore = None) -> ElementStore:
+        """
+        Same features as extract(), written column by column into an
+        ElementStore instead of one dict per row. Pass store to collect
+        several pages or documents into one store.
+        """
+        if store is None:
+            store = ElementStore(capacity=len(self.layout_elements))
+
+        elements = [
+            el for el in self.layout_elements if el.get("type") in TYPE_CODES
+        ]
+        count = len(elements)
+
+        types = [el["type"] for el in elements]
+        columns = {name: np.zeros(count, dtype=array.dtype) for name, array in store.columns.items()}
+        columns["page_number"][:] = [el.get("page_number") or 0 for el in elements]
+
+        for element_type, sources in FEATURE_SOURCES.items():
+            positions = [i for i, t in enumerate(types) if t == element_type]
+            if not positions:
+                continue
+
+            typed = [elements[i] for i in positions]
+            for name, key in sources.items():
+                columns[name][positions] = [el.get(key, 0) or 0 for el in typed]
+
+        text_positions = [i for i, t in enumerate(types) if t == "Text"]
+
+        if text_positions:
+            avg_font_size = self.document_font_size()
+
+            font_sizes = np.array(
+                [elements[i].get("font_size", 0) or 0 for i in text_positions],
+                dtype=np.float64
+            )
+            if avg_font_size:
+                columns["font_size_relative"][text_positions] = font_sizes / avg_font_size
+
+            text_columns = layout_text_features_batch(
+                [elements[i].get("content", "") for i in text_positions]
+            )
+            for name, values in text_columns.items():
+                columns[name][text_positions] = values
+
+        store.extend(
+            [TYPE_CODES[t] for t in types],
+            [el.get("content", "") if t == "Text" else el.get("content") for el, t in zip(elements, types)],
+            columns
+        )
+
+        return store
@@ -0,0 +1,466 @@
+import json
+from pathlib import Path
+from typing import List, Dict
+
+import numpy as np
+
+from app.features.element_store import ElementStore, ELEMENT_TYPES, ROW_KEYS
+
+
+# Feature file formats the pipeline can write. json is the original
+# pretty-printed array; the others are typed and columnar.
+OUTPUT_FORMATS = ("json", "parquet", "arrow", "npz")
+
+SUFFIXES = {
+    "json": ".json",
+    "jsonl": ".jsonl",
+    "parquet": ".parquet",
+    "arrow": ".arrow",
+    "npz": ".npz",
+    "csv": ".csv",
+}
+
+BINARY_FORMATS = ("parquet", "arrow", "npz")
+
+# Formats FeatureWriter can append to chunk by chunk
+STREAM_FORMATS = ("jsonl", "parquet", "arrow")
+
+
+def path_format(path):
+    """
+    Format of a feature file, from its suffix.
+    """
+    suffix = Path(path).suffix.lower()
+
+    if suffix == ".feather":
+        return "arrow"
+
+    for name, known in SUFFIXES.items():
+        if suffix == known:
+            return name
+
+    raise ValueError(f"Unknown feature file format: {path}")
+
+
+def frame_columns(has_images):
+    """
+    Column order of a feature table: Text row keys, plus
+    image_aspect_ratio when there are Image rows.
+    """
+    columns = list(ROW_KEYS["Text"])
+
+    # pd.DataFrame(rows) appends keys first seen on later rows at the end
+    if has_images:
+        columns.append("image_aspect_ratio")
+
+    return columns
+
+
+def encode_strings(strings):
+    """
+    Strings as one UTF-8 byte buffer plus offsets, so .npz needs no pickle.
+    """
+    encoded = [s.encode("utf-8", "surrogatepass") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def decode_strings(data, offsets):
+    buffer = data.tobytes()
+    return [
+        buffer[offsets[i]:offsets[i + 1]].decode("utf-8", "surrogatepass")
+        for i in range(len(offsets) - 1)
+    ]
+
+
+def label_codes(labels):
+    """
+    Return (codes, names); code -1 is no label.
+    """
+    names = sorted({label for label in labels if label is not None})
+    index = {name: i for i, name in enumerate(names)}
+    codes = np.array([index.get(label, -1) for label in labels], dtype=np.int32)
+    return codes, names
+
+
+def write_npz(store, path, predicted=None, label_key="predicted_label"):
+    string_data, string_offsets = encode_strings(store.strings)
+
+    arrays = {
+        "type": store.types[:store.size],
+        "type_names": np.array(ELEMENT_TYPES),
+        "content_ids": store.content_ids[:store.size],
+        "string_data": string_data,
+        "string_offsets": string_offsets,
+    }
+    arrays.update({name: store.column(name) for name in store.columns})
+
+    if store.labels is not None:
+        codes, names = label_codes(store.labels)
+        arrays["label_ids"] = codes
+        arrays["label_names"] = np.array(names, dtype=str)
+
+    if predicted is not None:
+        codes, names = label_codes(predicted)
+        arrays[f"{label_key}_ids"] = codes
+        arrays[f"{label_key}_names"] = np.array(names, dtype=str)
+
+    # Uncompressed, so np.load() can read each column straight from the zip
+    np.savez(path, **arrays)
+
+
+def read_npz(path):
+    with np.load(path) as data:
+        size = len(data["type"])
+        store = ElementStore(capacity=size)
+
+        store.strings = decode_strings(data["string_data"], data["string_offsets"])
+        store.string_ids = {s: i for i, s in enumerate(store.strings)}
+
+        labels = None
+        if "label_ids" in data:
+            names = data["label_names"].tolist()
+            labels = [names[code] if code >= 0 else None for code in data["label_ids"].tolist()]
+
+        store.types[:size] = data["type"]
+        store.content_ids[:size] = data["content_ids"]
+        for name in store.columns:
+            store.columns[name][:size] = data[name]
+
+        store.size = size
+        store.labels = labels
+
+    return store
+
+
+def read_npz_labels(path, label_key="predicted_label"):
+    """
+    The label_key column written by write_npz(), or None.
+    """
+    with np.load(path) as data:
+        if f"{label_key}_ids" not in data:
+            return None
+        names = data[f"{label_key}_names"].tolist()
+        return [names[code] if code >= 0 else None for code in data[f"{label_key}_ids"].tolist()]
+
+
+def arrow_table(store, with_labels=False):
+    """
+    ElementStore as an Arrow table. The label column is included when
+    the store has labels, or always with with_labels (null when unknown),
+    so chunks written one after another share one schema.
+    """
+    import pyarrow as pa
+
+    types = pa.DictionaryArray.from_arrays(
+        pa.array(store.types[:store.size].astype(np.int8)), pa.array(ELEMENT_TYPES)
+    )
+
+    columns = {"type": types, "content": pa.array(store.contents(), type=pa.string())}
+    columns.update({name: pa.array(store.column(name)) for name in store.columns})
+
+    if store.labels is not None or with_labels:
+        columns["label"] = pa.array(
+            store.labels if store.labels is not None else [None] * store.size, type=pa.string()
+        )
+
+    return pa.table(columns)
+
+
+def store_from_arrow(table):
+    size = table.num_rows
+    store = ElementStore(capacity=size)
+
+    types = table.column("type").combine_chunks()
+    codes = np.array([ELEMENT_TYPES.index(name) for name in types.dictionary.to_pylist()])
+    store.types[:size] = codes[types.indices.to_numpy(zero_copy_only=False)]
+
+    store.content_ids[:size] = [
+        store.intern(content) for content in table.column("content").to_pylist()
+    ]
+
+    for name in store.columns:
+        if name in table.column_names:
+            store.columns[name][:size] = table.column(name).to_numpy()
+
+    if "label" in table.column_names:
+        store.labels = table.column("label").to_pylist()
+
+    store.size = size
+    return store
+
+
+def write_store(store, path, output_format=None, predicted=None, label_key="predicted_label"):
+    """
+    Write an ElementStore as parquet, arrow (Arrow IPC / Feather v2,
+    uncompressed so it can be memory-mapped) or npz. predicted: one
+    model label per row, written as an extra label_key column as
+    FeatureWriter does.
+    """
+    output_format = output_format or path_format(path)
+
+    if output_format == "npz":
+        write_npz(store, path, predicted, label_key)
+        return
+
+    if output_format not in ("parquet", "arrow"):
+        raise ValueError(f"Not a binary feature format: {output_format}")
+
+    table = arrow_table(store)
+    if predicted is not None:
+        import pyarrow as pa
+        table = table.append_column(label_key, pa.array(predicted, type=pa.string()))
+
+    if output_format == "parquet":
+        import pyarrow.parquet as pq
+        pq.write_table(table, path)
+    else:
+        import pyarrow.feather as feather
+        feather.write_feather(table, path, compression="uncompressed")
+
+
+def write_features(rows: List[Dict], path, output_format="json", label_key="predicted_label"):
+    """
+    Write feature rows in the given format. Classified rows keep their
+    label_key in the binary formats too, as an extra column.
+    """
+    if output_format == "json":
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=4, ensure_ascii=False)
+        return
+
+    predicted = None
+    if any(label_key in row for row in rows):
+        predicted = [row.get(label_key) for row in rows]
+
+    write_store(ElementStore.from_rows(rows), path, output_format, predicted, label_key)
+
+
+def read_store(path):
+    """
+    Read a feature file into an ElementStore. Arrow files are
+    memory-mapped and parquet is read through a memory map; npz columns
+    are read directly from the uncompressed archive.
+    """
+    input_format = path_format(path)
+
+    if input_format == "npz":
+        return read_npz(path)
+
+    if input_format == "arrow":
+        import pyarrow as pa
+        with pa.memory_map(str(path), "r") as source:
+            return store_from_arrow(pa.ipc.open_file(source).read_all())
+
+    if input_format == "parquet":
+        import pyarrow.parquet as pq
+        return store_from_arrow(pq.read_table(path, memory_map=True))
+
+    return ElementStore.from_rows(read_rows(path))
+
+
+def read_rows(path) -> List[Dict]:
+    """
+    Feature rows as dicts from any supported format.
+    """
+    input_format = path_format(path)
+
+    if input_format in BINARY_FORMATS:
+        return read_store(path).to_rows()
+
+    with open(path, "r", encoding="utf-8") as f:
+        if input_format == "jsonl":
+            return [json.loads(line) for line in f if line.strip()]
+        data = json.load(f)
+
+    return [data] if isinstance(data, dict) else data
+
+
+def store_frame(store):
+    """
+    ElementStore as a DataFrame with the columns of the JSON rows.
+    """
+    import pandas as pd
+
+    frame = pd.DataFrame({
+        name: store.column(name) for name in store.columns
+    })
+    frame["type"] = store.type_names()
+    frame["content"] = store.contents()
+    frame["label"] = store.labels if store.labels is not None else None
+
+    has_images = bool(np.any(store.types[:store.size] == ELEMENT_TYPES.index("Image")))
+    return frame[frame_columns(has_images)]
+
+
+def read_frame(path):
+    """
+    Table as a pandas DataFrame from any supported format. Parquet and
+    Arrow files that are not feature tables (e.g. the processed training
+    set) are returned as stored.
+    """
+    import pandas as pd
+
+    input_format = path_format(path)
+
+    if input_format == "csv":
+        return pd.read_csv(path)
+
+    if input_format == "npz":
+        frame = store_frame(read_npz(path))
+        predicted = read_npz_labels(path)
+        if predicted is not None:
+            frame["predicted_label"] = predicted
+        return frame
+
+    if input_format == "parquet":
+        frame = pd.read_parquet(path, memory_map=True)
+    elif input_format == "arrow":
+        import pyarrow as pa
+        with pa.memory_map(str(path), "r") as source:
+            frame = pa.ipc.open_file(source).read_all().to_pandas()
+    else:
+        return pd.DataFrame(read_rows(path))
+
+    if "type" not in frame.columns or "content" not in frame.columns:
+        return frame
+
+    # Feature table written by write_store(): restore the JSON row layout
+    frame["type"] = frame["type"].astype(str)
+    if "label" not in frame.columns:
+        frame["label"] = None
+
+    # Classified output (write_features, FeatureWriter) keeps its labels
+    columns = frame_columns((frame["type"] == "Image").any())
+    if "predicted_label" in frame.columns:
+        columns.append("predicted_label")
+
+    return frame[columns]
+
+
+def iter_chunks(path, chunk_rows=50000):
+    """
+    Yield a feature file in chunks of up to chunk_rows rows: lists of
+    row dicts for JSON/JSONL, ElementStores for binary formats. JSONL is
+    read line by line, Parquet by row group batches and Arrow as slices
+    of the memory map, so only one chunk is decoded at a time. A JSON
+    array and .npz columns have to be loaded whole first.
+    """
+    input_format = path_format(path)
+
+    if input_format == "jsonl":
+        with open(path, "r", encoding="utf-8") as f:
+            rows = []
+            for line in f:
+                if line.strip():
+                    rows.append(json.loads(line))
+                if len(rows) == chunk_rows:
+                    yield rows
+                    rows = []
+            if rows:
+                yield rows
+
+    elif input_format == "json":
+        rows = read_rows(path)
+        for start in range(0, len(rows), chunk_rows):
+            yield rows[start:start + chunk_rows]
+
+    elif input_format == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        source = pq.ParquetFile(path, memory_map=True)
+        for batch in source.iter_batches(batch_size=chunk_rows):
+            yield store_from_arrow(pa.Table.from_batches([batch]))
+
+    elif input_format == "arrow":
+        import pyarrow as pa
+
+        with pa.memory_map(str(path), "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+            for start in range(0, table.num_rows, chunk_rows):
+                yield store_from_arrow(table.slice(start, chunk_rows))
+
+    elif input_format == "npz":
+        store = read_npz(path)
+        for start in range(0, store.size, chunk_rows):
+            yield store.slice(start, start + chunk_rows)
+
+    else:
+        raise ValueError(f"Cannot stream feature file: {path}")
+
+
+class FeatureWriter:
+    """
+    Appends labelled feature chunks to a JSONL, Parquet or Arrow file,
+    so output is written as it is produced instead of held in memory.
+    Chunks are row dict lists or ElementStores; labels are written as
+    an extra column / key (label_key).
+    """
+
+    def __init__(self, path, output_format=None, label_key="predicted_label"):
+        self.path = path
+        self.output_format = output_format or path_format(path)
+        self.label_key = label_key
+        self.rows = 0
+
+        if self.output_format not in STREAM_FORMATS:
+            raise ValueError(
+                f"Cannot stream {self.output_format} output; use one of {', '.join(STREAM_FORMATS)}"
+            )
+
+        self.file = None
+        self.writer = None
+
+        if self.output_format == "jsonl":
+            self.file = open(path, "w", encoding="utf-8")
+
+    def write(self, chunk, labels):
+
+        if self.output_format == "jsonl":
+            rows = chunk.to_rows() if isinstance(chunk, ElementStore) else chunk
+            for row, label in zip(rows, labels):
+                row[self.label_key] = label
+                self.file.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+        else:
+            import pyarrow as pa
+
+            store = chunk if isinstance(chunk, ElementStore) else ElementStore.from_rows(chunk)
+            table = arrow_table(store, with_labels=True).append_column(
+                self.label_key, pa.array(labels, type=pa.string())
+            )
+
+            if self.writer is None:
+                self.writer = self.open_writer(table.schema)
+            self.writer.write_table(table)
+
+        self.rows += len(labels)
+
+    def open_writer(self, schema):
+        import pyarrow as pa
+
+        if self.output_format == "parquet":
+            import pyarrow.parquet as pq
+            return pq.ParquetWriter(self.path, schema)
+
+        # Uncompressed Arrow IPC file (Feather v2), memory-mappable
+        self.file = pa.OSFile(str(self.path), "wb")
+        return pa.ipc.new_file(self.file, schema)
+
+    def close(self):
+        if self.writer is None and self.output_format != "jsonl":
+            # No chunks: still leave a valid, empty file
+            self.write(ElementStore(), [])
+
+        if self.writer is not None:
+            self.writer.close()
+        if self.file is not None:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
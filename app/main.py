@@ -1,19 +1,132 @@
-import sys
+import argparse
 from app.pipeline import PDFPipeline
 
 
 def main():
 
-    if len(sys.argv) < 2:
-        print("Usage: python -m app.main <pdf_path>")
+    parser = argparse.ArgumentParser(
+        prog="python -m app.main",
+        description="Extract layout features from a PDF."
+    )
+    parser.add_argument(
+        "pdf_path",
+        nargs="+",
+        help="Path to the PDF file. With --batch: PDFs, directories, "
+             "glob patterns or text files listing one PDF per line"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes to shard pages across, or with --batch, "
+             "number of documents processed concurrently (default: 1)"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Write feature rows page by page to features.jsonl"
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Process many documents with per-document outputs and a resumable manifest"
+    )
+    parser.add_argument(
+        "--output-dir",
+        default="data/interim/batch",
+        help="Batch mode: root folder for per-document outputs"
+    )
+    parser.add_argument(
+        "--manifest",
+        default=None,
+        help="Batch mode: manifest path (default: <output-dir>/manifest.jsonl)"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Reuse extraction results cached by PDF hash and code version"
+    )
+    parser.add_argument(
+        "--no-table-prefilter",
+        action="store_true",
+        help="Run table detection on every page, not only pages with ruling lines"
+    )
+    parser.add_argument(
+        "--table-backend",
+        choices=["auto", "pymupdf", "camelot"],
+        default="auto",
+        help="Table engine: PyMuPDF with Camelot fallback (auto), "
+             "PyMuPDF only, or Camelot only"
+    )
+    parser.add_argument(
+        "--image-mode",
+        choices=["full", "metadata", "deferred", "async"],
+        default="full",
+        help="full: write images inline; metadata/deferred: geometry only, "
+             "no decoding; async: write images on background threads"
+    )
+    parser.add_argument(
+        "--no-image-filter",
+        action="store_true",
+        help="Keep tiny, decorative and mask images"
+    )
+    parser.add_argument(
+        "--output-format",
+        choices=["json", "parquet", "arrow", "npz"],
+        default="json",
+        help="Feature file format: pretty-printed JSON, or typed columnar "
+             "Parquet, Arrow (memory-mappable) or NumPy .npz"
+    )
+    parser.add_argument(
+        "--model-dir",
+        default=None,
+        help="Classify the feature rows with the model in this folder and "
+             "write sections.json next to the features"
+    )
+    args = parser.parse_args()
+
+    if args.batch:
+        from app.batch import BatchRunner
+
+        runner = BatchRunner(
+            args.pdf_path,
+            output_dir=args.output_dir,
+            workers=args.workers,
+            manifest_path=args.manifest,
+            stream=args.stream,
+            cache_dir=args.cache_dir,
+            output_format=args.output_format,
+            model_dir=args.model_dir,
+            table_prefilter=not args.no_table_prefilter,
+            table_backend=args.table_backend,
+            image_mode=args.image_mode,
+            image_filter=not args.no_image_filter
+        )
+        runner.run()
         return
 
-    # Join everything after script name
-    pdf_path = " ".join(sys.argv[1:])
+    # Join all positional parts so unquoted paths with spaces still work
+    pdf_path = " ".join(args.pdf_path)
+
+    classifier = None
+    if args.model_dir:
+        from app.models.classifier import Classifier
+        classifier = Classifier(args.model_dir)
 
-    pipeline = PDFPipeline(pdf_path)
+    pipeline = PDFPipeline(
+        pdf_path,
+        workers=args.workers,
+        stream=args.stream,
+        cache_dir=args.cache_dir,
+        table_prefilter=not args.no_table_prefilter,
+        table_backend=args.table_backend,
+        image_mode=args.image_mode,
+        image_filter=not args.no_image_filter,
+        output_format=args.output_format,
+        classifier=classifier
+    )
     pipeline.run()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,231 @@
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.features.element_store import TYPE_CODES
+
+
+CASCADE_FILE = "cascade.json"
+
+# Element types whose label follows from the type alone, as in
+# data/auto_label.py and the labelling tool
+TYPE_LABELS = {"Image": "Image", "Table": "Table"}
+
+STAGES = ("type", "first_stage", "full")
+
+# Type code of rows without a known element type; they skip the type
+# and first stages and go straight to the full model
+UNKNOWN_TYPE = np.iinfo(np.uint8).max
+
+# Candidate first stages tried by calibrate()
+FIRST_STAGE_TREES = (10, 25, 50)
+THRESHOLDS = (0.8, 0.9, 0.95, 0.99, 1.0)
+
+
+class Cascade:
+    """
+    Three-stage classification:
+
+        type         Image and Table rows take their fixed label
+        first_stage  the first few trees of the array forest; Text rows
+                     whose top class probability reaches the threshold
+                     exit here
+        full         the remaining rows go to the full model
+
+    Rows are counted per stage, for reporting.
+    """
+
+    def __init__(self, forest, first_stage_trees, threshold):
+        self.first_stage = forest.head(first_stage_trees)
+        self.first_stage_trees = first_stage_trees
+        self.threshold = threshold
+
+        self.fixed_labels = np.full(max(TYPE_CODES.values()) + 1, None, dtype=object)
+        for type_name, label in TYPE_LABELS.items():
+            self.fixed_labels[TYPE_CODES[type_name]] = label
+
+        self.counts = dict.fromkeys(STAGES, 0)
+
+    @classmethod
+    def load(cls, model_dir, forest):
+        """
+        Cascade configured by cascade.json, or None when the model has
+        no calibrated cascade or no exported forest.
+        """
+        path = Path(model_dir) / CASCADE_FILE
+
+        if forest is None or not path.exists():
+            return None
+
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+
+        return cls(forest, config["first_stage_trees"], config["threshold"])
+
+    def early_labels(self, features, type_codes):
+        """
+        Labels from the type and first stages, None for rows that need
+        the full model, and the stage (index into STAGES) of every row.
+        """
+        type_codes = np.asarray(type_codes)
+        known = type_codes < len(self.fixed_labels)
+
+        labels = np.full(len(type_codes), None, dtype=object)
+        labels[known] = self.fixed_labels[type_codes[known]]
+        stages = np.where(known, 0, 2).astype(np.uint8)
+
+        text = np.flatnonzero(known & (labels == None))  # noqa: E711
+
+        if len(text):
+            proba = self.first_stage.predict_proba(features[text])
+            confident = proba.max(axis=1) >= self.threshold
+
+            exits = text[confident]
+            labels[exits] = self.first_stage.classes.take(proba[confident].argmax(axis=1)).tolist()
+            stages[exits] = 1
+            stages[text[~confident]] = 2
+
+        return labels, stages
+
+    def predict(self, features, type_codes, full_predict):
+        """
+        Labels and stages of every row. full_predict(features) labels the
+        rows left for the full model.
+        """
+        labels, stages = self.early_labels(features, type_codes)
+
+        rest = np.flatnonzero(stages == 2)
+        if len(rest):
+            labels[rest] = full_predict(features[rest])
+
+        for stage, count in enumerate(np.bincount(stages, minlength=len(STAGES))):
+            self.counts[STAGES[stage]] += int(count)
+
+        return labels.tolist(), stages
+
+    def stats(self):
+        total = sum(self.counts.values())
+        return {
+            stage: {
+                "rows": count,
+                "fraction": round(count / total, 4) if total else 0,
+            }
+            for stage, count in self.counts.items()
+        }
+
+
+def calibrate(forest, features, type_codes, labels):
+    """
+    Pick the cheapest first stage (trees, threshold) whose cascade is at
+    least as accurate on (features, labels) as the type stage plus the
+    full forest, so the first stage never costs accuracy. Cost is tree
+    evaluations per Text row relative to the full forest. Returns
+    (config, report); config is None when no candidate keeps the
+    accuracy, so no first stage is used.
+    """
+    labels = np.asarray(labels, dtype=object)
+    full_labels = forest.predict(features).astype(object)
+    trees = len(forest.roots)
+
+    type_labels = Cascade(forest, 1, 1.0).fixed_labels[np.asarray(type_codes)]
+    with_types = np.where(type_labels == None, full_labels, type_labels)  # noqa: E711
+
+    full_accuracy = float(np.mean(full_labels == labels))
+    type_accuracy = float(np.mean(with_types == labels))
+
+    best = None
+    report = []
+
+    for first_stage_trees in FIRST_STAGE_TREES:
+        if first_stage_trees >= trees:
+            continue
+
+        for threshold in THRESHOLDS:
+            cascade = Cascade(forest, first_stage_trees, threshold)
+            predicted, stages = cascade.early_labels(features, type_codes)
+            predicted[stages == 2] = full_labels[stages == 2]
+
+            accuracy = float(np.mean(predicted == labels))
+            text = stages > 0
+            exit_fraction = float(np.mean(stages[text] == 1)) if text.any() else 0.0
+            cost = first_stage_trees / trees + (1 - exit_fraction)
+
+            candidate = {
+                "first_stage_trees": first_stage_trees,
+                "threshold": threshold,
+                "accuracy": round(accuracy, 4),
+                "first_stage_exit": round(exit_fraction, 4),
+                "relative_cost": round(cost, 4),
+            }
+            report.append(candidate)
+
+            if accuracy >= type_accuracy and cost < 1 and (best is None or cost < best["relative_cost"]):
+                best = candidate
+
+    config = None
+    if best is not None:
+        config = {"first_stage_trees": best["first_stage_trees"], "threshold": best["threshold"]}
+
+    return config, {
+        "full_accuracy": round(full_accuracy, 4),
+        "type_stage_accuracy": round(type_accuracy, 4),
+        "candidates": report,
+    }
+
+
+def evaluate(cascade, full_predict, features, type_codes, labels, repeat=3):
+    """
+    Accuracy, rows per stage and best-of-repeat latency of the cascade
+    against full_predict on every row.
+    """
+    labels = np.asarray(labels, dtype=object)
+
+    def timed(function):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = function()
+            seconds = time.perf_counter() - start
+            best = seconds if best is None else min(best, seconds)
+        return result, best
+
+    full_labels, full_seconds = timed(lambda: full_predict(features))
+    (cascade_labels, stages), cascade_seconds = timed(
+        lambda: cascade.predict(features, type_codes, full_predict)
+    )
+
+    counts = np.bincount(stages, minlength=len(STAGES))
+
+    return {
+        "rows": len(labels),
+        "stage_fractions": {
+            stage: round(count / max(len(labels), 1), 4) for stage, count in zip(STAGES, counts.tolist())
+        },
+        "full_accuracy": round(float(np.mean(np.asarray(full_labels, dtype=object) == labels)), 4),
+        "cascade_accuracy": round(float(np.mean(np.asarray(cascade_labels, dtype=object) == labels)), 4),
+        "full_ms": round(full_seconds * 1000, 2),
+        "cascade_ms": round(cascade_seconds * 1000, 2),
+    }
+
+
+def type_codes_from_features(features, columns):
+    """
+    Element type codes recovered from feature columns, for tables that
+    have no type column (the processed training set drops it): Table
+    rows have table_rows > 0, Image rows image_area > 0.
+    """
+    columns = list(columns)
+    table = features[:, columns.index("table_rows")] > 0
+    image = features[:, columns.index("image_area")] > 0
+
+    codes = np.full(len(features), TYPE_CODES["Text"], dtype=np.uint8)
+    codes[image] = TYPE_CODES["Image"]
+    codes[table] = TYPE_CODES["Table"]
+    return codes
+
+
+def save_cascade(config, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=4)
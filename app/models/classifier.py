@@ -0,0 +1,134 @@
+import warnings
+from typing import List, Dict
+
+import numpy as np
+
+from app.features.element_store import ElementStore, TYPE_CODES
+from app.models.cascade import UNKNOWN_TYPE, Cascade
+from app.models.feature_schema import load_schema
+from app.models.model_loader import load_forest, load_model
+
+
+class Classifier:
+    """
+    Labels feature rows in memory with the trained model and scaler,
+    which are loaded once and reused for every document. When the forest
+    has been exported to arrays (app.models.forest), batches of up to
+    forest_max_rows use the vectorized evaluator instead; labels are
+    identical. Larger batches amortise sklearn's per-call overhead and
+    its compiled tree walk is faster there. A pruned export (fewer trees
+    or capped depth) is the deployed model itself, so it labels every
+    batch and scikit-learn is never loaded for prediction.
+
+    With a feature schema (feature_schema.json) next to the model, the
+    input matrix is built from it and checked against it, and the
+    pickled model is only loaded once a batch needs scikit-learn.
+
+    With a calibrated cascade (cascade.json), rows whose element types
+    are known go through app.models.cascade.Cascade: Image and Table
+    rows are labelled by type, confident Text rows by a few trees, and
+    only the rest by the full model.
+    """
+
+    def __init__(self, model_dir="models", use_forest=True, forest_max_rows=500, use_cascade=True):
+        self.model_dir = model_dir
+        self.forest = load_forest(model_dir) if use_forest else None
+        self.forest_max_rows = forest_max_rows
+        self.schema = load_schema(model_dir)
+        self.cascade = Cascade.load(model_dir, self.forest) if use_cascade else None
+
+        self._model = None
+        self._scaler = None
+
+        if self.forest is not None and self.schema is not None:
+            self.schema.check_names(self.forest.feature_names, "Exported forest")
+
+        # Model input columns, in training order
+        if self.schema is not None:
+            self.feature_columns = list(self.schema.names)
+        else:
+            self.feature_columns = list(self.scaler.feature_names_in_)
+
+    def load_sklearn(self):
+        self._model, self._scaler = load_model(self.model_dir)
+
+        if self.schema is not None:
+            self.schema.check_names(self._scaler.feature_names_in_, "Scaler")
+
+    @property
+    def model(self):
+        if self._model is None:
+            self.load_sklearn()
+        return self._model
+
+    @property
+    def scaler(self):
+        if self._scaler is None:
+            self.load_sklearn()
+        return self._scaler
+
+    def predict_matrix(self, features, type_codes=None) -> List[str]:
+        """
+        Labels for a (rows, feature_columns) matrix. type_codes (the
+        rows' ElementStore type codes) enable the cascade.
+        """
+        if len(features) == 0:
+            return []
+
+        if self.cascade is not None and type_codes is not None:
+            labels, _ = self.cascade.predict(features, type_codes, self.predict_full)
+            return labels
+
+        return self.predict_full(features)
+
+    def predict_full(self, features) -> List[str]:
+        """
+        Labels from the full model: the array forest for small batches
+        (every batch when it is pruned), scikit-learn otherwise.
+        """
+        if self.forest is not None and (not self.forest.exact or len(features) <= self.forest_max_rows):
+            return self.forest.predict(features).tolist()
+
+        # The scaler was fitted on a DataFrame; the matrix columns are
+        # feature_columns, already checked against its feature names
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", message="X does not have valid feature names")
+            scaled = self.scaler.transform(features)
+
+        return self.model.predict(scaled).tolist()
+
+    def store_matrix(self, store: ElementStore):
+        if self.schema is not None:
+            return self.schema.store_matrix(store)
+        return store.matrix(self.feature_columns)
+
+    def rows_matrix(self, rows: List[Dict]):
+        if self.schema is not None:
+            return self.schema.rows_matrix(rows)
+        return ElementStore.from_rows(rows).matrix(self.feature_columns)
+
+    def predict_store(self, store: ElementStore) -> List[str]:
+        return self.predict_matrix(self.store_matrix(store), store.types[:store.size])
+
+    def predict_rows(self, rows: List[Dict]) -> List[str]:
+        type_codes = row_type_codes(rows) if self.cascade is not None else None
+        return self.predict_matrix(self.rows_matrix(rows), type_codes)
+
+    def classify(self, rows: List[Dict], label_key="predicted_label") -> List[Dict]:
+        """
+        Set row[label_key] on every feature row, in place.
+        """
+        labels = self.predict_rows(rows)
+
+        for row, label in zip(rows, labels):
+            row[label_key] = label
+
+        return rows
+
+
+def row_type_codes(rows: List[Dict]):
+    """
+    ElementStore type codes of feature row dicts; rows without a known
+    type get UNKNOWN_TYPE and are labelled by the full model.
+    """
+    return np.array([TYPE_CODES.get(row.get("type"), UNKNOWN_TYPE) for row in rows], dtype=np.uint8)
@@ -0,0 +1,151 @@
+import json
+from pathlib import Path
+from typing import List, Dict
+
+import numpy as np
+
+from app.features.element_store import FLOAT_COLUMNS, INT_COLUMNS
+
+
+SCHEMA_FILE = "feature_schema.json"
+
+# Value the model gets when a row has no value for a feature; predict.py
+# has always filled missing keys with 0
+DEFAULT_VALUE = 0
+
+
+class SchemaError(ValueError):
+    """
+    Input or artifacts do not match the feature schema the model was
+    trained with.
+    """
+
+
+def build_schema(frame) -> Dict:
+    """
+    Schema of a training feature table (before scaling): column names
+    in model input order, their dtypes and the default for missing values.
+    """
+    return {
+        "features": [
+            {"name": str(name), "dtype": str(dtype), "default": DEFAULT_VALUE}
+            for name, dtype in zip(frame.columns, frame.dtypes)
+        ]
+    }
+
+
+def save_schema(schema: Dict, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(schema, f, indent=4)
+
+
+class FeatureSchema:
+    """
+    Ordered model input features, loaded from feature_schema.json.
+    Assembles the (rows, features) float32 input matrix with NumPy and
+    raises SchemaError as soon as inputs or artifacts disagree with it.
+    """
+
+    def __init__(self, schema: Dict):
+        features = schema["features"]
+
+        self.names = [feature["name"] for feature in features]
+        self.dtypes = [np.dtype(feature["dtype"]) for feature in features]
+        self.defaults = [feature.get("default", DEFAULT_VALUE) for feature in features]
+
+        non_numeric = [
+            name for name, dtype in zip(self.names, self.dtypes) if dtype.kind not in "biuf"
+        ]
+        if non_numeric:
+            raise SchemaError(f"Non-numeric model features: {non_numeric}")
+
+        # Features the extraction pipeline never produces
+        unknown = [
+            name for name, default in zip(self.names, self.defaults)
+            if name not in FLOAT_COLUMNS and name not in INT_COLUMNS and default is None
+        ]
+        if unknown:
+            raise SchemaError(f"Model features with no extractor column or default: {unknown}")
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def check_names(self, names, source):
+        """
+        Fail unless names (e.g. scaler.feature_names_in_) are the schema
+        features in the same order.
+        """
+        names = list(names)
+        if names != self.names:
+            missing = [name for name in self.names if name not in names]
+            extra = [name for name in names if name not in self.names]
+            raise SchemaError(
+                f"{source} does not match {SCHEMA_FILE}: "
+                f"missing {missing}, extra {extra}"
+                + ("" if missing or extra else ", different order")
+            )
+
+    def rows_matrix(self, rows: List[Dict]):
+        """
+        Model input matrix straight from feature row dicts. Absent or
+        null values take the feature default; values that are not
+        numbers, or not whole numbers for integer features, raise.
+        """
+        result = np.empty((len(rows), len(self.names)), dtype=np.float32)
+
+        for j, (name, dtype, default) in enumerate(zip(self.names, self.dtypes, self.defaults)):
+            values = [row.get(name) for row in rows]
+
+            if None in values:
+                if default is None:
+                    index = values.index(None)
+                    raise SchemaError(f"Row {index}: missing required feature '{name}'")
+                values = [default if value is None else value for value in values]
+
+            column = np.asarray(values)
+            if column.dtype.kind not in "biuf":
+                index = next((
+                    i for i, value in enumerate(values)
+                    if isinstance(value, (str, bytes, list, dict))
+                ), 0)
+                raise SchemaError(
+                    f"Row {index}: feature '{name}' is {values[index]!r}, expected {dtype}"
+                )
+
+            if dtype.kind in "biu" and column.dtype.kind == "f":
+                fractional = np.flatnonzero(column != np.floor(column))
+                if len(fractional):
+                    index = int(fractional[0])
+                    raise SchemaError(
+                        f"Row {index}: feature '{name}' is {values[index]!r}, expected {dtype}"
+                    )
+
+            result[:, j] = column
+
+        return result
+
+    def store_matrix(self, store):
+        """
+        Model input matrix from an ElementStore; features the store does
+        not hold take their default.
+        """
+        result = store.matrix(self.names)
+
+        for j, (name, default) in enumerate(zip(self.names, self.defaults)):
+            if name not in store.columns:
+                if default is None:
+                    raise SchemaError(f"Input has no column for required feature '{name}'")
+                result[:, j] = default
+
+        return result
+
+
+def load_schema(model_dir="models"):
+    """
+    FeatureSchema saved next to the model, or None for models trained
+    before schemas were saved.
+    """
+    path = Path(model_dir) / SCHEMA_FILE
+    return FeatureSchema.load(path) if path.exists() else None
@@ -0,0 +1,422 @@
+import argparse
+import copy
+import struct
+import time
+import zipfile
+from pathlib import Path
+
+import numpy as np
+
+
+FOREST_FILE = "pdf_structure_analyze_forest.npz"
+
+# Arrays smaller than this are read instead of memory-mapped
+MMAP_MIN_BYTES = 64 * 1024
+
+
+def tree_arrays(tree, n_classes, max_depth=None):
+    """
+    (feature, threshold, left, right, missing_left, values) of one
+    fitted tree, local node indices. With max_depth, nodes below it are
+    dropped and nodes at max_depth become leaves predicting their
+    class fractions (sklearn keeps those for every node).
+    """
+    left = tree.children_left
+    right = tree.children_right
+    missing_left = (
+        tree.missing_go_to_left.astype(bool)
+        if hasattr(tree, "missing_go_to_left") else np.zeros(tree.node_count, dtype=bool)
+    )
+    keep = np.ones(tree.node_count, dtype=bool)
+
+    if max_depth is not None and tree.max_depth > max_depth:
+        # Nodes are stored parents first
+        depth = np.zeros(tree.node_count, dtype=np.int32)
+        for node in range(tree.node_count):
+            if left[node] != -1:
+                depth[left[node]] = depth[right[node]] = depth[node] + 1
+
+        keep = depth <= max_depth
+        index = np.cumsum(keep) - 1
+
+        cut = depth == max_depth
+        left = np.where(cut | (left == -1), -1, index[left])[keep]
+        right = np.where(cut | (right == -1), -1, index[right])[keep]
+    else:
+        left = left.copy()
+        right = right.copy()
+
+    is_leaf = left == -1
+
+    return (
+        np.where(is_leaf, 0, tree.feature[keep]),
+        tree.threshold[keep],
+        left,
+        right,
+        missing_left[keep],
+        tree.value[keep, 0, :n_classes],
+    )
+
+
+def export_forest(model, scaler, path, trees=None, max_depth=None):
+    """
+    Flatten a fitted RandomForestClassifier and its MinMaxScaler into
+    contiguous node arrays saved as one uncompressed .npz:
+
+        feature, threshold, left, right, missing_left   per node
+        values      per node class fractions (leaf predictions)
+        roots       first node of each tree
+        scale, min  MinMax scaling, applied as X * scale + min
+
+    Child indices are global, so all trees share one node table. The
+    evaluator's derived arrays are saved too, so ArrayForest.load() can
+    memory-map everything and compute nothing.
+
+    trees / max_depth export a pruned forest: the first `trees` trees,
+    cut at max_depth. Its predictions are no longer exactly sklearn's.
+    """
+    estimators = model.estimators_[:trees] if trees else model.estimators_
+
+    node_arrays = [[] for _ in range(6)]
+    roots = []
+    offset = 0
+
+    for estimator in estimators:
+        arrays = tree_arrays(estimator.tree_, model.n_classes_, max_depth)
+
+        feature, threshold, left, right, missing_left, values = arrays
+        left = np.where(left == -1, -1, left + offset)
+        right = np.where(right == -1, -1, right + offset)
+
+        for parts, array in zip(node_arrays, (feature, threshold, left, right, missing_left, values)):
+            parts.append(array)
+
+        roots.append(offset)
+        offset += len(feature)
+
+    feature, threshold, left, right, missing_left, values = [np.concatenate(parts) for parts in node_arrays]
+
+    depth = max(estimator.tree_.max_depth for estimator in estimators)
+    if max_depth is not None:
+        depth = min(depth, max_depth)
+
+    arrays = {
+        "feature": feature.astype(np.int32),
+        "threshold": threshold.astype(np.float64),
+        "left": left.astype(np.int32),
+        "right": right.astype(np.int32),
+        "missing_left": missing_left,
+        "values": np.ascontiguousarray(values, dtype=np.float64),
+        "roots": np.array(roots, dtype=np.int32),
+        "max_depth": np.array(depth),
+        # String labels are object arrays in sklearn; stored as unicode, no pickle
+        "classes": model.classes_.astype(str) if model.classes_.dtype == object else model.classes_,
+        "scale": np.asarray(scaler.scale_, dtype=np.float64),
+        "min": np.asarray(scaler.min_, dtype=np.float64),
+        "clip": np.array(bool(getattr(scaler, "clip", False))),
+        "feature_range": np.array(scaler.feature_range, dtype=np.float64),
+        "feature_names": np.array(scaler.feature_names_in_, dtype=str),
+        # Pruned exports do not reproduce the model's predictions
+        "exact": np.array(
+            len(estimators) == len(model.estimators_)
+            and depth == max(estimator.tree_.max_depth for estimator in model.estimators_)
+        ),
+    }
+
+    arrays.update(ArrayForest(arrays).derived_arrays())
+
+    np.savez(path, **arrays)
+
+
+def load_arrays(path, mmap=True):
+    """
+    Arrays of an uncompressed .npz. np.load() ignores mmap_mode for
+    .npz, so with mmap each member's data is memory-mapped read-only
+    straight from its offset in the archive: the pages are shared by
+    every process that loads the same file. Small arrays are read.
+    """
+    if not mmap:
+        with np.load(path) as data:
+            return {name: data[name] for name in data.files}
+
+    arrays = {}
+
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as f:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{path} is compressed and cannot be memory-mapped")
+
+            # Local file header: 30 bytes, then the name and extra field
+            f.seek(info.header_offset + 26)
+            name_length, extra_length = struct.unpack("<HH", f.read(4))
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+
+            name = info.filename[:-len(".npy")]
+            size = int(np.prod(shape)) * dtype.itemsize
+
+            if size < MMAP_MIN_BYTES or dtype.hasobject:
+                f.seek(info.header_offset + 30 + name_length + extra_length)
+                arrays[name] = np.lib.format.read_array(f)
+            else:
+                # Plain ndarray view; the map stays open through .base
+                arrays[name] = np.memmap(
+                    path, dtype=dtype, mode="r", offset=f.tell(), shape=shape,
+                    order="F" if fortran_order else "C"
+                ).view(np.ndarray)
+
+    return arrays
+
+
+class ArrayForest:
+    """
+    Vectorized evaluator for a forest exported by export_forest().
+
+    All rows descend all trees at once, one tree level per step. Forests
+    up to COMPLETE_DEPTH deep are laid out as complete binary trees, so
+    a step is one comparison and `slot = 2 * slot + 1 + went_right` with
+    no child lookups; deeper forests walk the node arrays instead.
+    Scaling, float32 feature casting, split comparisons and the
+    tree-by-tree probability sum follow MinMaxScaler.transform and
+    RandomForestClassifier.predict_proba, so labels and probabilities
+    match scikit-learn exactly.
+    """
+
+    # Complete layouts hold 2 ** depth slots per tree
+    COMPLETE_DEPTH = 12
+
+    # Rows per step, so the per-(row, tree) arrays stay in cache
+    block_rows = 128
+
+    def __init__(self, arrays):
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.missing_left = arrays["missing_left"]
+        self.values = arrays["values"]
+        self.roots = arrays["roots"]
+        self.max_depth = int(arrays["max_depth"])
+        self.classes = arrays["classes"]
+        self.scale = arrays["scale"]
+        self.min = arrays["min"]
+        self.clip = bool(arrays["clip"])
+        self.feature_range = arrays["feature_range"]
+        self.feature_names = arrays["feature_names"].tolist()
+
+        self.exact = bool(arrays.get("exact", True))
+        self.complete = self.max_depth <= self.COMPLETE_DEPTH
+
+        if "children" in arrays:
+            # Saved by export_forest(); nothing to compute
+            self.has_missing = bool(arrays["has_missing"])
+            self.children = arrays["children"]
+            if self.complete:
+                self.slot_feature = arrays["slot_feature"]
+                self.slot_threshold = arrays["slot_threshold"]
+                self.slot_missing_left = arrays["slot_missing_left"]
+                self.slot_leaf = arrays["slot_leaf"]
+            return
+
+        self.has_missing = bool(self.missing_left.any())
+
+        # Leaves are their own children, so finished paths can keep stepping
+        is_leaf = self.left == -1
+        nodes = np.arange(len(self.left), dtype=np.int32)
+        self.children = np.stack([
+            np.where(is_leaf, nodes, self.left),
+            np.where(is_leaf, nodes, self.right),
+        ], axis=1).ravel()
+
+        if self.complete:
+            self.build_complete_layout()
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Load an exported forest, memory-mapped by default.
+        """
+        return cls(load_arrays(path, mmap))
+
+    def derived_arrays(self):
+        """
+        Evaluation arrays computed from the node arrays, for saving.
+        """
+        arrays = {"has_missing": np.array(self.has_missing), "children": self.children}
+
+        if self.complete:
+            arrays.update({
+                "slot_feature": self.slot_feature,
+                "slot_threshold": self.slot_threshold,
+                "slot_missing_left": self.slot_missing_left,
+                "slot_leaf": self.slot_leaf,
+            })
+
+        return arrays
+
+    def build_complete_layout(self):
+        """
+        Level-order slots per tree: slot i has children 2i+1 and 2i+2,
+        leaves above the last level fill every slot below them.
+        """
+        level = self.roots[:, None]
+        internal = []
+
+        for _ in range(self.max_depth):
+            internal.append(level)
+            level = self.children.reshape(-1, 2)[level].reshape(len(self.roots), -1)
+
+        internal = np.concatenate(internal, axis=1) if internal else level[:, :0]
+
+        self.slot_feature = self.feature[internal].ravel()
+        self.slot_threshold = self.threshold[internal].ravel()
+        self.slot_missing_left = self.missing_left[internal].ravel()
+        self.slot_leaf = level.ravel()
+
+    def head(self, trees):
+        """
+        Forest of the first `trees` trees, sharing this forest's arrays.
+        Random forest trees are exchangeable, so this is a smaller model
+        of the same ensemble.
+        """
+        forest = copy.copy(self)
+        forest.roots = self.roots[:trees]
+
+        if self.complete:
+            internal = 2 ** self.max_depth - 1
+            forest.slot_feature = self.slot_feature[:trees * internal]
+            forest.slot_threshold = self.slot_threshold[:trees * internal]
+            forest.slot_missing_left = self.slot_missing_left[:trees * internal]
+            forest.slot_leaf = self.slot_leaf[:trees * (internal + 1)]
+
+        return forest
+
+    def transform(self, features):
+        """
+        MinMaxScaler.transform(): same dtype rules and operation order.
+        """
+        dtype = features.dtype if features.dtype in (np.float32, np.float64) else np.float64
+        scaled = np.array(features, dtype=dtype, copy=True)
+
+        scaled *= self.scale
+        scaled += self.min
+
+        if self.clip:
+            np.clip(scaled, self.feature_range[0], self.feature_range[1], out=scaled)
+
+        return scaled
+
+    def descend(self, x, rows, n_features):
+        """
+        Leaf node of each (row, tree) pair for a block of rows, flattened
+        row-major. x is the block as flat float32.
+        """
+        trees = len(self.roots)
+        offsets = np.repeat(np.arange(rows) * n_features, trees)
+
+        if self.complete:
+            internal = 2 ** self.max_depth - 1
+            base = np.tile(np.arange(trees) * internal, rows)
+            slots = np.zeros(rows * trees, dtype=np.int64)
+
+            for _ in range(self.max_depth):
+                at = base + slots
+                values = x[offsets + self.slot_feature[at]]
+                went_right = self.went_right(values, self.slot_threshold, self.slot_missing_left, at)
+                slots = 2 * slots + 1 + went_right
+
+            return self.slot_leaf[np.tile(np.arange(trees) * (internal + 1), rows) + slots - internal]
+
+        nodes = np.tile(self.roots, rows)
+        for _ in range(self.max_depth):
+            values = x[offsets + self.feature[nodes]]
+            went_right = self.went_right(values, self.threshold, self.missing_left, nodes)
+            nodes = self.children[2 * nodes + went_right]
+
+        return nodes
+
+    def went_right(self, values, threshold, missing_left, at):
+        # Trees compare float32 features against float64 thresholds
+        went_right = ~(values <= threshold[at])
+
+        if self.has_missing:
+            missing = np.isnan(values)
+            went_right[missing] = ~missing_left[at[missing]]
+
+        return went_right
+
+    def apply(self, scaled):
+        """
+        Leaf node of every (row, tree) pair, shape (rows, trees).
+        """
+        rows, n_features = scaled.shape
+        x = np.ascontiguousarray(scaled, dtype=np.float32)
+
+        leaves = np.empty((rows, len(self.roots)), dtype=np.int32)
+
+        for start in range(0, rows, self.block_rows):
+            block = x[start:start + self.block_rows]
+            leaves[start:start + len(block)] = self.descend(
+                block.ravel(), len(block), n_features
+            ).reshape(len(block), -1)
+
+        return leaves
+
+    def predict_proba(self, features):
+        leaves = self.apply(self.transform(features))
+
+        proba = np.empty((len(leaves), self.values.shape[1]), dtype=np.float64)
+
+        # Reducing over the leading (tree) axis adds trees one after the
+        # other, in the same order and precision as the forest does
+        for start in range(0, len(leaves), self.block_rows):
+            block = leaves[start:start + self.block_rows]
+            proba[start:start + len(block)] = self.values[block.T].sum(axis=0)
+
+        proba /= leaves.shape[1]
+        return proba
+
+    def predict(self, features):
+        if len(features) == 0:
+            return self.classes[:0]
+        return self.classes.take(np.argmax(self.predict_proba(features), axis=1), axis=0)
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        prog="python -m app.models.forest",
+        description="Export the trained forest and scaler to array form."
+    )
+    parser.add_argument("--model-dir", default="models")
+    parser.add_argument("--output", default=None,
+                        help=f"Default: <model-dir>/{FOREST_FILE}")
+    parser.add_argument("--trees", type=int, default=None,
+                        help="Keep only the first N trees (pruned export)")
+    parser.add_argument("--max-depth", type=int, default=None,
+                        help="Cut trees at this depth (pruned export)")
+    args = parser.parse_args()
+
+    from app.models.model_loader import load_model
+
+    start = time.time()
+    model, scaler = load_model(args.model_dir)
+    path = Path(args.output or Path(args.model_dir) / FOREST_FILE)
+
+    export_forest(model, scaler, path, trees=args.trees, max_depth=args.max_depth)
+    forest = ArrayForest.load(path)
+
+    print(f"Exported {len(forest.roots)} of {len(model.estimators_)} trees, "
+          f"max depth {forest.max_depth}, {len(forest.feature)} nodes to {path} "
+          f"({path.stat().st_size / 1024 ** 2:.1f} MB) in {time.time() - start:.2f}s")
+    if not forest.exact:
+        print("Pruned: predictions can differ from the trained model.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+from pathlib import Path
+
+
+MODEL_FILE = "pdf_structure_analyze_model.pkl"
+SCALER_FILE = "minmax_scaler.pkl"
+
+# Loaded (model, scaler) pairs by resolved model folder, per process
+_loaded = {}
+
+
+def load_model(model_dir="models"):
+    """
+    Return (model, scaler) from model_dir. Each folder is unpickled once
+    per process; later calls return the same objects.
+    """
+    key = str(Path(model_dir).resolve())
+
+    if key not in _loaded:
+        # Imported here: unpickling pulls in scikit-learn, which callers
+        # served by the array forest never need
+        import joblib
+
+        model_dir = Path(model_dir)
+        _loaded[key] = (
+            joblib.load(model_dir / MODEL_FILE),
+            joblib.load(model_dir / SCALER_FILE),
+        )
+
+    return _loaded[key]
+
+
+def load_forest(model_dir="models"):
+    """
+    Return the ArrayForest exported next to the model, or None when there
+    is no export or it is older than the pickled model. Its arrays are
+    memory-mapped read-only, so processes serving the same model folder
+    share one copy in the page cache instead of each unpickling its own.
+    """
+    from app.models.forest import FOREST_FILE, ArrayForest
+
+    model_dir = Path(model_dir)
+    forest_path = model_dir / FOREST_FILE
+    model_path = model_dir / MODEL_FILE
+
+    if not forest_path.exists():
+        return None
+    if model_path.exists() and forest_path.stat().st_mtime < model_path.stat().st_mtime:
+        print(f"Ignoring {forest_path}: older than {model_path}, re-export it.")
+        return None
+
+    key = str(forest_path.resolve())
+
+    if key not in _loaded:
+        _loaded[key] = ArrayForest.load(forest_path)
+
+    return _loaded[key]
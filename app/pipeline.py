@@ -1,41 +1,452 @@
 import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from app.cache import ExtractionCache
 from app.extractor.pdf_loader import PDFLoader
+from app.extractor.page_context import PageContext
 from app.extractor.text_extractor import TextExtractor
 from app.extractor.image_extractor import ImageExtractor
 from app.extractor.table_extractor import TableExtractor
 from app.features.feature_extractor import FeatureExtractor
+from app.features.element_store import ElementStore
+from app.features.feature_io import OUTPUT_FORMATS, SUFFIXES, write_features
+from app.sections import SectionBuilder, build_sections
 import warnings
 warnings.filterwarnings("ignore")
 
 
+def build_extractors(document, pdf_path, options=None):
+    """
+    Create the text, image and table extractors for an open document.
+    `options` carries the pipeline settings that affect extraction and
+    is passed as-is to worker processes.
+    """
+    options = options or {}
+
+    text_extractor = TextExtractor(document)
+    image_extractor = ImageExtractor(
+        document,
+        output_folder=options.get("image_folder", "data/output/images"),
+        mode=options.get("image_mode", "full"),
+        image_filter=True if options.get("image_filter", True) else None
+    )
+    table_extractor = TableExtractor(
+        str(pdf_path),
+        output_folder=options.get("table_folder", "data/output/tables"),
+        document=document,
+        prefilter=options.get("table_prefilter", True),
+        backend=options.get("table_backend", "auto")
+    )
+
+    return text_extractor, image_extractor, table_extractor
+
+
+def extract_shard(pdf_path, pages=None, options=None):
+    """
+    Run text, image and table extraction over a set of 0-based pages
+    (all pages when None) using a document opened by this process.
+    Returns (elements, extractor reports).
+    """
+    loader = PDFLoader(pdf_path)
+    document = loader.load()
+
+    if pages is None:
+        pages = range(len(document))
+
+    text_elements = []
+    image_elements = []
+    table_elements = []
+
+    try:
+        text_extractor, image_extractor, table_extractor = build_extractors(
+            document, pdf_path, options
+        )
+
+        # Page-major: every extractor works off one shared parse of the page
+        for page_number in pages:
+            context = PageContext(document, page_number, TextExtractor.TEXT_FLAGS)
+
+            text_elements.extend(text_extractor.extract_page(page_number, context))
+            image_elements.extend(image_extractor.extract_page(page_number, context))
+            table_elements.extend(table_extractor.extract_page(page_number, context))
+
+            context.release()
+
+        # Single Camelot call for all pages that need the fallback
+        table_elements.extend(table_extractor.finish())
+        image_extractor.close()
+    finally:
+        loader.close()
+
+    elements = text_elements + image_elements + table_elements
+
+    return elements, {"tables": table_extractor.report, "images": image_extractor.report}
+
+
+def extract_shard_pages(pdf_path, pages, options=None):
+    """
+    Like extract_shard(), but with elements grouped as
+    (page_number, elements) pairs in page order, for streaming consumers.
+    """
+    elements_by_page = {page_number: [] for page_number in pages}
+
+    elements, reports = extract_shard(pdf_path, pages, options)
+
+    for element in elements:
+        elements_by_page[element["page_number"] - 1].append(element)
+
+    return list(elements_by_page.items()), reports
+
+
+def merge_reports(reports):
+    """
+    Sum extractor reports ({"tables": {...}, "images": {...}}),
+    e.g. from several page shards.
+    """
+    merged = {}
+
+    for report in reports:
+        for name, counters in report.items():
+            totals = merged.setdefault(name, {})
+            for key, value in counters.items():
+                totals[key] = totals.get(key, 0) + value
+
+    return merged
+
+
+def shard_pages(page_count, workers):
+    """
+    Split page numbers into at most `workers` contiguous ranges.
+    """
+    shard_count = max(1, min(workers, page_count))
+    shard_size, remainder = divmod(page_count, shard_count)
+
+    shards = []
+    start = 0
+
+    for index in range(shard_count):
+        end = start + shard_size + (1 if index < remainder else 0)
+        shards.append(range(start, end))
+        start = end
+
+    return shards
+
+
 class PDFPipeline:
     """
     End-to-end PDF processing pipeline.
     """
 
-    def __init__(self, pdf_path, output_path="data/interim/features.json"):
+    # Pages per task when streaming with workers > 1, and pages per
+    # Camelot fallback call when streaming serially; bounds how much
+    # extracted data is in flight before it reaches the writer
+    stream_shard_pages = 16
+
+    def __init__(
+        self,
+        pdf_path,
+        output_path=None,
+        workers=1,
+        stream=False,
+        image_folder="data/output/images",
+        table_folder="data/output/tables",
+        cache_dir=None,
+        cache_max_bytes=2 * 1024 ** 3,
+        table_prefilter=True,
+        table_backend="auto",
+        image_mode="full",
+        image_filter=True,
+        output_format="json",
+        classifier=None,
+        sections_path=None
+    ):
+        """
+        classifier: optional app.models.classifier.Classifier. When set,
+        feature rows get a "predicted_label" in memory and the document's
+        sections are written to sections_path (default: sections.json
+        next to the output).
+        """
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(
+                f"Unknown output format '{output_format}', expected one of {OUTPUT_FORMATS}"
+            )
+        if stream and output_format != "json":
+            raise ValueError("Streaming writes JSONL; output_format must be 'json'")
+
         self.pdf_path = pdf_path
+        self.workers = workers
+        self.stream = stream
+        self.image_folder = image_folder
+        self.table_folder = table_folder
+        self.table_prefilter = table_prefilter
+        self.table_backend = table_backend
+        self.image_mode = image_mode
+        self.image_filter = image_filter
+        self.output_format = output_format
+        self.classifier = classifier
+        self.elements = None
+        self.reports = None
+        self.sections = None
+
+        # Extraction results are reused across runs when a cache is set
+        self.cache = (
+            ExtractionCache(cache_dir, max_bytes=cache_max_bytes)
+            if cache_dir else None
+        )
+
+        if output_path is None:
+            output_path = "data/interim/features" + (
+                SUFFIXES["jsonl"] if stream else SUFFIXES[output_format]
+            )
+
         self.output_path = output_path
 
-    def run(self):
+        if sections_path is None:
+            sections_path = os.path.join(os.path.dirname(output_path), "sections.json")
+
+        self.sections_path = sections_path
+
+    def extractor_options(self):
+        """
+        Settings forwarded to build_extractors(), in this process
+        or in worker processes.
+        """
+        return {
+            "image_folder": self.image_folder,
+            "table_folder": self.table_folder,
+            "table_prefilter": self.table_prefilter,
+            "table_backend": self.table_backend,
+            "image_mode": self.image_mode,
+            "image_filter": self.image_filter,
+        }
+
+    def extract_elements(self):
+        """
+        Extract layout elements serially or, with workers > 1,
+        across page shards processed in separate processes.
+        """
+        if self.workers <= 1:
+            all_elements, self.reports = extract_shard(
+                self.pdf_path, options=self.extractor_options()
+            )
+            return all_elements
 
-        # Load PDF
+        loader = PDFLoader(self.pdf_path)
+        loader.load()
+        page_count = loader.get_page_count()
+        loader.close()
+
+        shards = shard_pages(page_count, self.workers)
+
+        all_elements = []
+        shard_reports = []
+
+        with ProcessPoolExecutor(max_workers=len(shards)) as executor:
+            # map() yields shard results in page order
+            for shard_elements, reports in executor.map(
+                extract_shard,
+                [self.pdf_path] * len(shards),
+                shards,
+                [self.extractor_options()] * len(shards)
+            ):
+                all_elements.extend(shard_elements)
+                shard_reports.append(reports)
+
+        self.reports = merge_reports(shard_reports)
+
+        return all_elements
+
+    def iter_page_elements(self):
+        """
+        Yield (page_number, elements) one page at a time, in page order.
+        Only the pages currently being extracted are held in memory.
+        """
         loader = PDFLoader(self.pdf_path)
         document = loader.load()
 
-        # Extract text
-        text_extractor = TextExtractor(document)
-        text_elements = text_extractor.extract()
+        if self.workers > 1:
+            page_count = loader.get_page_count()
+            loader.close()
+
+            shards = [
+                range(start, min(start + self.stream_shard_pages, page_count))
+                for start in range(0, page_count, self.stream_shard_pages)
+            ]
+
+            shard_reports = []
+
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                for shard, reports in executor.map(
+                    extract_shard_pages,
+                    [self.pdf_path] * len(shards),
+                    shards,
+                    [self.extractor_options()] * len(shards)
+                ):
+                    shard_reports.append(reports)
+                    yield from shard
+
+            self.reports = merge_reports(shard_reports)
+            return
 
-        # Extract images 
-        image_extractor = ImageExtractor(document)
-        image_elements = image_extractor.extract()
-        
-        # Extract tables 
-        table_extractor = TableExtractor(self.pdf_path)
-        table_elements = table_extractor.extract()
+        try:
+            text_extractor, image_extractor, table_extractor = build_extractors(
+                document, self.pdf_path, self.extractor_options()
+            )
 
-        all_elements = text_elements + image_elements + table_elements
+            # Pages from the first one queued for the Camelot fallback on,
+            # resolved with one Camelot call per stream_shard_pages pages
+            # (each call re-parses the whole PDF) and yielded in order
+            held = []
+
+            for page_number in range(len(document)):
+                context = PageContext(document, page_number, TextExtractor.TEXT_FLAGS)
+
+                page_elements = (
+                    text_extractor.extract_page(page_number, context)
+                    + image_extractor.extract_page(page_number, context)
+                    + table_extractor.extract_page(page_number, context)
+                )
+
+                # Free this page's parse before handing it downstream
+                context.release()
+
+                if not table_extractor.pending_fallback:
+                    yield page_number, page_elements
+                    continue
+
+                held.append((page_number, page_elements))
+                if len(held) >= self.stream_shard_pages:
+                    yield from table_extractor.finish_pages(held)
+                    held = []
+
+            yield from table_extractor.finish_pages(held)
+
+            image_extractor.close()
+            self.reports = {
+                "tables": table_extractor.report,
+                "images": image_extractor.report,
+            }
+        finally:
+            loader.close()
+
+    def document_avg_font_size(self):
+        """
+        Average Text font size over the whole document, computed with a
+        text-only pass so streamed pages share the same normalisation.
+        """
+        loader = PDFLoader(self.pdf_path)
+        document = loader.load()
+
+        try:
+            text_extractor = TextExtractor(document)
+
+            total = 0.0
+            count = 0
+
+            for page_number in range(len(document)):
+                sizes = text_extractor.line_font_sizes(page_number)
+                total += sum(sizes)
+                count += len(sizes)
+        finally:
+            loader.close()
+
+        return total / count if count else 1
+
+    def iter_features(self):
+        """
+        Yield the feature rows of each page as soon as it is extracted.
+        """
+        avg_font_size = self.document_avg_font_size()
+
+        for _, page_elements in self.iter_page_elements():
+
+            for element in page_elements:
+                element.setdefault("y_position", 0)
+
+            page_elements.sort(key=lambda x: x["y_position"])
+
+            yield FeatureExtractor(page_elements, avg_font_size).extract()
+
+    def print_reports(self):
+        """
+        Print the per-document extractor reports (none on a cache hit).
+        """
+        if not self.reports:
+            return
+
+        print(ImageExtractor.format_report(self.reports["images"]))
+        print(TableExtractor.format_report(self.reports["tables"]))
+
+    def cache_lookup(self):
+        """
+        Return (cache key, cached entry or None). The PDF is hashed but
+        never opened with fitz.
+        """
+        PDFLoader(self.pdf_path).validate()
+
+        cache_key = self.cache.key(self.pdf_path, self.extractor_options())
+        entry = self.cache.get(cache_key, pdf_bytes=os.path.getsize(self.pdf_path))
+
+        if entry is not None:
+            print(f"Extraction cache hit for {self.pdf_path}")
+
+        return cache_key, entry
+
+    def write_sections(self):
+
+        with open(self.sections_path, "w", encoding="utf-8") as f:
+            json.dump(self.sections, f, indent=4, ensure_ascii=False)
+
+        print(f"Structured sections saved to {self.sections_path}")
+
+    def run_streaming(self):
+        """
+        Write feature rows as JSONL, one page at a time, flushing after
+        each page so readers can consume the file while it grows.
+        A cache hit is served from the cache; misses are not stored,
+        since streaming never holds the whole document.
+        """
+        row_count = 0
+
+        entry = None
+        if self.cache is not None:
+            _, entry = self.cache_lookup()
+
+        if entry is not None:
+            pages = [entry["features"]]
+        else:
+            pages = self.iter_features()
+
+        builder = SectionBuilder() if self.classifier is not None else None
+
+        with open(self.output_path, "w", encoding="utf-8") as f:
+            for page_features in pages:
+                if builder is not None:
+                    self.classifier.classify(page_features)
+                    builder.add_rows(page_features)
+
+                for row in page_features:
+                    f.write(json.dumps(row, ensure_ascii=False))
+                    f.write("\n")
+                f.flush()
+                row_count += len(page_features)
+
+        print(f"Feature extraction complete. Streamed {row_count} rows to {self.output_path}")
+
+        if builder is not None:
+            self.sections = builder.finish()
+            self.write_sections()
+
+        self.print_reports()
+
+        return row_count
+
+    def sorted_elements(self):
+        """
+        Extract all elements, ordered by page and vertical position.
+        """
+        all_elements = self.extract_elements()
 
         # Normalize layout keys
         for element in all_elements:
@@ -46,17 +457,93 @@ class PDFPipeline:
         all_elements.sort(
             key=lambda x: (x["page_number"], x["y_position"])
         )
-        
-        # Extract features
-        feature_extractor = FeatureExtractor(all_elements)
-        features = feature_extractor.extract()
 
-        loader.close()
+        return all_elements
 
-        # Save features
-        with open(self.output_path, "w", encoding="utf-8") as f:
-            json.dump(features, f, indent=4, ensure_ascii=False)
+    def extract_store(self, store=None):
+        """
+        Extract the feature rows into a columnar ElementStore, without
+        building per-row feature dicts or writing output. Pass store to
+        collect many documents into one store. Cache hits are served
+        from the cached features.
+        """
+        if self.cache is not None:
+            _, entry = self.cache_lookup()
+            if entry is not None:
+                self.elements = entry["elements"]
+                store = store if store is not None else ElementStore(len(entry["features"]))
+                return store.extend_rows(entry["features"])
+
+        self.elements = self.sorted_elements()
+
+        return FeatureExtractor(self.elements).extract_store(store)
+
+    def extract_features(self):
+        """
+        Feature rows for the whole document, without writing output.
+        Served from and stored in the cache when one is set.
+        """
+        cache_key = None
+        entry = None
+
+        if self.cache is not None:
+            cache_key, entry = self.cache_lookup()
+
+        if entry is not None:
+            self.elements = entry["elements"]
+            features = entry["features"]
+        else:
+            start = time.time()
+
+            all_elements = self.sorted_elements()
+
+            # Extract features
+            feature_extractor = FeatureExtractor(all_elements)
+            features = feature_extractor.extract()
+
+            self.elements = all_elements
+
+            if self.cache is not None:
+                self.cache.put(
+                    cache_key, all_elements, features,
+                    extraction_seconds=round(time.time() - start, 3)
+                )
+
+        return features
+
+    def materialize_images(self):
+        """
+        Write the images of a finished "deferred" (or "metadata") run
+        into image_folder, reopening the PDF, and return its Image
+        elements with content, image_path and image_hash filled in.
+        """
+        images = [
+            element for element in self.elements or []
+            if element.get("type") == "Image"
+        ]
+
+        return ImageExtractor.materialize_pdf(self.pdf_path, images, self.image_folder)
+
+    def run(self):
+
+        if self.stream:
+            return self.run_streaming()
+
+        features = self.extract_features()
+
+        # Classify in memory; the cache keeps the unlabelled features
+        if self.classifier is not None:
+            self.classifier.classify(features)
+
+        # Save features (pretty-printed JSON or a typed columnar file)
+        write_features(features, self.output_path, self.output_format)
 
         print(f"Feature extraction complete. Saved to {self.output_path}")
 
-        return features
\ No newline at end of file
+        if self.classifier is not None:
+            self.sections = build_sections(features)
+            self.write_sections()
+
+        self.print_reports()
+
+        return features
@@ -0,0 +1,104 @@
+from typing import List, Dict
+
+
+# Labels that take part in sections; others (e.g. footers) are skipped
+SECTION_ORDER = ["Heading", "Subheading", "Paragraph", "Table", "Image"]
+
+
+class SectionBuilder:
+    """
+    Groups labelled blocks, in reading order, into sections: a heading
+    and/or subheading followed by its paragraphs, tables and images.
+    Consecutive blocks with the same label are merged. Blocks are added
+    one at a time, so pages can be fed in as they are classified.
+    """
+
+    def __init__(self):
+        self.sections = []
+        self.current_section = None
+        self.previous_label = None
+
+    def add(self, label, content):
+
+        if label not in SECTION_ORDER:
+            return
+
+        current_section = self.current_section
+        previous_label = self.previous_label
+
+        # -------------------------
+        # Start New Section
+        # -------------------------
+        if label in ["Heading", "Subheading"]:
+
+            # Merge consecutive headings
+            if current_section and label == previous_label:
+                if label == "Heading":
+                    current_section["heading"] += " " + content
+                else:
+                    if current_section["subheading"]:
+                        current_section["subheading"] += " " + content
+                    else:
+                        current_section["subheading"] = content
+            else:
+                if current_section:
+                    self.sections.append(current_section)
+
+                self.current_section = {
+                    "heading": content if label == "Heading" else None,
+                    "subheading": content if label == "Subheading" else None,
+                    "paragraphs": [],
+                    "tables": [],
+                    "images": []
+                }
+
+        # -------------------------
+        # Inside Section
+        # -------------------------
+        elif current_section:
+
+            # Merge consecutive paragraphs
+            if label == "Paragraph":
+                if previous_label == "Paragraph" and current_section["paragraphs"]:
+                    current_section["paragraphs"][-1] += " " + content
+                else:
+                    current_section["paragraphs"].append(content)
+
+            # Merge consecutive tables
+            elif label == "Table":
+                if previous_label == "Table" and current_section["tables"]:
+                    current_section["tables"][-1] += " " + content
+                else:
+                    current_section["tables"].append(content)
+
+            # Merge consecutive images (DO NOT END SECTION)
+            elif label == "Image":
+                if previous_label == "Image" and current_section["images"]:
+                    current_section["images"][-1] += " " + content
+                else:
+                    current_section["images"].append(content)
+
+        self.previous_label = label
+
+    def add_rows(self, rows: List[Dict], label_key="predicted_label"):
+        for row in rows:
+            self.add(row.get(label_key), row.get("content"))
+
+    def finish(self) -> List[Dict]:
+        """
+        Close the open section and return all sections.
+        """
+        if self.current_section:
+            self.sections.append(self.current_section)
+            self.current_section = None
+
+        return self.sections
+
+
+def build_sections(rows: List[Dict], label_key="predicted_label") -> List[Dict]:
+    """
+    Build sections from labelled feature rows in reading order.
+    """
+    builder = SectionBuilder()
+    builder.add_rows(rows, label_key)
+    return builder.finish()
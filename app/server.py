@@ -0,0 +1,346 @@
+import argparse
+import hashlib
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from app.models.classifier import Classifier, row_type_codes
+from app.pipeline import PDFPipeline
+from app.sections import build_sections
+
+
+class LatencyStats:
+    """
+    Recent request latencies per endpoint, for percentile reporting.
+    """
+
+    def __init__(self, window=10000):
+        self.window = window
+        self.samples = {}
+        self.counts = {}
+        self.lock = threading.Lock()
+
+    def record(self, endpoint, seconds):
+        with self.lock:
+            if endpoint not in self.samples:
+                self.samples[endpoint] = deque(maxlen=self.window)
+                self.counts[endpoint] = 0
+            self.samples[endpoint].append(seconds)
+            self.counts[endpoint] += 1
+
+    def summary(self):
+        with self.lock:
+            samples = {name: list(values) for name, values in self.samples.items()}
+            counts = dict(self.counts)
+
+        result = {}
+
+        for name, values in samples.items():
+            p50, p90, p99 = np.percentile(values, [50, 90, 99]) * 1000
+            result[name] = {
+                "requests": counts[name],
+                "p50_ms": round(float(p50), 3),
+                "p90_ms": round(float(p90), 3),
+                "p99_ms": round(float(p99), 3),
+                "max_ms": round(max(values) * 1000, 3),
+            }
+
+        return result
+
+
+class MicroBatcher:
+    """
+    Collects classification requests from concurrent handler threads and
+    runs them as one model.predict call. A batch is closed when it
+    reaches max_batch_rows or max_wait_ms after its first request.
+    """
+
+    def __init__(self, classifier, max_batch_rows=8192, max_wait_ms=5.0):
+        self.classifier = classifier
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000
+
+        self.requests = queue.Queue()
+        self.batches = 0
+        self.batched_requests = 0
+        self.batched_rows = 0
+
+        self.thread = threading.Thread(target=self.loop, daemon=True)
+        self.thread.start()
+
+    def submit(self, features, type_codes=None):
+        """
+        Queue a (rows, feature_columns) matrix and optionally its rows'
+        type codes (for the cascade); the returned Future resolves to
+        its list of labels.
+        """
+        future = Future()
+        self.requests.put((features, type_codes, future))
+        return future
+
+    def queue_depth(self):
+        return self.requests.qsize()
+
+    def next_batch(self):
+        batch = [self.requests.get()]
+        rows = len(batch[0][0])
+        deadline = time.perf_counter() + self.max_wait
+
+        while rows < self.max_batch_rows:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self.requests.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            rows += len(item[0])
+
+        return batch
+
+    def loop(self):
+
+        while True:
+            batch = self.next_batch()
+
+            type_codes = None
+            if all(codes is not None for _, codes, _ in batch):
+                type_codes = np.concatenate([codes for _, codes, _ in batch])
+
+            try:
+                labels = self.classifier.predict_matrix(
+                    np.concatenate([features for features, _, _ in batch]), type_codes
+                )
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.batched_requests += len(batch)
+            self.batched_rows += len(labels)
+
+            start = 0
+            for features, _, future in batch:
+                future.set_result(labels[start:start + len(features)])
+                start += len(features)
+
+    def stats(self):
+        return {
+            "queue_depth": self.queue_depth(),
+            "batches": self.batches,
+            "requests": self.batched_requests,
+            "rows": self.batched_rows,
+            "mean_requests_per_batch": (
+                round(self.batched_requests / self.batches, 2) if self.batches else 0
+            ),
+        }
+
+
+class InferenceHandler(BaseHTTPRequestHandler):
+    """
+    GET  /health    liveness
+    GET  /stats     queue depth, batching, cascade stages and latency percentiles
+    POST /classify  feature rows (JSON array, or {"rows": [...]}) -> labels
+    POST /analyze   PDF bytes -> labelled feature rows and sections
+    """
+
+    server_version = "PDFStructureServer/1.0"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length)
+
+    def do_GET(self):
+
+        if self.path == "/health":
+            self.send_json(200, {"status": "ok"})
+        elif self.path == "/stats":
+            cascade = self.server.classifier.cascade
+            self.send_json(200, {
+                "batcher": self.server.batcher.stats(),
+                "cascade": cascade.stats() if cascade is not None else None,
+                "latency": self.server.latency.summary(),
+            })
+        else:
+            self.send_json(404, {"error": f"Unknown path: {self.path}"})
+
+    def do_POST(self):
+
+        start = time.perf_counter()
+
+        try:
+            if self.path == "/classify":
+                payload = self.classify(json.loads(self.read_body()))
+            elif self.path == "/analyze":
+                payload = self.analyze(self.read_body())
+            else:
+                self.send_json(404, {"error": f"Unknown path: {self.path}"})
+                return
+        except (ValueError, KeyError, TypeError) as e:
+            self.send_json(400, {"error": f"{type(e).__name__}: {e}"})
+            return
+        except Exception as e:
+            self.send_json(500, {"error": f"{type(e).__name__}: {e}"})
+            return
+
+        self.server.latency.record(self.path, time.perf_counter() - start)
+        self.send_json(200, payload)
+
+    def predict(self, rows):
+        classifier = self.server.classifier
+
+        features = classifier.rows_matrix(rows)
+        type_codes = row_type_codes(rows) if classifier.cascade is not None else None
+        return self.server.batcher.submit(features, type_codes).result()
+
+    def classify(self, data):
+        rows = data["rows"] if isinstance(data, dict) else data
+        return {"labels": self.predict(rows)}
+
+    def analyze(self, pdf_bytes):
+        if not pdf_bytes.startswith(b"%PDF"):
+            raise ValueError("Request body is not a PDF")
+
+        # Tables go to one folder per PDF content, like the shared image
+        # store: the folders are part of the extraction cache key, so a
+        # per-request folder would make every request a cache miss
+        table_folder = os.path.join(
+            self.server.output_dir, "tables", hashlib.sha256(pdf_bytes).hexdigest()[:32]
+        )
+
+        # The upload lives only as long as the request
+        with tempfile.TemporaryDirectory() as request_dir:
+            pdf_path = os.path.join(request_dir, "document.pdf")
+            with open(pdf_path, "wb") as f:
+                f.write(pdf_bytes)
+
+            pipeline = PDFPipeline(
+                pdf_path,
+                output_path=os.path.join(request_dir, "features.json"),
+                image_folder=os.path.join(self.server.output_dir, "images"),
+                table_folder=table_folder,
+                cache_dir=self.server.cache_dir,
+                image_mode=self.server.image_mode,
+            )
+
+            # PyMuPDF is not thread-safe: one extraction at a time
+            with self.server.extract_lock:
+                features = pipeline.extract_features()
+
+        for row, label in zip(features, self.predict(features)):
+            row["predicted_label"] = label
+
+        return {
+            "table_folder": table_folder,
+            "features": features,
+            "sections": build_sections(features),
+        }
+
+
+class InferenceServer(ThreadingHTTPServer):
+    """
+    Long-running local HTTP server that keeps the extraction pipeline
+    imports and the model resident, so callers pay neither interpreter
+    startup nor model unpickling per request.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=8765,
+        model_dir="models",
+        output_dir="data/server",
+        cache_dir=None,
+        image_mode="metadata",
+        max_batch_rows=8192,
+        max_wait_ms=5.0,
+        verbose=False
+    ):
+        super().__init__((host, port), InferenceHandler)
+
+        self.classifier = Classifier(model_dir)
+        self.batcher = MicroBatcher(self.classifier, max_batch_rows, max_wait_ms)
+        self.extract_lock = threading.Lock()
+        self.latency = LatencyStats()
+
+        self.output_dir = output_dir
+        self.cache_dir = cache_dir
+        self.image_mode = image_mode
+        self.verbose = verbose
+
+        os.makedirs(output_dir, exist_ok=True)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def main():
+
+    parser = argparse.ArgumentParser(
+        prog="python -m app.server",
+        description="Serve PDF structure analysis over local HTTP."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--model-dir", default="models")
+    parser.add_argument("--output-dir", default="data/server",
+                        help="Tables per PDF content and the shared image store")
+    parser.add_argument("--cache-dir", default=None)
+    parser.add_argument("--image-mode", choices=["full", "metadata", "deferred", "async"],
+                        default="metadata")
+    parser.add_argument("--max-batch-rows", type=int, default=8192)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0,
+                        help="How long a batch waits for more requests")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    server = InferenceServer(
+        args.host,
+        args.port,
+        model_dir=args.model_dir,
+        output_dir=args.output_dir,
+        cache_dir=args.cache_dir,
+        image_mode=args.image_mode,
+        max_batch_rows=args.max_batch_rows,
+        max_wait_ms=args.max_wait_ms,
+        verbose=args.verbose
+    )
+
+    print(f"Serving on {server.url} (model: {args.model_dir})")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
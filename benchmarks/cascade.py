@@ -0,0 +1,70 @@
+"""
+Fraction of rows handled at each cascade stage (type, first stage, full
+model), accuracy and end-to-end predict latency of the cascade against
+the full model alone, on the held-out split of src/utils.split_data.
+
+    python3 -m benchmarks.cascade --model-dir models
+"""
+import argparse
+import sys
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+from app.models.cascade import evaluate, type_codes_from_features
+from app.models.classifier import Classifier
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model-dir", default="models")
+    parser.add_argument("--dataset", default="pdf_featured_processed_dataset",
+                        help="Dataset name under data/processed")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore", UserWarning)
+
+    sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+    from utils import load_data, split_data
+
+    classifier = Classifier(args.model_dir)
+    if classifier.cascade is None:
+        print(f"{args.model_dir} has no cascade.json (or no exported forest); run src/train.py")
+        return
+
+    # Same split as src/train.py
+    _, X_test, _, y_test = split_data(load_data(args.dataset), target_column="label")
+    X_test = X_test[classifier.feature_columns]
+
+    features = X_test.to_numpy(dtype=np.float32)
+    type_codes = type_codes_from_features(features, X_test.columns)
+    labels = np.asarray(y_test, dtype=object)
+
+    print(f"Cascade: first {classifier.cascade.first_stage_trees} trees, "
+          f"threshold {classifier.cascade.threshold}")
+    print(f"{'rows':>7} {'type':>7} {'first':>7} {'full':>7} {'full acc':>9} "
+          f"{'casc acc':>9} {'full ms':>9} {'casc ms':>9}")
+
+    sizes = [size for size in (1, 100, 1000) if size < len(features)] + [len(features)]
+
+    for size in sizes:
+        result = evaluate(
+            classifier.cascade,
+            classifier.predict_full,
+            features[:size],
+            type_codes[:size],
+            labels[:size],
+            repeat=args.repeat
+        )
+        fractions = result["stage_fractions"]
+
+        print(f"{size:>7} {fractions['type']:>7.1%} {fractions['first_stage']:>7.1%} "
+              f"{fractions['full']:>7.1%} {result['full_accuracy']:>9.4f} "
+              f"{result['cascade_accuracy']:>9.4f} {result['full_ms']:>9.2f} {result['cascade_ms']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
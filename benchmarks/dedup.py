@@ -0,0 +1,95 @@
+"""
+Duplicate feature rows in the processed dataset: how many held-out rows
+have an exact copy in the training rows with the former random row split
+and with the document-grouped split of src/utils.split_data, how many
+training rows compaction (within each document) removes per label, and
+forest fit time and held-out accuracy on all training rows versus the
+weighted unique rows.
+
+    python3 -m benchmarks.dedup --trees 300
+"""
+import argparse
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import train_test_split
+
+
+def leaked(X_train, y_train, X_test, y_test, row_hashes):
+    """
+    Fraction of held-out rows with an identical (features, label) row
+    in the training rows.
+    """
+    return float(np.isin(row_hashes(X_test, y_test), row_hashes(X_train, y_train)).mean())
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", default="pdf_featured_processed_dataset",
+                        help="Dataset name under data/processed")
+    parser.add_argument("--trees", type=int, default=300)
+    parser.add_argument("--max-depth", type=int, default=8)
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore", UserWarning)
+
+    sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+    from utils import GROUP_COLUMN, compact_rows, load_data, row_hashes, split_data
+
+    df = load_data(args.dataset)
+    documents = df[GROUP_COLUMN].nunique() if GROUP_COLUMN in df.columns else 0
+    print(f"{len(df)} rows, {documents or 'no'} documents")
+
+    # Split as src/utils.split_data did before grouping
+    X = df.drop(columns=[col for col in ("label", GROUP_COLUMN) if col in df.columns])
+    X_train, X_test, y_train, y_test = train_test_split(X, df["label"], test_size=0.2, random_state=42)
+    random_leak = leaked(X_train, y_train, X_test, y_test, row_hashes)
+
+    X_train, X_test, y_train, y_test = split_data(df, target_column="label")
+    grouped_leak = leaked(X_train, y_train, X_test, y_test, row_hashes)
+
+    print(f"Held-out rows with a copy in training: random split {random_leak:.1%}, "
+          f"grouped split {grouped_leak:.1%}")
+
+    # Within documents, as src/train.py compacts
+    groups = df.loc[X_train.index, GROUP_COLUMN] if GROUP_COLUMN in df.columns else None
+    X_unique, y_unique, weights = compact_rows(X_train, y_train, groups)
+
+    removed = pd.DataFrame({
+        "rows": y_train.value_counts(),
+        "unique": y_unique.value_counts(),
+    }).fillna(0).astype(int)
+    removed["removed"] = 1 - removed["unique"] / removed["rows"]
+
+    print(f"\nTraining rows: {len(X_train)} -> {len(X_unique)} "
+          f"({1 - len(X_unique) / len(X_train):.1%} removed)")
+    print(removed.to_string(formatters={"removed": "{:.1%}".format}))
+
+    print(f"\n{'training set':<22} {'rows':>8} {'fit s':>8} {'accuracy':>9}")
+
+    # Leaves of 10 rows; on the unique rows 10 copies, as src/train.py
+    # searches the leaf size as a weight fraction
+    for name, (X_fit, y_fit, sample_weight, leaf) in [
+        ("all rows", (X_train, y_train, None, {"min_samples_split": 20, "min_samples_leaf": 10})),
+        ("unique, weighted", (X_unique, y_unique, weights, {"min_weight_fraction_leaf": 10 / len(X_train)})),
+    ]:
+        model = RandomForestClassifier(
+            n_estimators=args.trees, max_depth=args.max_depth, random_state=42, **leaf
+        )
+
+        start = time.perf_counter()
+        model.fit(X_fit, y_fit, sample_weight=sample_weight)
+        seconds = time.perf_counter() - start
+
+        accuracy = float(np.mean(model.predict(X_test) == y_test.to_numpy()))
+        print(f"{name:<22} {len(X_fit):>8} {seconds:>8.2f} {accuracy:>9.4f}")
+
+
+if __name__ == "__main__":
+    main()
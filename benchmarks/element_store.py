@@ -0,0 +1,175 @@
+"""
+Memory per element and end-to-end time, layout elements -> model input
+matrix, for the feature row dicts + DataFrame path (FeatureExtractor.extract
+then pd.DataFrame as src/predict.py did) versus the columnar ElementStore
+(FeatureExtractor.extract_store then ElementStore.matrix).
+
+    python3 -m benchmarks.element_store --elements 100000
+    python3 -m benchmarks.element_store --features data/testing/demo_testing.json
+"""
+import argparse
+import gc
+import json
+import random
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from app.features.feature_extractor import FeatureExtractor
+from app.features.element_store import ElementStore
+
+
+# Model inputs: feature rows minus the columns data_preprocessing.py drops
+MODEL_COLUMNS = [
+    "font_size", "font_size_relative", "is_bold", "uppercase_ratio",
+    "text_length", "digit_ratio", "punctuation_ratio", "ends_with_period",
+    "title_case_ratio", "contains_colon", "word_count", "y_position",
+    "block_width", "image_area", "table_rows", "table_columns",
+]
+
+WORDS = ["Section", "results", "the", "of", "TABLE", "2024", "Fig.", "were", "see:"]
+
+
+def synthetic_elements(count, seed=0):
+    """
+    Layout elements shaped like the extractors' output: mostly Text,
+    with some Images and Tables, in page order.
+    """
+    random.seed(seed)
+    elements = []
+
+    for i in range(count):
+        page_number = i // 50 + 1
+        y_position = (i % 50) * 15.0 + random.random()
+        kind = random.random()
+
+        if kind < 0.9:
+            content = " ".join(random.choices(WORDS, k=random.randint(1, 12)))
+            elements.append({
+                "type": "Text",
+                "page_number": page_number,
+                "content": content,
+                "font_size": random.choice([9.0, 10.5, 12.0, 16.0]),
+                "is_bold": random.randint(0, 1),
+                "y_position": y_position,
+                "block_width": random.uniform(100, 500),
+                "digit_ratio": random.random() * 0.2,
+                "punctuation_ratio": random.random() * 0.1,
+                "ends_with_period": random.randint(0, 1),
+                "title_case_ratio": random.random(),
+                "contains_colon": random.randint(0, 1),
+                "word_count": len(content.split()),
+            })
+        elif kind < 0.95:
+            elements.append({
+                "type": "Image",
+                "page_number": page_number,
+                "content": f"data/output/images/{i}.png",
+                "y_position": y_position,
+                "width": random.uniform(50, 400),
+                "area": random.uniform(2500, 160000),
+                "aspect_ratio": random.uniform(0.5, 2.0),
+            })
+        else:
+            elements.append({
+                "type": "Table",
+                "page_number": page_number,
+                "content": "a,b\n1,2",
+                "y_position": y_position,
+                "width": random.uniform(200, 500),
+                "rows": random.randint(2, 30),
+                "columns": random.randint(2, 8),
+            })
+
+    return elements
+
+
+def rows_to_matrix(elements):
+    rows = FeatureExtractor(elements).extract()
+
+    df = pd.DataFrame(rows)
+    for col in MODEL_COLUMNS:
+        if col not in df.columns:
+            df[col] = 0
+
+    return rows, df, np.ascontiguousarray(df[MODEL_COLUMNS].to_numpy(dtype=np.float64))
+
+
+def store_to_matrix(elements):
+    store = FeatureExtractor(elements).extract_store()
+    return store, store.matrix(MODEL_COLUMNS)
+
+
+def timed(function, elements, repeat):
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = function(elements)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best, result
+
+
+def retained_bytes(function, elements):
+    """
+    Bytes still allocated after function() returns, i.e. what holding
+    its result costs.
+    """
+    gc.collect()
+    tracemalloc.start()
+    result = function(elements)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current, peak
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--elements", type=int, default=100000)
+    parser.add_argument("--features", default=None,
+                        help="Also time loading this features.json into a DataFrame vs a store")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    elements = synthetic_elements(args.elements)
+    count = len(elements)
+
+    before_time, (rows, _, before_matrix) = timed(rows_to_matrix, elements, args.repeat)
+    after_time, (store, after_matrix) = timed(store_to_matrix, elements, args.repeat)
+
+    rows_bytes = retained_bytes(lambda e: FeatureExtractor(e).extract(), elements)
+    df_bytes = retained_bytes(rows_to_matrix, elements)
+    store_bytes = retained_bytes(store_to_matrix, elements)
+
+    print(f"Elements: {count}")
+    print(f"{'':>20} {'seconds':>9} {'bytes/element':>14} {'peak bytes/element':>19}")
+    print(f"{'dict rows':>20} {'':>9} {rows_bytes[0] / count:>14.0f} {rows_bytes[1] / count:>19.0f}")
+    print(f"{'dict rows + pandas':>20} {before_time:>9.3f} {df_bytes[0] / count:>14.0f} "
+          f"{df_bytes[1] / count:>19.0f}")
+    print(f"{'ElementStore':>20} {after_time:>9.3f} {store_bytes[0] / count:>14.0f} "
+          f"{store_bytes[1] / count:>19.0f}")
+    print(f"Speedup {before_time / after_time:.2f}x, "
+          f"store.nbytes() {store.nbytes() / count:.0f} bytes/element")
+
+    # The store keeps float32; compare at that precision
+    same = np.array_equal(before_matrix.astype(np.float32), after_matrix)
+    print(f"Same model input (float32): {same}")
+
+    if args.features:
+        with open(args.features, "r", encoding="utf-8") as f:
+            feature_rows = json.load(f)
+
+        df_time, _ = timed(lambda r: pd.DataFrame(r)[MODEL_COLUMNS].to_numpy(), feature_rows, args.repeat)
+        load_time, _ = timed(lambda r: ElementStore.from_rows(r).matrix(MODEL_COLUMNS), feature_rows, args.repeat)
+        print(f"{args.features}: DataFrame {df_time * 1000:.1f} ms, ElementStore {load_time * 1000:.1f} ms")
+
+    del rows
+
+
+if __name__ == "__main__":
+    main()
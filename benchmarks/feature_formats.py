@@ -0,0 +1,90 @@
+"""
+Write time, read time (file -> model input matrix) and file size of the
+feature output formats: the pretty-printed JSON PDFPipeline wrote so
+far, JSONL, the CSV of the training workflow, and the typed columnar
+Parquet, Arrow and .npz files.
+
+    python3 -m benchmarks.feature_formats --elements 100000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from app.features.feature_extractor import FeatureExtractor
+from app.features.element_store import ElementStore
+from app.features.feature_io import read_rows, read_store, write_features
+from benchmarks.element_store import MODEL_COLUMNS, synthetic_elements
+
+
+def write_jsonl(rows, path):
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+def write_csv(rows, path):
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+
+def read_text_matrix(path):
+    return ElementStore.from_rows(read_rows(path)).matrix(MODEL_COLUMNS)
+
+
+def read_csv_matrix(path):
+    df = pd.read_csv(path)
+    return df[MODEL_COLUMNS].to_numpy()
+
+
+def read_binary_matrix(path):
+    return read_store(path).matrix(MODEL_COLUMNS)
+
+
+FORMATS = [
+    ("json", ".json", lambda rows, path: write_features(rows, path, "json"), read_text_matrix),
+    ("jsonl", ".jsonl", write_jsonl, read_text_matrix),
+    ("csv", ".csv", write_csv, read_csv_matrix),
+    ("parquet", ".parquet", lambda rows, path: write_features(rows, path, "parquet"), read_binary_matrix),
+    ("arrow", ".arrow", lambda rows, path: write_features(rows, path, "arrow"), read_binary_matrix),
+    ("npz", ".npz", lambda rows, path: write_features(rows, path, "npz"), read_binary_matrix),
+]
+
+
+def best_of(function, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--elements", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rows = FeatureExtractor(synthetic_elements(args.elements)).extract()
+
+    print(f"Rows: {len(rows)}")
+    print(f"{'format':>8} {'write s':>9} {'read s':>9} {'size MB':>9}")
+
+    with tempfile.TemporaryDirectory() as folder:
+        for name, suffix, write, read in FORMATS:
+            path = os.path.join(folder, "features" + suffix)
+
+            write_seconds = best_of(lambda: write(rows, path), args.repeat)
+            read_seconds = best_of(lambda: read(path), args.repeat)
+            size = os.path.getsize(path)
+
+            print(f"{name:>8} {write_seconds:>9.3f} {read_seconds:>9.3f} {size / 1024 ** 2:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Parity and latency of the array forest (app/models/forest.py) against
+scikit-learn: scaler.transform + RandomForestClassifier.predict versus
+ArrayForest.predict, at 1, 100, 1k and 10k rows. Uses the model in
+--model-dir, or trains a forest shaped like src/train.py's (300 trees,
+depth <= 10) on synthetic rows when none is given.
+
+    python3 -m benchmarks.forest_predict --model-dir models
+    python3 -m benchmarks.forest_predict --trees 300 --max-depth 10
+"""
+import argparse
+import os
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import MinMaxScaler
+
+from app.features.feature_extractor import FeatureExtractor
+from app.models.forest import ArrayForest, export_forest
+from app.models.model_loader import load_model
+from benchmarks.element_store import MODEL_COLUMNS, synthetic_elements
+
+
+def synthetic_model(features, trees, max_depth, seed=0):
+    """
+    Forest trained on labels derived from the features plus noise, so
+    trees grow to a realistic depth.
+    """
+    rng = np.random.default_rng(seed)
+
+    labels = np.where(features[:, 0] > 14, "Heading", "Paragraph").astype(object)
+    labels[features[:, 3] > 0.5] = "Subheading"
+    labels[features[:, 13] > 0] = "Image"
+    labels[features[:, 14] > 0] = "Table"
+    noise = rng.random(len(labels)) < 0.1
+    labels[noise] = rng.choice(["Heading", "Paragraph", "Footer"], noise.sum())
+
+    scaler = MinMaxScaler()
+    scaled = scaler.fit_transform(pd.DataFrame(features, columns=MODEL_COLUMNS))
+
+    model = RandomForestClassifier(
+        n_estimators=trees,
+        max_depth=max_depth,
+        min_samples_split=20,
+        min_samples_leaf=10,
+        random_state=seed,
+        n_jobs=-1
+    )
+    model.fit(scaled, labels)
+    model.set_params(n_jobs=None)
+
+    return model, scaler
+
+
+def best_of(function, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model-dir", default=None)
+    parser.add_argument("--trees", type=int, default=300)
+    parser.add_argument("--max-depth", type=int, default=10, help="0 for unlimited")
+    parser.add_argument("--train-rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # scaler.transform() on a plain matrix warns about feature names
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+    store = FeatureExtractor(synthetic_elements(20000, seed=1)).extract_store()
+
+    if args.model_dir:
+        model, scaler = load_model(args.model_dir)
+    else:
+        train = FeatureExtractor(synthetic_elements(args.train_rows)).extract_store()
+        model, scaler = synthetic_model(
+            train.matrix(MODEL_COLUMNS), args.trees, args.max_depth or None
+        )
+
+    features = store.matrix(list(scaler.feature_names_in_))
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "forest.npz")
+        start = time.perf_counter()
+        export_forest(model, scaler, path)
+        export_seconds = time.perf_counter() - start
+        forest = ArrayForest.load(path)
+
+    print(f"Trees: {len(model.estimators_)}, nodes: {len(forest.feature)}, "
+          f"max depth: {forest.max_depth}, complete layout: {forest.complete}, "
+          f"export: {export_seconds:.2f}s")
+
+    # ---------------------------------------
+    # Parity
+    # ---------------------------------------
+
+    expected_proba = model.predict_proba(scaler.transform(features))
+    expected = model.predict(scaler.transform(features))
+
+    proba = forest.predict_proba(features)
+    labels = forest.predict(features)
+
+    print(f"Rows: {len(features)}, labels equal: {np.array_equal(labels, expected)}, "
+          f"proba equal: {np.array_equal(proba, expected_proba)}, "
+          f"max proba diff: {np.abs(proba - expected_proba).max():.2e}")
+
+    # ---------------------------------------
+    # Latency
+    # ---------------------------------------
+
+    print(f"{'rows':>7} {'sklearn ms':>11} {'forest ms':>10} {'speedup':>8}")
+
+    for rows in [1, 100, 1000, 10000]:
+        batch = features[:rows]
+
+        sklearn_seconds = best_of(lambda: model.predict(scaler.transform(batch)), args.repeat)
+        forest_seconds = best_of(lambda: forest.predict(batch), args.repeat)
+
+        print(f"{rows:>7} {sklearn_seconds * 1000:>11.2f} {forest_seconds * 1000:>10.2f} "
+              f"{sklearn_seconds / forest_seconds:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Microbenchmark: per-image page.get_image_bbox() versus one
+page.get_image_info(xrefs=True) call per page.
+
+Run from the repository root on a real PDF:
+
+    python3 -m benchmarks.image_geometry data/raw/sample.pdf
+
+or on a generated image-heavy PDF (N placements per page):
+
+    python3 -m benchmarks.image_geometry --synthetic 400
+"""
+import argparse
+import time
+
+import fitz
+
+from app.extractor.image_extractor import ImageExtractor
+
+
+def synthetic_document(images_per_page, pages=3, distinct_images=50):
+    """
+    Build an in-memory PDF whose pages are tiled with small images;
+    every distinct image is placed several times per page.
+    """
+    document = fitz.open()
+
+    pixmaps = []
+    for i in range(distinct_images):
+        pixmap = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 8, 8), False)
+        pixmap.set_rect(pixmap.irect, (i * 5 % 256, 80, 160))
+        pixmaps.append(pixmap.tobytes("png"))
+
+    for _ in range(pages):
+        page = document.new_page()
+        columns = 20
+        size = page.rect.width / columns
+        xrefs = {}
+
+        for n in range(images_per_page):
+            row, column = divmod(n, columns)
+            rect = fitz.Rect(column * size, row * size, (column + 1) * size, (row + 1) * size)
+            key = n % distinct_images
+
+            if key in xrefs:
+                page.insert_image(rect, xref=xrefs[key])
+            else:
+                xrefs[key] = page.insert_image(rect, stream=pixmaps[key])
+
+    return document
+
+
+def bbox_per_image(page):
+    return [page.get_image_bbox(img) for img in page.get_images(full=True)]
+
+
+def bbox_per_page(page):
+    page.get_images(full=True)
+    return ImageExtractor.image_placements(page)
+
+
+def timed(function, page, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function(page)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("pdf_path", nargs="?")
+    parser.add_argument("--synthetic", type=int, default=0,
+                        help="Generate pages with this many image placements")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10,
+                        help="Report the N most image-heavy pages")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        document = synthetic_document(args.synthetic)
+    elif args.pdf_path:
+        document = fitz.open(args.pdf_path)
+    else:
+        parser.error("give a PDF path or --synthetic N")
+
+    pages = sorted(
+        ((len(page.get_images(full=True)), page.number) for page in document),
+        reverse=True
+    )[:args.top]
+
+    print(f"{'page':>5} {'images':>7} {'placements':>11} "
+          f"{'get_image_bbox ms':>18} {'get_image_info ms':>18} {'speedup':>8}")
+
+    total_old = 0.0
+    total_new = 0.0
+
+    for image_count, page_number in pages:
+        if image_count == 0:
+            continue
+
+        page = document[page_number]
+        placements = sum(len(b) for b in ImageExtractor.image_placements(page).values())
+
+        old = timed(bbox_per_image, page, args.repeat)
+        new = timed(bbox_per_page, page, args.repeat)
+        total_old += old
+        total_new += new
+
+        print(f"{page_number + 1:>5} {image_count:>7} {placements:>11} "
+              f"{old * 1000:>18.2f} {new * 1000:>18.2f} {old / new if new else 0:>7.1f}x")
+
+    if total_new:
+        print(f"\nOverall speedup: {total_old / total_new:.1f}x")
+
+    document.close()
+
+
+if __name__ == "__main__":
+    main()
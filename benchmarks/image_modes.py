@@ -0,0 +1,65 @@
+"""
+Time ImageExtractor in each mode (full, metadata, deferred, async).
+
+Every mode writes into a fresh temporary image store, so "full" and
+"async" always pay for decoding and writing.
+
+    python3 -m benchmarks.image_modes data/raw/sample.pdf
+    python3 -m benchmarks.image_modes --synthetic 400
+"""
+import argparse
+import tempfile
+import time
+
+import fitz
+
+from app.extractor.image_extractor import ImageExtractor
+from benchmarks.image_geometry import synthetic_document
+
+
+def time_mode(document, mode, repeat):
+    timings = []
+
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as store:
+            extractor = ImageExtractor(document, output_folder=store, mode=mode)
+
+            start = time.perf_counter()
+            elements = extractor.extract()
+            extractor.close()
+            timings.append(time.perf_counter() - start)
+
+    return min(timings), len(elements)
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("pdf_path", nargs="?")
+    parser.add_argument("--synthetic", type=int, default=0,
+                        help="Generate pages with this many image placements")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        document = synthetic_document(args.synthetic, distinct_images=args.synthetic)
+    elif args.pdf_path:
+        document = fitz.open(args.pdf_path)
+    else:
+        parser.error("give a PDF path or --synthetic N")
+
+    baseline = None
+
+    print(f"{'mode':>9} {'elements':>9} {'seconds':>9} {'vs full':>8}")
+
+    for mode in ImageExtractor.MODES:
+        seconds, element_count = time_mode(document, mode, args.repeat)
+        baseline = baseline or seconds
+
+        print(f"{mode:>9} {element_count:>9} {seconds:>9.3f} {baseline / seconds:>7.1f}x")
+
+    document.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Local client for app.server: starts the server in this process on a
+free port, sends concurrent /classify requests (and optionally /analyze
+uploads) and prints throughput plus the server's queue, batching and
+latency statistics. No external services are involved.
+
+    python3 -m benchmarks.inference_server --model-dir models --clients 16
+    python3 -m benchmarks.inference_server --model-dir models --pdf data/raw/sample.pdf
+"""
+import argparse
+import json
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from app.features.feature_extractor import FeatureExtractor
+from app.server import InferenceServer
+from benchmarks.element_store import synthetic_elements
+
+
+def post(url, body, content_type):
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": content_type})
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def get(url):
+    with urllib.request.urlopen(url) as response:
+        return json.loads(response.read())
+
+
+def run_clients(server, rows, clients, requests_per_client):
+    body = json.dumps({"rows": rows}).encode("utf-8")
+
+    def client(_):
+        for _ in range(requests_per_client):
+            post(server.url + "/classify", body, "application/json")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        list(executor.map(client, range(clients)))
+    return time.perf_counter() - start
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model-dir", default="models")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=20, help="Requests per client")
+    parser.add_argument("--rows", type=int, default=300, help="Feature rows per request")
+    parser.add_argument("--pdf", default=None, help="Also upload this PDF to /analyze")
+    args = parser.parse_args()
+
+    rows = FeatureExtractor(synthetic_elements(args.rows)).extract()
+    total = args.clients * args.requests
+
+    print(f"{args.clients} clients x {args.requests} requests x {args.rows} rows")
+    print(f"{'max_wait_ms':>12} {'req/s':>9} {'batches':>8} {'req/batch':>10} "
+          f"{'p50 ms':>8} {'p99 ms':>8}")
+
+    # 0 ms: every request is predicted on its own, for comparison
+    for max_wait_ms in (0.0, 5.0):
+        with tempfile.TemporaryDirectory() as output_dir:
+            server = InferenceServer(
+                port=0, model_dir=args.model_dir, output_dir=output_dir,
+                max_wait_ms=max_wait_ms
+            )
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+
+            seconds = run_clients(server, rows, args.clients, args.requests)
+            stats = get(server.url + "/stats")
+
+            if args.pdf and max_wait_ms:
+                with open(args.pdf, "rb") as f:
+                    result = post(server.url + "/analyze", f.read(), "application/pdf")
+                print(f"/analyze: {len(result['features'])} rows, "
+                      f"{len(result['sections'])} sections")
+                stats = get(server.url + "/stats")
+
+            server.shutdown()
+            server.server_close()
+
+        latency = stats["latency"]["/classify"]
+        batcher = stats["batcher"]
+        print(f"{max_wait_ms:>12.1f} {total / seconds:>9.1f} {batcher['batches']:>8} "
+              f"{batcher['mean_requests_per_batch']:>10} {latency['p50_ms']:>8.2f} "
+              f"{latency['p99_ms']:>8.2f}")
+
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
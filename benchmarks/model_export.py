@@ -0,0 +1,162 @@
+"""
+Deployment points for the trained forest: the pickled model (joblib,
+with and without mmap_mode) against array forest exports, full and
+pruned (first N trees, capped depth). Each variant is loaded in a fresh
+interpreter, which reports load time, resident memory once it has predicted
+(private heap vs file-backed pages that other processes can share),
+predict latency and accuracy on the held-out split of src/utils.
+
+    python3 -m benchmarks.model_export --model-dir models --variants 100 50 :8 100:6
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+from app.models.forest import FOREST_FILE, ArrayForest, export_forest
+from app.models.model_loader import load_model
+
+
+CHILD = """
+import json, sys, time, warnings
+import numpy as np
+
+def rss():
+    with open("/proc/self/status") as f:
+        fields = dict(line.split(":", 1) for line in f)
+    return {key: int(fields[key].split()[0]) / 1024 for key in ("RssAnon", "RssFile")}
+
+def best_of(function, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+warnings.simplefilter("ignore")
+kind, model_dir, path, features_path, labels_path = sys.argv[1:6]
+features = np.load(features_path)
+labels = np.load(labels_path)
+
+if kind == "forest":
+    from app.models.forest import ArrayForest
+else:
+    import joblib
+    import sklearn.ensemble, sklearn.preprocessing  # noqa: F401
+
+before = rss()
+start = time.perf_counter()
+
+if kind == "forest":
+    forest = ArrayForest.load(path)
+    predict = forest.predict
+else:
+    model = joblib.load(model_dir + "/pdf_structure_analyze_model.pkl", mmap_mode="r" if kind == "mmap" else None)
+    scaler = joblib.load(model_dir + "/minmax_scaler.pkl")
+    predict = lambda x: model.predict(scaler.transform(x))
+
+load_seconds = time.perf_counter() - start
+
+result = {
+    "load_s": load_seconds,
+    "ms_1": best_of(lambda: predict(features[:1])) * 1000,
+    "ms_100": best_of(lambda: predict(features[:100])) * 1000,
+    "ms_all": best_of(lambda: predict(features), 2) * 1000,
+    "accuracy": float(np.mean(np.asarray(predict(features)).astype(str) == labels)),
+}
+
+# After predicting, so every mapped page of the model has been touched
+after = rss()
+result["anon_mb"] = after["RssAnon"] - before["RssAnon"]
+result["file_mb"] = after["RssFile"] - before["RssFile"]
+
+print(json.dumps(result))
+"""
+
+
+def parse_variant(text):
+    """
+    "100" -> 100 trees, ":8" -> depth 8, "100:6" -> both.
+    """
+    trees, _, depth = text.partition(":")
+    return int(trees) if trees else None, int(depth) if depth else None
+
+
+def run_child(kind, model_dir, path, features_path, labels_path):
+    env = dict(os.environ, PYTHONPATH=os.getcwd())
+    command = [sys.executable, "-W", "ignore", "-c", CHILD, kind, str(model_dir), str(path),
+               features_path, labels_path]
+    result = subprocess.run(command, env=env, check=True, capture_output=True, text=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-dir", default="models")
+    parser.add_argument("--dataset", default="pdf_featured_processed_dataset",
+                        help="Dataset name under data/processed")
+    parser.add_argument("--variants", nargs="*", default=["100", "50", ":8", "100:8", "50:6"],
+                        help="Pruned exports as TREES:DEPTH, either part optional")
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore", UserWarning)
+
+    sys.path.append(str(Path(__file__).resolve().parent.parent / "src"))
+    from utils import load_data, split_data
+
+    model, scaler = load_model(args.model_dir)
+    columns = list(scaler.feature_names_in_)
+
+    # Same split as src/train.py
+    _, X_test, _, y_test = split_data(load_data(args.dataset), target_column="label")
+
+    print(f"Model: {len(model.estimators_)} trees, max depth "
+          f"{max(estimator.tree_.max_depth for estimator in model.estimators_)}; "
+          f"{len(X_test)} held-out rows")
+    print(f"{'variant':<30} {'file MB':>8} {'load s':>7} {'heap MB':>8} {'shared MB':>10} "
+          f"{'1 row ms':>9} {'100 ms':>8} {'all ms':>8} {'accuracy':>9}")
+
+    with tempfile.TemporaryDirectory() as folder:
+        features_path = os.path.join(folder, "features.npy")
+        labels_path = os.path.join(folder, "labels.npy")
+        np.save(features_path, X_test[columns].to_numpy(dtype=np.float32))
+        np.save(labels_path, np.asarray(y_test).astype(str))
+
+        model_path = Path(args.model_dir) / "pdf_structure_analyze_model.pkl"
+        variants = [
+            ("pickle", "joblib", model_path),
+            ("pickle, mmap_mode=r", "mmap", model_path),
+        ]
+
+        for text in [""] + args.variants:
+            trees, depth = parse_variant(text)
+            path = Path(folder) / f"forest_{trees}_{depth}.npz"
+            export_forest(model, scaler, path, trees=trees, max_depth=depth)
+
+            forest = ArrayForest.load(path)
+            name = f"forest {len(forest.roots)}/{len(model.estimators_)} trees, depth {forest.max_depth}"
+            variants.append((name, "forest", path))
+
+        for name, kind, path in variants:
+            result = run_child(kind, args.model_dir, path, features_path, labels_path)
+
+            print(f"{name:<30} {path.stat().st_size / 1024 ** 2:>8.1f} {result['load_s']:>7.3f} "
+                  f"{result['anon_mb']:>8.1f} {result['file_mb']:>10.1f} {result['ms_1']:>9.2f} "
+                  f"{result['ms_100']:>8.2f} {result['ms_all']:>8.1f} {result['accuracy']:>9.4f}")
+
+    print(f"\nheap MB is private to each process (including predict buffers); shared MB is "
+          f"mapped from the file and shared between processes. Deploy a variant with python -m app.models.forest "
+          f"--trees N --max-depth D (writes {FOREST_FILE}).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Per-call and cold-start cost of predicting a small document: the
+original src/predict.py flow (pandas DataFrame, missing columns added
+one by one, scaled DataFrame, model.predict) versus Classifier with
+models/feature_schema.json and the exported array forest (NumPy input
+matrix, no pandas or scikit-learn imports).
+
+    python3 -m benchmarks.predict_overhead --model-dir models
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+from app.features.feature_extractor import FeatureExtractor
+from app.models.classifier import Classifier
+from app.models.model_loader import load_model
+from benchmarks.element_store import synthetic_elements
+
+
+LEGACY = """
+import json, sys, joblib
+import pandas as pd
+model = joblib.load(sys.argv[1] + "/pdf_structure_analyze_model.pkl")
+scaler = joblib.load(sys.argv[1] + "/minmax_scaler.pkl")
+with open(sys.argv[2]) as f:
+    data = json.load(f)
+df = pd.DataFrame(data)
+expected_columns = list(scaler.feature_names_in_)
+for col in expected_columns:
+    if col not in df.columns:
+        df[col] = 0
+scaled = pd.DataFrame(scaler.transform(df[expected_columns]), columns=expected_columns)
+predictions = model.predict(scaled)
+for i in range(len(data)):
+    data[i]["predicted_label"] = predictions[i]
+"""
+
+SCHEMA = """
+import json, sys
+from app.models.classifier import Classifier
+classifier = Classifier(sys.argv[1])
+with open(sys.argv[2]) as f:
+    data = json.load(f)
+classifier.classify(data)
+"""
+
+
+def legacy_predict(model, scaler, data):
+    import pandas as pd
+
+    df = pd.DataFrame(data)
+    expected_columns = list(scaler.feature_names_in_)
+    for col in expected_columns:
+        if col not in df.columns:
+            df[col] = 0
+    scaled = pd.DataFrame(scaler.transform(df[expected_columns]), columns=expected_columns)
+    return model.predict(scaled).tolist()
+
+
+def best_of(function, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def cold_start(script, model_dir, path, repeat):
+    env = dict(os.environ, PYTHONPATH=os.getcwd())
+    command = [sys.executable, "-W", "ignore", "-c", script, model_dir, path]
+    return best_of(lambda: subprocess.run(command, env=env, check=True), repeat)
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model-dir", default="models")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # The original flow passes named and unnamed matrices to sklearn
+    warnings.simplefilter("ignore", UserWarning)
+
+    classifier = Classifier(args.model_dir)
+    if classifier.schema is None or classifier.forest is None:
+        print(f"Note: {args.model_dir} has no feature schema or array forest; "
+              f"re-run src/train.py or python -m app.models.forest")
+
+    model, scaler = load_model(args.model_dir)
+
+    print(f"{'rows':>6} {'pandas ms':>10} {'schema ms':>10} {'speedup':>8}")
+
+    for count in [1, 50, 300]:
+        data = FeatureExtractor(synthetic_elements(count)).extract()
+
+        if classifier.predict_rows(data) != legacy_predict(model, scaler, data):
+            print(f"{count} rows: predictions differ")
+
+        legacy_seconds = best_of(lambda: legacy_predict(model, scaler, data), args.repeat)
+        schema_seconds = best_of(lambda: classifier.predict_rows(data), args.repeat)
+
+        print(f"{count:>6} {legacy_seconds * 1000:>10.2f} {schema_seconds * 1000:>10.2f} "
+              f"{legacy_seconds / schema_seconds:>7.1f}x")
+
+    # ---------------------------------------
+    # Fresh interpreter: imports + model load + predict
+    # ---------------------------------------
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "features.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(FeatureExtractor(synthetic_elements(300)).extract(), f)
+
+        legacy_seconds = cold_start(LEGACY, args.model_dir, path, args.repeat)
+        schema_seconds = cold_start(SCHEMA, args.model_dir, path, args.repeat)
+
+    print(f"Cold start, 300 rows: pandas {legacy_seconds:.2f}s, schema {schema_seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Compare the PyMuPDF and Camelot table backends page by page.
+
+Run from the repository root:
+
+    python3 -m benchmarks.table_backends data/raw/sample.pdf
+"""
+import argparse
+from statistics import mean, median
+
+from app.extractor.pdf_loader import PDFLoader
+from app.extractor.table_extractor import TableExtractor
+from app.extractor.table_backends import compare_backends
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("pdf_path")
+    parser.add_argument(
+        "--all-pages",
+        action="store_true",
+        help="Benchmark every page instead of only prefilter candidates"
+    )
+    args = parser.parse_args()
+
+    loader = PDFLoader(args.pdf_path)
+    document = loader.load()
+
+    pages = None
+    if not args.all_pages:
+        pages = TableExtractor(
+            args.pdf_path, document=document, backend="pymupdf"
+        ).candidate_pages()
+
+    results = compare_backends(document, args.pdf_path, pages)
+    loader.close()
+
+    if not results:
+        print("No pages to compare.")
+        return
+
+    print(f"{'page':>5} {'pymupdf ms':>11} {'camelot ms':>11} "
+          f"{'fast tbl':>9} {'camelot tbl':>12} {'matched':>8} {'same shape':>11}")
+
+    for r in results:
+        print(f"{r['page_number']:>5} {r['pymupdf_seconds'] * 1000:>11.1f} "
+              f"{r['camelot_seconds'] * 1000:>11.1f} {r['pymupdf_tables']:>9} "
+              f"{r['camelot_tables']:>12} {r['matched']:>8} {r['same_shape']:>11}")
+
+    fast = [r["pymupdf_seconds"] * 1000 for r in results]
+    slow = [r["camelot_seconds"] * 1000 for r in results]
+    camelot_tables = sum(r["camelot_tables"] for r in results)
+    matched = sum(r["matched"] for r in results)
+    same_shape = sum(r["same_shape"] for r in results)
+
+    print()
+    print(f"Pages:             {len(results)}")
+    print(f"PyMuPDF ms/page:   mean {mean(fast):.1f}, median {median(fast):.1f}")
+    print(f"Camelot ms/page:   mean {mean(slow):.1f}, median {median(slow):.1f}")
+    print(f"Speedup:           {sum(slow) / sum(fast) if sum(fast) else 0:.1f}x")
+    print(f"Agreement:         {matched}/{camelot_tables} Camelot tables matched "
+          f"(IoU >= 0.5), {same_shape} with identical rows x columns")
+
+
+if __name__ == "__main__":
+    main()
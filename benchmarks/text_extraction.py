@@ -0,0 +1,118 @@
+"""
+Before/after benchmark of TextExtractor.extract_page: the previous
+two-pass walk over get_text("dict") (image blocks included) versus the
+current single pass over text-only output.
+
+    python3 -m benchmarks.text_extraction data/raw/sample.pdf
+"""
+import argparse
+import time
+import tracemalloc
+from statistics import mean
+
+import fitz
+
+from app.extractor.text_extractor import TextExtractor
+from app.features.feature_utils import is_bold
+
+
+def legacy_extract_page(document, page_number):
+    """
+    The extraction as it was before the single-pass rewrite.
+    """
+    text_elements = []
+    page_dict = document[page_number].get_text("dict")
+
+    page_font_sizes = []
+    for block in page_dict["blocks"]:
+        if "lines" not in block:
+            continue
+        for line in block["lines"]:
+            for span in line["spans"]:
+                page_font_sizes.append(span["size"])
+
+    if not page_font_sizes:
+        return text_elements
+
+    avg_font_size = mean(page_font_sizes)
+
+    for block in page_dict["blocks"]:
+        if "lines" not in block:
+            continue
+        block_bbox = block["bbox"]
+        for line in block["lines"]:
+            spans = line["spans"]
+            line_text = " ".join(
+                span["text"].strip() for span in spans if span["text"].strip()
+            ).strip()
+            if not line_text:
+                continue
+            max_font_size = max(span["size"] for span in spans)
+            x0, y0, x1, y1 = spans[0]["bbox"]
+            text_elements.append({
+                "type": "Text",
+                "page_number": page_number + 1,
+                "content": line_text,
+                "font_size": max_font_size,
+                "font_size_relative": max_font_size / avg_font_size,
+                "is_bold": max(is_bold(span["font"]) for span in spans),
+                "y_position": y0,
+                "block_width": block_bbox[2] - block_bbox[0],
+                "bbox": [x0, y0, x1, y1],
+                **TextExtractor.compute_text_features(line_text)
+            })
+
+    return text_elements
+
+
+def measure(function, page_count):
+    """
+    Return (seconds per page, mean peak traced bytes per page, elements).
+    """
+    elements = []
+    start = time.perf_counter()
+
+    for page_number in range(page_count):
+        elements.extend(function(page_number))
+
+    seconds = time.perf_counter() - start
+
+    # Separate pass, so tracing overhead does not distort the timing
+    peaks = []
+    for page_number in range(page_count):
+        tracemalloc.start()
+        function(page_number)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    return seconds / page_count, mean(peaks), elements
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("pdf_path")
+    args = parser.parse_args()
+
+    document = fitz.open(args.pdf_path)
+    page_count = len(document)
+    extractor = TextExtractor(document)
+
+    before_time, before_peak, before = measure(
+        lambda p: legacy_extract_page(document, p), page_count
+    )
+    after_time, after_peak, after = measure(extractor.extract_page, page_count)
+
+    document.close()
+
+    print(f"Pages: {page_count}")
+    print(f"{'':>8} {'ms/page':>9} {'peak KB/page':>13}")
+    print(f"{'before':>8} {before_time * 1000:>9.2f} {before_peak / 1024:>13.1f}")
+    print(f"{'after':>8} {after_time * 1000:>9.2f} {after_peak / 1024:>13.1f}")
+    print(f"Speedup {before_time / after_time:.2f}x, "
+          f"peak memory {before_peak / after_peak:.1f}x lower")
+    print(f"Identical output: {before == after}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Parity check and throughput benchmark of the vectorized text features
+(app/features/batch_features.py) against the per-line functions they
+replace: TextExtractor.compute_text_features() and the uppercase_ratio /
+text_length / contains_numbering helpers in feature_utils.
+
+    python3 -m benchmarks.text_features --lines 100000
+    python3 -m benchmarks.text_features --pdf data/raw/sample.pdf
+
+Exits with status 1 if any output differs.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+
+from app.extractor.text_extractor import TextExtractor
+from app.features.feature_utils import uppercase_ratio, contains_numbering, text_length
+from app.features.batch_features import (
+    compute_text_features_batch,
+    layout_text_features_batch,
+)
+
+
+# Edge cases: empty and blank lines, numbering, titlecase digraphs,
+# non-ASCII digits and case, non-breaking and other Unicode whitespace
+EDGE_CASES = [
+    "", "   ", "\t\n", "1. Introduction", "2) Scope", "3.2 Methods", "IV. Results",
+    "A) Appendix", "Hello World.", "ALL CAPS:", "ǅemal ǈubljana", "Ⓐ circled",
+    "x² + y²", "٣. Arabic-Indic", "Straße İstanbul ΣΊΣΥΦΟΣ", " padded ",
+    "ﬁnal ligature", "a.b,c;d:e!f?", "123", "O'Neil-Smith Jr.",
+]
+
+WORDS = [
+    "the", "Table", "of", "CONTENTS", "Section", "results", "were", "2024",
+    "Fig.", "3.1", "(see", "below):", "Überblick", "résumé", "IEEE", "p<0.05;",
+]
+
+
+def synthetic_lines(count, seed=0):
+    random.seed(seed)
+
+    lines = list(EDGE_CASES)
+    while len(lines) < count:
+        words = random.choices(WORDS, k=random.randint(1, 14))
+        prefix = random.choice(["", "", "", "1. ", "2.3 ", "A) ", "IV. "])
+        suffix = random.choice(["", "", ".", ":"])
+        lines.append(prefix + " ".join(words) + suffix)
+
+    return lines[:count]
+
+
+def pdf_lines(pdf_path):
+    import fitz
+
+    document = fitz.open(pdf_path)
+    extractor = TextExtractor(document)
+    lines = [element["content"] for element in extractor.extract()]
+    document.close()
+
+    return lines
+
+
+def per_line(lines):
+    extractor_features = [TextExtractor.compute_text_features(t) for t in lines]
+    layout_features = {
+        "uppercase_ratio": [uppercase_ratio(t) for t in lines],
+        "text_length": [text_length(t) for t in lines],
+        "contains_numbering": [contains_numbering(t) for t in lines],
+    }
+    return extractor_features, layout_features
+
+
+def batched(lines):
+    return compute_text_features_batch(lines), layout_text_features_batch(lines)
+
+
+def best_of(function, lines, repeat):
+    """
+    Return (fastest wall time, result) over repeat runs.
+    """
+    best = None
+    result = None
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(lines)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+
+    return best, result
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=100000)
+    parser.add_argument("--pdf", default=None, help="Use the text lines of this PDF")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    lines = pdf_lines(args.pdf) if args.pdf else synthetic_lines(args.lines)
+
+    before_time, before = best_of(per_line, lines, args.repeat)
+    after_time, after = best_of(batched, lines, args.repeat)
+
+    # json.dumps also catches int/float differences (0 vs 0.0)
+    identical = json.dumps(before) == json.dumps(after)
+
+    print(f"Lines: {len(lines)}")
+    print(f"{'':>10} {'seconds':>9} {'lines/s':>12}")
+    print(f"{'per-line':>10} {before_time:>9.3f} {len(lines) / before_time:>12,.0f}")
+    print(f"{'batched':>10} {after_time:>9.3f} {len(lines) / after_time:>12,.0f}")
+    print(f"Speedup {before_time / after_time:.2f}x")
+    print(f"Identical output: {identical}")
+
+    if not identical:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from sklearn.preprocessing import MinMaxScaler
+
+from utils import DROP_COLUMNS, GROUP_COLUMN, TABLE_SUFFIXES, peak_memory_mb
+
+# ---------------------------------------
+# Paths
+# ---------------------------------------
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from app.features.feature_io import frame_columns, iter_chunks, store_frame  # noqa: E402
+
+LABELLED_DIR = BASE_DIR / "data" / "labelled"
+OUTPUT_PATH = BASE_DIR / "data" / "processed" / "pdf_featured_processed_dataset.arrow"
+
+FEATURE_SUFFIXES = (".json", ".jsonl", ".parquet", ".arrow", ".npz")
+
+# Processed columns in data_preprocessing.py order; Image rows add
+# image_aspect_ratio, 0 for the other rows as after its fillna(0). The
+# document column (the source file) is appended when writing
+OUTPUT_COLUMNS = [col for col in frame_columns(True) if col not in DROP_COLUMNS]
+FEATURE_COLUMNS = [col for col in OUTPUT_COLUMNS if col != "label"]
+
+# ---------------------------------------
+# Arguments
+# ---------------------------------------
+
+parser = argparse.ArgumentParser(
+    description="Streaming data_preprocessing.py for corpora larger than memory: "
+                "labelled rows are read from many per-document feature files chunk "
+                "by chunk, the MinMax scaler is fitted with partial_fit and the "
+                "processed dataset is written chunk by chunk."
+)
+parser.add_argument("inputs", nargs="*", default=[LABELLED_DIR],
+                    help="Feature files or folders searched recursively (e.g. a batch --output-dir)")
+parser.add_argument("--pattern", default="features*",
+                    help="File name pattern inside folders")
+parser.add_argument("--output", default=OUTPUT_PATH, help=".arrow or .parquet")
+parser.add_argument("--chunk-rows", type=int, default=100000)
+args = parser.parse_args()
+
+output_path = Path(args.output)
+output_path.parent.mkdir(parents=True, exist_ok=True)
+
+if output_path.suffix not in (".arrow", ".parquet"):
+    sys.exit(f"Output must be .arrow or .parquet: {output_path}")
+
+# load_data() takes the first of TABLE_SUFFIXES that exists
+for suffix in TABLE_SUFFIXES[:TABLE_SUFFIXES.index(output_path.suffix)]:
+    if output_path.with_suffix(suffix).exists():
+        print(f"Warning: {output_path.with_suffix(suffix)} exists and is loaded before {output_path}")
+
+# ---------------------------------------
+# Input Files
+# ---------------------------------------
+
+# (path, document id): the path inside the folder it was found in
+paths = []
+for item in map(Path, args.inputs):
+    if item.is_dir():
+        paths.extend(
+            (path, path.relative_to(item).with_suffix("").as_posix())
+            for path in sorted(item.rglob(args.pattern)) if path.suffix in FEATURE_SUFFIXES
+        )
+    else:
+        paths.append((item, item.with_suffix("").name))
+
+if not paths:
+    sys.exit(f"No feature files matching {args.pattern} in {', '.join(map(str, args.inputs))}")
+
+print(f"{len(paths)} feature files")
+
+
+def labelled_chunks():
+    """
+    Labelled rows of every file as DataFrames of up to --chunk-rows
+    rows with OUTPUT_COLUMNS (unlabelled rows dropped, NaN and absent
+    features 0, features as float64), and whether the chunk had Image
+    rows. The document column names the file.
+    """
+    for path, document in paths:
+        for chunk in iter_chunks(path, args.chunk_rows):
+            frame = pd.DataFrame(chunk) if isinstance(chunk, list) else store_frame(chunk)
+
+            if "label" not in frame.columns:
+                continue
+
+            frame = frame[frame["label"].notna()]
+            if frame.empty:
+                continue
+
+            has_images = "image_aspect_ratio" in frame.columns
+
+            frame = frame.reindex(columns=OUTPUT_COLUMNS)
+            frame[FEATURE_COLUMNS] = frame[FEATURE_COLUMNS].astype(np.float64).fillna(0)
+
+            frame[GROUP_COLUMN] = document
+
+            yield frame, has_images
+
+
+# ---------------------------------------
+# Pass 1: Fit Scaler Incrementally
+# ---------------------------------------
+
+start = time.time()
+
+scaler = MinMaxScaler()
+class_counts = pd.Series(dtype="int64")
+has_images = False
+
+for frame, chunk_has_images in labelled_chunks():
+    scaler.partial_fit(frame[FEATURE_COLUMNS])
+    class_counts = class_counts.add(frame["label"].value_counts(), fill_value=0)
+    has_images = has_images or chunk_has_images
+
+fit_time = time.time() - start
+
+if class_counts.empty:
+    sys.exit("No labelled rows found")
+
+print(f"Scaler fitted on {int(class_counts.sum())} labelled rows ({fit_time:.2f}s)")
+print("\nClass Distribution:")
+print(class_counts.astype(int).sort_values(ascending=False).to_string())
+
+# Without Image rows the column is left out, as in data_preprocessing.py
+columns = [col for col in OUTPUT_COLUMNS if has_images or col != "image_aspect_ratio"] + [GROUP_COLUMN]
+
+# ---------------------------------------
+# Pass 2: Scale & Write Chunk by Chunk
+# ---------------------------------------
+
+start = time.time()
+
+schema = pa.schema([
+    (col, pa.string() if col in ("label", GROUP_COLUMN) else pa.float64()) for col in columns
+])
+
+if output_path.suffix == ".parquet":
+    import pyarrow.parquet as pq
+    writer = pq.ParquetWriter(output_path, schema)
+else:
+    writer = pa.ipc.new_file(str(output_path), schema)
+
+rows = 0
+
+with writer:
+    for frame, _ in labelled_chunks():
+        frame[FEATURE_COLUMNS] = scaler.transform(frame[FEATURE_COLUMNS])
+        writer.write_table(pa.Table.from_pandas(frame[columns], schema=schema, preserve_index=False))
+        rows += len(frame)
+
+write_time = time.time() - start
+
+print(f"\n✔ Saved to: {output_path}")
+print(f"   Final Shape: ({rows}, {len(columns)})")
+print(f"   Wall time: fit {fit_time:.2f}s, write {write_time:.2f}s; peak memory {peak_memory_mb():.0f} MB")
@@ -1,21 +1,27 @@
 from pathlib import Path
-import pandas as pd
 import numpy as np
 from sklearn.preprocessing import MinMaxScaler
 from sklearn.decomposition import PCA
 import matplotlib.pyplot as plt
 import seaborn as sns
 import warnings
+from utils import DROP_COLUMNS, GROUP_COLUMN, resolve_table, load_table, save_table
 warnings.filterwarnings("ignore")
 
 BASE_DIR = Path().resolve().parent
-DATA_PATH = BASE_DIR / "data" / "labelled" / "features_labeled.csv"
+
+# features_labeled.arrow / .parquet / .npz / .csv, first one found
+DATA_PATH = resolve_table(BASE_DIR / "data" / "labelled" / "features_labeled")
 PROCESSED_DIR = BASE_DIR / "data" / "processed"
 PROCESSED_DIR.mkdir(parents=True, exist_ok=True)
 
+# Columnar input keeps a columnar processed dataset; .npz is the feature
+# store layout, so the (scaled, reshaped) processed table goes to Parquet
+OUTPUT_SUFFIX = {".csv": ".csv", ".arrow": ".arrow"}.get(DATA_PATH.suffix, ".parquet")
+
 # Load Data
 
-df = pd.read_csv(DATA_PATH)
+df = load_table(DATA_PATH)
 
 if "Id" in df.columns:
     df = df.drop(columns=["Id"])
@@ -24,17 +30,24 @@ print("Initial Shape:", df.shape)
 print("Sample view:")
 print(df.head)
 
+# Document of every row, for train/test splits that keep a document's
+# repeated rows on one side. Files of several PDFs are concatenated, so
+# without a document column a new one starts where page numbers restart
+
+if GROUP_COLUMN not in df.columns and "page_number" in df.columns:
+    df[GROUP_COLUMN] = (df["page_number"].diff() < 0).cumsum().astype(str)
+    print("Documents:", df[GROUP_COLUMN].nunique())
+
 # Drop Noise Columns
 
-drop_cols = ["page_number", "content", "type", "contains_numbering"]
-df = df.drop(columns=[col for col in drop_cols if col in df.columns])
+df = df.drop(columns=[col for col in DROP_COLUMNS if col in df.columns])
 print("Shape after dropping noise cols:", df.shape)
 print("Sample view:")
 print(df.head)
 
 # Fill numeric NaN with median
 
-num_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+num_cols = [col for col in df.select_dtypes(include=[np.number]).columns if col != GROUP_COLUMN]
 for col in num_cols:
     df[col] = df[col].fillna(0)
 
@@ -51,8 +64,8 @@ print(df.head())
 
 # Save
 
-OUTPUT_PATH = PROCESSED_DIR / "pdf_featured_processed_dataset.csv"
-df.to_csv(OUTPUT_PATH, index=False)
+OUTPUT_PATH = PROCESSED_DIR / ("pdf_featured_processed_dataset" + OUTPUT_SUFFIX)
+save_table(df, OUTPUT_PATH)
 
 print(f"\n✔ Saved to: {OUTPUT_PATH}")
 print(f"   Final Shape: {df.shape}")
@@ -1,6 +1,7 @@
-import joblib
-import pandas as pd
+import sys
 import json
+import time
+import argparse
 from pathlib import Path
 
 # ---------------------------------------
@@ -8,63 +9,97 @@ from pathlib import Path
 # ---------------------------------------
 
 BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from app.models.classifier import Classifier  # noqa: E402
+from app.features.feature_io import (  # noqa: E402
+    BINARY_FORMATS,
+    STREAM_FORMATS,
+    FeatureWriter,
+    iter_chunks,
+    path_format,
+    read_rows,
+    read_store,
+)
+
 MODEL_DIR = BASE_DIR / "models"
-INPUT_JSON_PATH = BASE_DIR / "data" / "testing" / "demo_testing.json"
+INPUT_PATH = BASE_DIR / "data" / "testing" / "demo_testing.json"
 
 OUTPUT_DIR = BASE_DIR / "data" / "predictions"
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-
 OUTPUT_JSON_PATH = OUTPUT_DIR / "demo_testing_with_predictions.json"
 
 # ---------------------------------------
-# Load Model & Scaler
+# Arguments
 # ---------------------------------------
 
-model = joblib.load(MODEL_DIR / "pdf_structure_analyze_model.pkl")
-scaler = joblib.load(MODEL_DIR / "minmax_scaler.pkl")
+parser = argparse.ArgumentParser(
+    description="Label feature rows with the trained model. A .json output "
+                "is written at once; .jsonl, .parquet and .arrow outputs are "
+                "written chunk by chunk with bounded memory."
+)
+parser.add_argument("input", nargs="?", default=INPUT_PATH,
+                    help="Features: .json, .jsonl, .parquet, .arrow or .npz")
+parser.add_argument("output", nargs="?", default=OUTPUT_JSON_PATH,
+                    help="Labelled rows: .json, .jsonl, .parquet or .arrow")
+parser.add_argument("--model-dir", default=MODEL_DIR)
+parser.add_argument("--chunk-rows", type=int, default=50000,
+                    help="Rows per chunk when streaming")
+args = parser.parse_args()
 
-print("Model and scaler loaded successfully.")
+Path(args.output).parent.mkdir(parents=True, exist_ok=True)
 
 # ---------------------------------------
-# Load JSON Input
+# Load Model & Scaler
 # ---------------------------------------
 
-with open(INPUT_JSON_PATH, "r") as f:
-    data = json.load(f)
+classifier = Classifier(args.model_dir)
 
-# Convert to list if single object
-if isinstance(data, dict):
-    data = [data]
-
-df = pd.DataFrame(data)
+print("Model and scaler loaded successfully.")
 
 # ---------------------------------------
-# Ensure Correct Feature Order
+# Streaming Prediction
 # ---------------------------------------
 
+if path_format(args.output) in STREAM_FORMATS:
 
+    start = time.time()
 
-expected_columns = list(scaler.feature_names_in_)
+    # One chunk of input rows, its input matrix and its labels in memory
+    # at a time; labelled rows are appended to the output as they come
+    with FeatureWriter(args.output) as writer:
+        for chunk in iter_chunks(args.input, args.chunk_rows):
+            if isinstance(chunk, list):
+                labels = classifier.predict_rows(chunk)
+            else:
+                labels = classifier.predict_store(chunk)
 
-for col in expected_columns:
-    if col not in df.columns:
-        df[col] = 0
+            writer.write(chunk, labels)
 
-# Select only model-required columns (but keep original df untouched)
-df_features = df[expected_columns]
+            print(f"  {writer.rows} rows labelled")
 
-# ---------------------------------------
-# Apply Min-Max Scaling
-# ---------------------------------------
+    print(f"\nPredictions for {writer.rows} rows saved to: {args.output} "
+          f"({time.time() - start:.2f}s)")
 
-scaled_values = scaler.transform(df_features)
-df_scaled = pd.DataFrame(scaled_values, columns=expected_columns)
+    if classifier.cascade is not None:
+        print("Rows per cascade stage:", classifier.cascade.stats())
+    sys.exit()
 
 # ---------------------------------------
-# Prediction
+# Load Input (.json, .jsonl, .parquet, .arrow or .npz)
 # ---------------------------------------
 
-predictions = model.predict(df_scaled)
+# Input matrix in the model's column order, checked against
+# models/feature_schema.json; missing values take the schema default.
+# Rows go through the cascade when the model has one.
+if path_format(args.input) in BINARY_FORMATS:
+    # Columnar files load straight into the store (Arrow memory-mapped);
+    # rows are only rebuilt to write the predictions out
+    store = read_store(args.input)
+    data = store.to_rows()
+    predictions = classifier.predict_store(store)
+else:
+    data = read_rows(args.input)
+    predictions = classifier.predict_rows(data)
 
 # ---------------------------------------
 # Attach Prediction to Original JSON
@@ -77,7 +112,10 @@ for i in range(len(data)):
 # Save Updated JSON
 # ---------------------------------------
 
-with open(OUTPUT_JSON_PATH, "w") as f:
+with open(args.output, "w") as f:
     json.dump(data, f, indent=4)
 
-print(f"\nPredictions saved to: {OUTPUT_JSON_PATH}")
\ No newline at end of file
+print(f"\nPredictions saved to: {args.output}")
+
+if classifier.cascade is not None:
+    print("Rows per cascade stage:", classifier.cascade.stats())
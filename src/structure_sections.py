@@ -1,3 +1,4 @@
+import sys
 import json
 from pathlib import Path
 
@@ -6,6 +7,11 @@ from pathlib import Path
 # ---------------------------------------
 
 BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+# Section order and merge rules live in app/sections.py
+from app.sections import build_sections  # noqa: E402
+
 INPUT_JSON_PATH = BASE_DIR / "data" / "predictions" / "demo_testing_with_predictions.json"
 
 OUTPUT_DIR = BASE_DIR / "data" / "extracted"
@@ -21,85 +27,11 @@ with open(INPUT_JSON_PATH, "r") as f:
     data = json.load(f)
 
 # ---------------------------------------
-# Section Order (CHANGE ORDER HERE IF NEEDED)
-# ---------------------------------------
-
-SECTION_ORDER = ["Heading", "Subheading", "Paragraph", "Table", "Image"]
-
-# ---------------------------------------
-# Build Sections (Improved Merge Logic)
+# Build Sections (shared with the in-process pipeline stage)
 # ---------------------------------------
 
-sections = []
-current_section = None
-previous_label = None
-
-for block in data:
-    label = block.get("predicted_label")
-    content = block.get("content")
-
-    if label not in SECTION_ORDER:
-        continue
-
-    # -------------------------
-    # Start New Section
-    # -------------------------
-    if label in ["Heading", "Subheading"]:
-
-        # Merge consecutive headings
-        if current_section and label == previous_label:
-            if label == "Heading":
-                current_section["heading"] += " " + content
-            else:
-                if current_section["subheading"]:
-                    current_section["subheading"] += " " + content
-                else:
-                    current_section["subheading"] = content
-        else:
-            if current_section:
-                sections.append(current_section)
-
-            current_section = {
-                "heading": content if label == "Heading" else None,
-                "subheading": content if label == "Subheading" else None,
-                "paragraphs": [],
-                "tables": [],
-                "images": []
-            }
-
-    # -------------------------
-    # Inside Section
-    # -------------------------
-    elif current_section:
-
-        # Merge consecutive paragraphs
-        if label == "Paragraph":
-            if previous_label == "Paragraph" and current_section["paragraphs"]:
-                current_section["paragraphs"][-1] += " " + content
-            else:
-                current_section["paragraphs"].append(content)
-
-        # Merge consecutive tables
-        elif label == "Table":
-            if previous_label == "Table" and current_section["tables"]:
-                current_section["tables"][-1] += " " + content
-            else:
-                current_section["tables"].append(content)
-
-        # Merge consecutive images (DO NOT END SECTION)
-        elif label == "Image":
-            if previous_label == "Image" and current_section["images"]:
-                current_section["images"][-1] += " " + content
-            else:
-                current_section["images"].append(content)
-
-    previous_label = label
+sections = build_sections(data)
 
-# Append last section
-if current_section:
-    sections.append(current_section)
-    
-    
 # ---------------------------------------
 # Save Structured JSON
 # ---------------------------------------
@@ -1,39 +1,177 @@
+import sys
 import time
+import argparse
 import joblib
 import numpy as np
 from pathlib import Path
 
+import sklearn
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import KFold, RandomizedSearchCV
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import (
+    GroupKFold,
+    HalvingRandomSearchCV,
+    KFold,
+    ParameterGrid,
+    RandomizedSearchCV
+)
 from sklearn.metrics import (
     accuracy_score,
     classification_report,
-    confusion_matrix
+    confusion_matrix,
+    f1_score,
+    make_scorer
 )
 import matplotlib.pyplot as plt
 import seaborn as sns
 from sklearn.model_selection import cross_val_score
 from sklearn.preprocessing import MinMaxScaler
-from utils import load_data, split_data
-
+from utils import (
+    GROUP_COLUMN,
+    compact_rows,
+    fit_sharded_forest,
+    load_data,
+    peak_memory_mb,
+    resolve_table,
+    sample_shards,
+    split_data,
+)
 
 BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from app.models.forest import FOREST_FILE, export_forest  # noqa: E402
+from app.models.feature_schema import SCHEMA_FILE, build_schema, save_schema  # noqa: E402
+from app.models.classifier import Classifier  # noqa: E402
+from app.models.cascade import (  # noqa: E402
+    CASCADE_FILE,
+    calibrate,
+    evaluate,
+    save_cascade,
+    type_codes_from_features,
+)
+
+
 PLOT_DIR  = BASE_DIR / "data" / "processed"
 MODEL_DIR = BASE_DIR / "models"
 PLOT_DIR.mkdir(parents=True, exist_ok=True)
 MODEL_DIR.mkdir(parents=True, exist_ok=True)
 
+# ---------------------------------------
+# Arguments
+# ---------------------------------------
+
+parser = argparse.ArgumentParser(
+    description="Train the structure classifier. With --out-of-core the processed "
+                "dataset is streamed in chunks into class-balanced shards of bounded "
+                "size instead of loaded whole, and one forest per shard is merged."
+)
+parser.add_argument("--out-of-core", action="store_true",
+                    help="Train on data larger than memory")
+parser.add_argument("--shards", type=int, default=4)
+parser.add_argument("--shard-rows", type=int, default=200000,
+                    help="Rows kept per shard (split evenly between classes)")
+parser.add_argument("--test-rows", type=int, default=None,
+                    help="Held-out rows kept for evaluation (default: --shard-rows)")
+parser.add_argument("--chunk-rows", type=int, default=100000)
+parser.add_argument("--search", choices=["random", "halving"], default="random",
+                    help="halving: successive halving, most candidates only see a "
+                         "fraction of the resource")
+parser.add_argument("--halving-resource", choices=["n_samples", "n_estimators"], default="n_samples",
+                    help="What successive halving grows: training rows or trees")
+parser.add_argument("--no-dedup", action="store_true",
+                    help="Keep duplicate training rows instead of weighting unique ones")
+args = parser.parse_args()
+
+run_start = time.time()
+
+# Wall time per phase, reported at the end
+phase_times = {}
+
 # ---------------------------------------
 # Load Processed Data using utils
 # ---------------------------------------
 
-df = load_data("pdf_featured_processed_dataset.csv")
+scaler = MinMaxScaler()
+
+if args.out_of_core:
+    # One pass over the file; the scaler is partial_fit on training rows
+    # and only the sampled shards and held-out rows stay in memory
+    dataset_path = resolve_table(BASE_DIR / "data" / "processed" / "pdf_featured_processed_dataset")
+    print(f"\nStreaming {dataset_path} into {args.shards} shards of up to {args.shard_rows} rows...")
+
+    load_start = time.time()
+    shards, X_test, y_test, shard_stats = sample_shards(
+        dataset_path,
+        target_column="label",
+        scaler=scaler,
+        shards=args.shards,
+        shard_rows=args.shard_rows,
+        test_rows=args.test_rows,
+        chunk_rows=args.chunk_rows
+    )
+    load_time = time.time() - load_start
+
+    print("\nClass Distribution:")
+    print(shard_stats["class_counts"])
+    print(f"Rows: {shard_stats['rows']}, training rows: {shard_stats['train_rows']}, "
+          f"per class per shard: {shard_stats['per_class_quota']}")
+    print(f"Shard rows: {shard_stats['shard_rows']}, held-out rows kept: {shard_stats['test_rows']}")
+else:
+    # .arrow, .parquet or .csv, whichever data_preprocessing.py wrote
+    load_start = time.time()
+    df = load_data("pdf_featured_processed_dataset")
+
+    print("\nClass Distribution:")
+    print(df["label"].value_counts())
+
+    X_train, X_test, y_train, y_test = split_data(df, target_column="label")
+    load_time = time.time() - load_start
 
-print("\nClass Distribution:")
-print(df["label"].value_counts())
+phase_times["load data"] = load_time
 
-X_train, X_test, y_train, y_test = split_data(df, target_column="label")
+print(f"Data Load Time: {load_time:.2f} seconds, peak memory {peak_memory_mb():.0f} MB")
 
+# ---------------------------------------
+# Deduplicate Training Rows
+# ---------------------------------------
+
+# Running headers, footers and logos repeat the same feature row many
+# times. Each (features, label) row is kept once per document with its
+# number of copies as sample_weight, which the split criterion, the
+# leaf sizes (see the parameter grid) and the scores count in full.
+# Bootstrap draws kept rows; the weights scale each draw.
+start = time.time()
+
+if args.out_of_core:
+    rows_before = sum(len(X) for X, _ in shards)
+    if args.no_dedup:
+        shards = [(X, y, np.ones(len(X))) for X, y in shards]
+    else:
+        shards = [compact_rows(X, y) for X, y in shards]
+
+    # Search, diagnosis and cross-validation run on the first shard
+    X_train, y_train, train_weights = shards[0]
+    rows_after = sum(len(X) for X, _, _ in shards)
+    train_groups = None
+else:
+    # Documents of the training rows, for cross-validation folds;
+    # compacted within each document so a kept row's copies share its fold
+    train_groups = df.loc[X_train.index, GROUP_COLUMN] if GROUP_COLUMN in df.columns else None
+
+    rows_before = len(X_train)
+    if args.no_dedup:
+        train_weights = np.ones(len(X_train))
+    else:
+        X_train, y_train, train_weights = compact_rows(X_train, y_train, train_groups)
+        if train_groups is not None:
+            train_groups = train_groups.loc[X_train.index]
+    rows_after = len(X_train)
+
+phase_times["deduplicate"] = time.time() - start
+
+print(f"Training rows: {rows_before} -> {rows_after} unique "
+      f"({rows_before - rows_after} duplicates removed, {1 - rows_after / max(rows_before, 1):.1%})")
 print("Training shape:", X_train.shape)
 print("Testing shape:", X_test.shape)
 
@@ -41,9 +179,19 @@ print("Testing shape:", X_test.shape)
 # Min-Max Scaling
 # ---------------------------------------
 
-scaler = MinMaxScaler()
+# Feature names, dtypes and defaults, saved with the model for predict
+feature_schema = build_schema(X_train)
+
+# Unscaled held-out rows, as predict sees them, for the cascade
+X_test_features = X_test.to_numpy(dtype=np.float32)
+test_type_codes = type_codes_from_features(X_test_features, X_test.columns)
 
-X_train = scaler.fit_transform(X_train)   # fit only on training
+if args.out_of_core:
+    # Already fitted on every training row while streaming
+    shards = [(scaler.transform(X), y, w) for X, y, w in shards]
+    X_train = shards[0][0]
+else:
+    X_train = scaler.fit_transform(X_train)   # fit only on training
 X_test = scaler.transform(X_test)         # transform test
 
 print("MinMax Scaling Applied.")
@@ -52,7 +200,12 @@ print("MinMax Scaling Applied.")
 # Model Definition (Random Forest)
 # ---------------------------------------
 
-model = RandomForestClassifier(random_state=42)
+# Route sample_weight to every fit and score of the search and the
+# cross-validation, so weighted unique rows count like their copies
+sklearn.set_config(enable_metadata_routing=True)
+
+model = RandomForestClassifier(random_state=42).set_fit_request(sample_weight=True)
+scoring = make_scorer(f1_score, average="weighted").set_score_request(sample_weight=True)
 
 param_grid = {
     "n_estimators": [100],      
@@ -61,18 +214,63 @@ param_grid = {
     "min_samples_leaf": [10, 15, 20]     # Forcing larger final prediction buckets
 }
 
+# min_samples_leaf / min_samples_split count kept rows, not copies, and
+# act far coarser on compacted rows. Leaf sizes become the same number
+# of copies as a weight fraction; a leaf of L copies already forces
+# splits of 2L, and sklearn has no weighted min_samples_split.
+if not args.no_dedup:
+    total_weight = float(np.sum(train_weights))
+    param_grid["min_weight_fraction_leaf"] = [
+        leaf / total_weight for leaf in param_grid.pop("min_samples_leaf")
+    ]
+    param_grid.pop("min_samples_split")
+
 kfold = KFold(n_splits=3, shuffle=True, random_state=42)  # reduced from 5 to 3 folds
 
-grid = RandomizedSearchCV(                                  # switched from GridSearchCV
-    model,
-    param_grid,
-    n_iter=20,
-    cv=kfold,
-    scoring="f1_weighted",
-    n_jobs=-1,
-    verbose=1,
-    random_state=42
-)
+# Whole documents per fold when the dataset names them, as in the
+# train / test split
+grouped = train_groups is not None and train_groups.nunique() >= 5
+if grouped:
+    kfold = GroupKFold(n_splits=3)
+
+# Split once; the search and the halving cross-validation reuse them
+folds = list(kfold.split(X_train, y_train, train_groups))
+
+if args.search == "halving":
+    # Every candidate starts on a small share of the resource and the
+    # best third moves on with three times as much, until the last
+    # candidates use all training rows (or up to 100 trees)
+    halving_grid = dict(param_grid)
+    halving_options = {}
+
+    if args.halving_resource == "n_estimators":
+        halving_grid.pop("n_estimators")
+        halving_options = {"resource": "n_estimators", "max_resources": 100}
+
+    grid = HalvingRandomSearchCV(
+        model,
+        halving_grid,
+        n_candidates=min(27, len(ParameterGrid(halving_grid))),
+        factor=3,
+        min_resources="exhaust",
+        cv=folds,
+        scoring=scoring,
+        n_jobs=-1,
+        verbose=1,
+        random_state=42,
+        **halving_options
+    )
+else:
+    grid = RandomizedSearchCV(                              # switched from GridSearchCV
+        model,
+        param_grid,
+        n_iter=min(20, len(ParameterGrid(param_grid))),   # the compacted grid has 9
+        cv=folds,
+        scoring=scoring,
+        n_jobs=-1,
+        verbose=1,
+        random_state=42
+    )
 
 # ---------------------------------------
 # Train Model (with timing)
@@ -81,11 +279,16 @@ grid = RandomizedSearchCV(                                  # switched from Grid
 print("\nStarting hyperparameter search...")
 start = time.time()
 
-grid.fit(X_train, y_train)
+grid.fit(X_train, y_train, sample_weight=train_weights)
 
 search_time = time.time() - start
+phase_times["search"] = search_time
 print(f"\nHyperparameter Search Time: {search_time:.2f} seconds")
 
+if args.search == "halving":
+    for iteration, (candidates, resources) in enumerate(zip(grid.n_candidates_, grid.n_resources_)):
+        print(f"  iteration {iteration}: {candidates} candidates x {resources} {args.halving_resource}")
+
 print("Best Parameters:", grid.best_params_)
 print("Best CV R2:", grid.best_score_)
 
@@ -96,10 +299,22 @@ retrain_start = time.time()
 best_params = grid.best_params_.copy()
 best_params["n_estimators"] = 300
 
-best_model = RandomForestClassifier(**best_params, random_state=42)
-best_model.fit(X_train, y_train)
+if args.out_of_core:
+    # 300 trees split over the shards, merged into one forest
+    best_params.pop("n_estimators")
+    best_model = fit_sharded_forest(shards, best_params, n_estimators=300, random_state=42)
+    best_model.set_fit_request(sample_weight=True)
+else:
+    # The search refitted the best candidate on all training rows with
+    # 100 trees; warm start adds the other 200. Tree seeds continue the
+    # same sequence, so the model equals a fresh 300-tree fit.
+    best_model = grid.best_estimator_
+    best_model.set_params(warm_start=True, n_estimators=300)
+    best_model.fit(X_train, y_train, sample_weight=train_weights)
+    best_model.set_params(warm_start=False)
 
 retrain_time = time.time() - retrain_start
+phase_times["retrain"] = retrain_time
 total_time = search_time + retrain_time
 
 print(f"Retraining Time:            {retrain_time:.2f} seconds")
@@ -109,6 +324,8 @@ print("\n---------------------------------------")
 print("        FINAL TEST PERFORMANCE")
 print("---------------------------------------")
 
+start = time.time()
+
 # Predictions
 y_pred = best_model.predict(X_test)
 
@@ -132,14 +349,18 @@ plt.ylabel("Actual")
 plt.title("Confusion Matrix")
 plt.savefig(PLOT_DIR / "confusion_matrix.png", dpi=150)
 
+phase_times["evaluate"] = time.time() - start
+
 print("\n---------------------------------------")
 print("          MODEL DIAGNOSIS")
 print("---------------------------------------")
 
+start = time.time()
+
 # Compare Training vs Testing Accuracy (Overfitting Check)
 y_train_pred = best_model.predict(X_train)
 
-train_acc = accuracy_score(y_train, y_train_pred)
+train_acc = accuracy_score(y_train, y_train_pred, sample_weight=train_weights)
 test_acc = accuracy
 
 print(f"Training Accuracy: {train_acc:.4f}")
@@ -152,18 +373,33 @@ elif train_acc < 0.60:
 else:
     print("=> Diagnosis: Model is generalizing well!")
 
+phase_times["diagnosis"] = time.time() - start
+
 # Cross Validation
-print("\nRunning 5-Fold Cross-Validation on Training Data...")
+start = time.time()
+
+# The halving mode reuses the search folds: 3 fits instead of 5
+if args.search == "halving":
+    cv_folds = folds
+elif grouped:
+    cv_folds = list(GroupKFold(n_splits=5).split(X_train, y_train, train_groups))
+else:
+    cv_folds = 5
+cv_count = len(folds) if args.search == "halving" else 5
+print(f"\nRunning {cv_count}-Fold Cross-Validation on Training Data...")
 
 cv_scores = cross_val_score(
     best_model,
     X_train,
     y_train,
-    cv=5,
-    scoring='f1_weighted',
+    cv=cv_folds,
+    scoring=scoring,
+    params={"sample_weight": train_weights},
     n_jobs=-1
 )
 
+phase_times["cross-validation"] = time.time() - start
+
 print(f"CV F1 Scores for each fold: {np.round(cv_scores, 4)}")
 print(f"Average CV F1: {cv_scores.mean():.4f}")
 print(f"Score Variance (+/-): {cv_scores.std() * 2:.4f}")
@@ -181,7 +417,85 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 MODEL_PATH = BASE_DIR / "models"
 MODEL_PATH.mkdir(parents=True, exist_ok=True)
 
+start = time.time()
+
 joblib.dump(best_model, MODEL_PATH / "pdf_structure_analyze_model.pkl")
 joblib.dump(scaler, MODEL_PATH / "minmax_scaler.pkl")
 
+# Flattened copy for the vectorized evaluator (app/models/forest.py);
+# served processes memory-map it and share its pages. Pruned variants:
+# python -m app.models.forest --trees N --max-depth D, compared by
+# benchmarks/model_export.py
+export_forest(best_model, scaler, MODEL_PATH / FOREST_FILE)
+
+save_schema(feature_schema, MODEL_PATH / SCHEMA_FILE)
+
+phase_times["save + export"] = time.time() - start
+
 print("\nModel and scaler saved successfully.")
+
+# ---------------------------------------
+# Cascade: type -> first trees -> full forest
+# ---------------------------------------
+
+start = time.time()
+
+# Calibrate on one half of the held-out split, report on the other
+calibration_rows = slice(0, None, 2)
+report_rows = slice(1, None, 2)
+y_test_labels = np.asarray(y_test, dtype=object)
+
+cascade_path = MODEL_PATH / CASCADE_FILE
+if cascade_path.exists():
+    cascade_path.unlink()
+
+classifier = Classifier(MODEL_PATH)
+
+cascade_config, calibration = calibrate(
+    classifier.forest,
+    X_test_features[calibration_rows],
+    test_type_codes[calibration_rows],
+    y_test_labels[calibration_rows]
+)
+
+print("\nCascade calibration (first-stage trees, threshold):")
+print(f"  full forest accuracy:          {calibration['full_accuracy']:.4f}")
+print(f"  type stage + forest accuracy:  {calibration['type_stage_accuracy']:.4f}")
+for candidate in calibration["candidates"]:
+    print(f"  {candidate['first_stage_trees']:>3} trees, >= {candidate['threshold']:.2f}: "
+          f"accuracy {candidate['accuracy']:.4f}, "
+          f"exits {candidate['first_stage_exit']:.1%}, "
+          f"cost {candidate['relative_cost']:.2f}")
+
+if cascade_config is None:
+    print("=> No first stage keeps the accuracy; cascade not saved.")
+else:
+    save_cascade(cascade_config, cascade_path)
+    print(f"=> Saved {cascade_config} to {cascade_path}")
+
+    classifier = Classifier(MODEL_PATH)
+    result = evaluate(
+        classifier.cascade,
+        classifier.predict_full,
+        X_test_features[report_rows],
+        test_type_codes[report_rows],
+        y_test_labels[report_rows]
+    )
+
+    print(f"\nCascade on {result['rows']} held-out rows:")
+    print(f"  rows per stage:   {result['stage_fractions']}")
+    print(f"  accuracy:         full {result['full_accuracy']:.4f}, cascade {result['cascade_accuracy']:.4f}")
+    print(f"  predict latency:  full {result['full_ms']:.1f} ms, cascade {result['cascade_ms']:.1f} ms")
+
+# ---------------------------------------
+# Resources
+# ---------------------------------------
+
+phase_times["cascade"] = time.time() - start
+run_time = time.time() - run_start
+
+print("\nWall time per phase:")
+for phase, seconds in phase_times.items():
+    print(f"  {phase:<18} {seconds:>8.2f}s  {seconds / run_time:>6.1%}")
+print(f"  {'total':<18} {run_time:>8.2f}s")
+print(f"Peak memory: {peak_memory_mb():.0f} MB")
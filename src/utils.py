@@ -1,22 +1,286 @@
+import sys
+import resource
+import numpy as np
 import pandas as pd
 from pathlib import Path
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import GroupShuffleSplit
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from app.features.feature_io import read_frame  # noqa: E402
+
+# Tried in this order when a dataset name has no suffix
+TABLE_SUFFIXES = [".arrow", ".parquet", ".npz", ".csv"]
+
+# Not model inputs: identifiers, raw text and noise features
+DROP_COLUMNS = ["Id", "page_number", "content", "type", "contains_numbering"]
+
+# Document a processed row came from; used to group splits, never a feature
+GROUP_COLUMN = "document"
+
+
+def resolve_table(path):
+    """
+    Return path itself, or with no suffix given, the first existing
+    path among TABLE_SUFFIXES.
+    """
+    path = Path(path)
+
+    if path.suffix:
+        return path
+
+    for suffix in TABLE_SUFFIXES:
+        candidate = path.with_suffix(suffix)
+        if candidate.exists():
+            return candidate
+
+    raise FileNotFoundError(f"No {'/'.join(TABLE_SUFFIXES)} file for {path}")
+
+
+def load_table(path):
+    """
+    Load a dataset as a DataFrame: CSV through pandas, Parquet/Arrow/npz
+    feature files directly (Arrow memory-mapped).
+    """
+    return read_frame(resolve_table(path))
+
+
+def save_table(df, path):
+    """
+    Save a dataset as CSV or, for .parquet/.arrow/.feather, as a typed
+    columnar file.
+    """
+    path = Path(path)
+
+    if path.suffix == ".csv":
+        df.to_csv(path, index=False)
+    elif path.suffix == ".parquet":
+        df.to_parquet(path, index=False)
+    elif path.suffix in (".arrow", ".feather"):
+        df.reset_index(drop=True).to_feather(path)
+    else:
+        raise ValueError(f"Unsupported dataset format: {path}")
+
 
 def load_data(filename):
-    BASE_DIR = Path(__file__).resolve().parent.parent
     data_path = BASE_DIR / "data" / "processed" / filename
-    df = pd.read_csv(data_path)
+    df = load_table(data_path)
     return df
 
 
-def split_data(df, target_column, test_size=0.2):
-    X = df.drop(columns=[target_column])
+def row_hashes(X, y):
+    """
+    64-bit hash of every row's feature values plus its label; equal
+    rows hash equal.
+    """
+    return pd.util.hash_pandas_object(X.assign(_label=np.asarray(y)), index=False).to_numpy()
+
+
+def split_groups(df, target_column, group_column=GROUP_COLUMN):
+    """
+    Group of every row for splitting: its document when df has at least
+    two, else its feature + label hash, so exact duplicates share a
+    group either way.
+    """
+    if group_column in df.columns and df[group_column].nunique() >= 2:
+        return df[group_column].to_numpy()
+
+    X = df.drop(columns=[col for col in (target_column, group_column) if col in df.columns])
+    return row_hashes(X, df[target_column])
+
+
+def split_data(df, target_column, test_size=0.2, group_column=GROUP_COLUMN):
+    """
+    Train / test split by group (split_groups): whole documents go to
+    one side, so repeated headers, footers and logos of a document
+    cannot be on both. group_column is dropped from X.
+
+    test_size is the share of groups, not of rows: with documents of
+    very different lengths the test set can hold far more or fewer
+    than test_size of the rows.
+    """
+    X = df.drop(columns=[col for col in (target_column, group_column) if col in df.columns])
     y = df[target_column]
 
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y,
-        test_size=test_size,
-        random_state=42,
-    )
+    splitter = GroupShuffleSplit(n_splits=1, test_size=test_size, random_state=42)
+    train, test = next(splitter.split(X, y, split_groups(df, target_column, group_column)))
+
+    return X.iloc[train], X.iloc[test], y.iloc[train], y.iloc[test]
+
+
+def compact_rows(X, y, groups=None):
+    """
+    Collapse exact duplicate (features, label) rows into their first
+    occurrence, weighted by the number of copies. With groups, only
+    copies within the same group are collapsed, so every kept row and
+    its weight belong to one document and grouped folds stay disjoint.
+    The weights count every copy in the split criterion, scores and
+    min_weight_fraction_leaf; min_samples_leaf / min_samples_split and
+    bootstrap count kept rows.
+
+    Returns (X, y, sample_weight); X keeps the index of the kept rows.
+    """
+    keys = X if groups is None else X.assign(_group=np.asarray(groups))
+    codes, _ = pd.factorize(row_hashes(keys, y))
+    first = np.unique(codes, return_index=True)[1]
+    weights = np.bincount(codes).astype(np.float64)
+
+    return X.iloc[first], y.iloc[first], weights
+
+
+def iter_frames(path, chunk_rows=100000, columns=None):
+    """
+    Yield a dataset as DataFrames of up to chunk_rows rows: Parquet by
+    row batches, Arrow as slices of the memory map, CSV through
+    pandas' chunked reader. An .npz feature file is loaded whole.
+    """
+    path = resolve_table(path)
+
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        source = pq.ParquetFile(path, memory_map=True)
+        for batch in source.iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+
+    elif path.suffix in (".arrow", ".feather"):
+        import pyarrow as pa
+
+        with pa.memory_map(str(path), "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+            if columns is not None:
+                table = table.select(columns)
+            for start in range(0, table.num_rows, chunk_rows):
+                yield table.slice(start, chunk_rows).to_pandas()
+
+    elif path.suffix == ".csv":
+        yield from pd.read_csv(path, chunksize=chunk_rows, usecols=columns)
+
+    else:
+        frame = load_table(path)
+        if columns is not None:
+            frame = frame[columns]
+        for start in range(0, len(frame), chunk_rows):
+            yield frame.iloc[start:start + chunk_rows]
+
+
+def sample_shards(path, target_column, scaler, shards=4, shard_rows=200000,
+                  test_size=0.2, test_rows=None, chunk_rows=100000, random_state=42,
+                  group_column=GROUP_COLUMN):
+    """
+    One streaming pass over a dataset larger than memory. A row is held
+    out when the hash of its document (or, without a group_column, of
+    its features and label) falls below test_size, so duplicates stay
+    on one side as in split_data(); training rows are partial_fit
+    into scaler and dealt to a random shard. Every shard keeps a uniform
+    sample of up to shard_rows // classes rows per class (the rows with
+    the smallest random keys), so shards are class balanced as far as
+    the data allows; at most test_rows held-out rows are kept, uniformly.
+    Classes are counted in the same pass: the quota only shrinks as new
+    classes appear, so the rows kept under it include the final sample.
+    Peak memory is about shards * shard_rows + test_rows + chunk_rows
+    rows, whatever the size of the file.
+
+    Returns ([(X, y) per shard], X_test, y_test, stats); X is unscaled.
+    """
+    rng = np.random.default_rng(random_state)
+    test_rows = test_rows or shard_rows
+
+    def smallest_keys(frame, rows, by_class):
+        frame = frame.sort_values("_key", kind="stable")
+        if by_class:
+            return frame.groupby(target_column, sort=False).head(rows)
+        return frame.head(rows)
+
+    kept = [None] * shards
+    kept_test = None
+    train_rows = 0
+    counts = pd.Series(dtype="int64")
+
+    for frame in iter_frames(path, chunk_rows):
+        # Per-class quota for the classes seen so far
+        counts = counts.add(frame[target_column].value_counts(), fill_value=0)
+        per_class = max(shard_rows // max(len(counts), 1), 1)
+
+        if group_column in frame.columns:
+            groups = pd.util.hash_pandas_object(frame[group_column], index=False).to_numpy()
+            frame = frame.drop(columns=[group_column])
+        else:
+            groups = row_hashes(frame.drop(columns=[target_column]), frame[target_column])
+
+        held_out = groups / 2.0 ** 64 < test_size
+        frame = frame.assign(_key=rng.random(len(frame)))
+
+        train = frame[~held_out]
+        train_rows += len(train)
+        if len(train):
+            scaler.partial_fit(train.drop(columns=[target_column, "_key"]))
+
+        kept_test = smallest_keys(pd.concat([kept_test, frame[held_out]]), test_rows, False)
+
+        shard_of = rng.integers(shards, size=len(train))
+        for shard in range(shards):
+            kept[shard] = smallest_keys(
+                pd.concat([kept[shard], train[shard_of == shard]]), per_class, True
+            )
+
+    # Trim every shard to the quota of all classes
+    kept = [smallest_keys(frame, per_class, True) for frame in kept]
+
+    def split(frame):
+        frame = frame.drop(columns=["_key"]).reset_index(drop=True)
+        return frame.drop(columns=[target_column]), frame[target_column]
+
+    X_test, y_test = split(kept_test)
+
+    stats = {
+        "rows": int(counts.sum()),
+        "train_rows": train_rows,
+        "class_counts": counts.astype(int).to_dict(),
+        "per_class_quota": per_class,
+        "shard_rows": [len(frame) for frame in kept],
+        "test_rows": len(X_test),
+    }
+
+    return [split(frame) for frame in kept], X_test, y_test, stats
+
+
+def fit_sharded_forest(shards, params, n_estimators, random_state=42):
+    """
+    Fit a RandomForestClassifier on each (X, y) or (X, y, sample_weight)
+    shard, splitting n_estimators between them, and merge the trees
+    into one forest.
+    A forest averages its trees' class probabilities, so the merged
+    model is a regular forest whose trees each saw one shard.
+    """
+    from sklearn.ensemble import RandomForestClassifier
+
+    forests = []
+
+    for i, (X, y, *weights) in enumerate(shards):
+        trees = n_estimators // len(shards) + (i < n_estimators % len(shards))
+        forest = RandomForestClassifier(**params, n_estimators=trees, random_state=random_state + i)
+        forests.append(forest.fit(X, y, sample_weight=weights[0] if weights else None))
+
+    merged = forests[0]
+
+    for i, forest in enumerate(forests[1:], start=1):
+        if not np.array_equal(forest.classes_, merged.classes_):
+            missing = sorted(set(merged.classes_) ^ set(forest.classes_))
+            raise ValueError(
+                f"Shard {i} does not have the same classes as shard 0 ({missing}); "
+                f"use fewer shards or more rows per shard"
+            )
+        merged.estimators_ += forest.estimators_
+
+    merged.n_estimators = len(merged.estimators_)
+
+    return merged
+
 
-    return X_train, X_test, y_train, y_test
\ No newline at end of file
+def peak_memory_mb():
+    """
+    Peak resident memory of this process so far (Linux reports KB).
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024